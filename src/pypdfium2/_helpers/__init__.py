@@ -6,8 +6,11 @@ from pypdfium2._helpers.misc import *
 from pypdfium2._helpers.matrix import *
 from pypdfium2._helpers.bitmap import *
 from pypdfium2._helpers.document import *
+from pypdfium2._helpers.parallel import *
 from pypdfium2._helpers.attachment import *
 from pypdfium2._helpers.page import *
+from pypdfium2._helpers.cache import *
+from pypdfium2._helpers.stats import *
 from pypdfium2._helpers.pageobjects import *
 from pypdfium2._helpers.textpage import *
 from pypdfium2._helpers.sysfontinfo import *
@@ -1,13 +1,15 @@
 # SPDX-FileCopyrightText: 2026 geisserml <geisserml@gmail.com>
 # SPDX-License-Identifier: Apache-2.0 OR BSD-3-Clause
 
-__all__ = ("PdfBitmap", "PdfPosConv")
+__all__ = ("PdfBitmap", "PdfBitmapPool", "PdfPosConv")
 
 import ctypes
 import logging
+from collections import OrderedDict
 import pypdfium2.raw as pdfium_c
 import pypdfium2.internal as pdfium_i
 from pypdfium2._helpers.misc import PdfiumError
+from pypdfium2._helpers.matrix import PdfMatrix
 from pypdfium2._lazy import Lazy
 from pypdfium2.version import PDFIUM_INFO
 
@@ -187,6 +189,18 @@ class PdfBitmap (pdfium_i.AutoCloseable):
         return cls(raw, buffer, width, height, stride, format, rev_byteorder, needs_free=True)
     
     
+    # Pickling support, so bitmaps can be returned from worker processes (see PdfDocument.render_pages()).
+    # This copies the pixel data. The unpickled bitmap is a native bitmap and no longer associated with a page, so it does not support get_posconv().
+    
+    def __reduce__(self):
+        return (PdfBitmap._from_pickle, (self.width, self.height, self.format, self.rev_byteorder, self.stride, bytearray(self.buffer)))
+    
+    @classmethod
+    def _from_pickle(cls, width, height, format, rev_byteorder, stride, data):
+        buffer = (ctypes.c_ubyte * len(data)).from_buffer(data)
+        return cls.new_native(width, height, format, rev_byteorder, buffer=buffer, stride=stride)
+    
+    
     def fill_rect(self, color, left, top, width, height):
         """
         Fill a rectangle on the bitmap with the given color.
@@ -351,6 +365,101 @@ def _pil_convert_for_pdfium(pil_image):
     return pil_image
 
 
+class PdfBitmapPool:
+    """
+    Pool of reusable bitmaps, keyed by size and format.
+    
+    Rendering many pages of equal size (as is typical for a document) allocates and frees a large pixel buffer per page.
+    A pool avoids this by handing out released bitmaps again if size and format match.
+    It may be passed as *bitmap_maker* to :meth:`.PdfPage.render`, or bitmaps may be taken from the pool and used with :meth:`.PdfPage.render_into`.
+    
+    Example::
+        
+        pool = PdfBitmapPool()
+        for page in pdf:
+            bitmap = page.render(scale=2, bitmap_maker=pool)
+            process(bitmap)
+            pool.release(bitmap)
+    
+    Warning:
+        A bitmap must only be released when neither it nor any views of its buffer (e.g. from :meth:`.PdfBitmap.to_numpy` or :meth:`.PdfBitmap.to_pil`) are in use anymore, as the buffer will be overwritten when the bitmap is handed out again.
+        The pool is not thread-safe.
+    
+    Parameters:
+        max_idle (int):
+            Maximum number of released bitmaps to keep. If exceeded, the least recently released bitmaps are dropped.
+        bitmap_maker (typing.Callable):
+            Callback function used to create new bitmaps if no matching one is available.
+    """
+    
+    def __init__(self, max_idle=4, bitmap_maker=PdfBitmap.new_native):
+        self.max_idle = max_idle
+        self.bitmap_maker = bitmap_maker
+        self._idle = OrderedDict()
+        self._n_idle = 0
+    
+    def __repr__(self):
+        return f"<{type(self).__name__} idle={self._n_idle}>"
+    
+    def __len__(self):
+        return self._n_idle
+    
+    def __call__(self, width, height, format, rev_byteorder=False):
+        """
+        Get a bitmap of the given size and format, reusing a released one if available.
+        Takes the same parameters as :meth:`.PdfBitmap.new_native`, so the pool may be used as bitmap maker.
+        
+        Note that the content of a reused bitmap is undefined, i.e. it still holds whatever was drawn on it previously.
+        
+        Returns:
+            PdfBitmap: The bitmap.
+        """
+        key = (width, height, format, rev_byteorder)
+        bitmaps = self._idle.get(key)
+        if not bitmaps:
+            return self.bitmap_maker(width, height, format=format, rev_byteorder=rev_byteorder)
+        bitmap = bitmaps.pop()
+        if not bitmaps:
+            del self._idle[key]
+        self._n_idle -= 1
+        return bitmap
+    
+    def release(self, bitmap):
+        """
+        Give back a bitmap to the pool, so it may be handed out again.
+        
+        Parameters:
+            bitmap (PdfBitmap):
+                A bitmap that is no longer in use. This need not have been created by the pool, but it should be writable and not be closed.
+        """
+        bitmap._render_args = None
+        key = (bitmap.width, bitmap.height, bitmap.format, bitmap.rev_byteorder)
+        self._idle.setdefault(key, []).append(bitmap)
+        self._idle.move_to_end(key)
+        self._n_idle += 1
+        while self._n_idle > self.max_idle:
+            self._drop_oldest()
+    
+    def _drop_oldest(self):
+        key, bitmaps = next(iter(self._idle.items()))
+        bitmap = bitmaps.pop(0)
+        if not bitmaps:
+            del self._idle[key]
+        self._n_idle -= 1
+        bitmap.close()
+    
+    def clear(self):
+        """
+        Drop all released bitmaps.
+        """
+        while self._n_idle > 0:
+            self._drop_oldest()
+    
+    # workers get a fresh pool of their own (see PdfDocument.render_pages())
+    def __reduce__(self):
+        return (PdfBitmapPool, (self.max_idle, self.bitmap_maker))
+
+
 class PdfPosConv:
     """
     Pdf coordinate translator.
@@ -370,6 +479,8 @@ class PdfPosConv:
     def __init__(self, page, pos_args):
         self.page = page
         self.pos_args = pos_args
+        self._matrix = None
+        self._inv_matrix = None
     
     def __repr__(self):
         return f"{PdfPosConv.__name__}({self.page}, {self.pos_args})"
@@ -393,3 +504,87 @@ class PdfPosConv:
         if not ok:
             raise PdfiumError("Failed to translate to bitmap coordinates.")
         return (bitmap_x.value, bitmap_y.value)
+    
+    def get_matrix(self):
+        """
+        Get the transformation matrix from page to bitmap coordinates.
+        It is derived once from the page geometry (bounding box and rotation) and the canvas args, the same way pdfium does internally.
+        
+        Returns:
+            PdfMatrix: Page to bitmap matrix.
+        """
+        if self._matrix is None:
+            self._matrix = _get_display_matrix(self.page.get_bbox(), self.page.get_rotation(), *self.pos_args)
+        return self._matrix
+    
+    def to_bitmap_many(self, points):
+        """
+        Translate many points from page to bitmap at once.
+        This applies :meth:`.get_matrix` with numpy, rather than calling into pdfium for each point.
+        
+        Parameters:
+            points (numpy.ndarray | typing.Sequence[tuple[float, float]]):
+                Page coordinates, in an array-like structure of shape ``(..., 2)``.
+        Returns:
+            numpy.ndarray: Bitmap coordinates as floats, with the same shape as *points*.
+            Note that :meth:`.to_bitmap` returns integers, because pdfium rounds. Use e.g. :func:`numpy.rint` to get the same values.
+        """
+        return _apply_matrix(self.get_matrix(), points)
+    
+    def to_page_many(self, points):
+        """
+        Translate many points from bitmap to page at once (see :meth:`.to_bitmap_many`).
+        
+        Parameters:
+            points (numpy.ndarray | typing.Sequence[tuple[float, float]]):
+                Bitmap coordinates, in an array-like structure of shape ``(..., 2)``.
+        Returns:
+            numpy.ndarray: Page coordinates, with the same shape as *points*.
+        """
+        if self._inv_matrix is None:
+            self._inv_matrix = _invert_matrix(self.get_matrix())
+        return _apply_matrix(self._inv_matrix, points)
+
+
+def _get_display_matrix(bbox, page_rotation, start_x, start_y, size_x, size_y, rotate):
+    
+    # See CPDF_Page::UpdateDimensions() and CPDF_Page::GetDisplayMatrix() in pdfium/core/fpdfapi/page/cpdf_page.cpp
+    
+    # the page matrix maps from PDF coordinates to the page's visual orientation, with the origin at the bottom left
+    left, bottom, right, top = bbox
+    page_matrix = {
+        0:   PdfMatrix(1, 0, 0, 1, -left, -bottom),
+        90:  PdfMatrix(0, -1, 1, 0, -bottom, right),
+        180: PdfMatrix(-1, 0, 0, -1, right, top),
+        270: PdfMatrix(0, 1, -1, 0, top, -left),
+    }[page_rotation]
+    width, height = right - left, top - bottom
+    if page_rotation in (90, 270):
+        width, height = height, width
+    if width == 0 or height == 0:
+        raise PdfiumError("Cannot derive transformation matrix for a page with zero size.")
+    
+    # device positions of the visual top left (x0, y0), bottom left (x1, y1) and top right (x2, y2) corners
+    x0, y0, x1, y1, x2, y2 = {
+        0: (start_x, start_y + size_y, start_x, start_y, start_x + size_x, start_y + size_y),
+        1: (start_x, start_y, start_x + size_x, start_y, start_x, start_y + size_y),
+        2: (start_x + size_x, start_y, start_x + size_x, start_y + size_y, start_x, start_y),
+        3: (start_x + size_x, start_y + size_y, start_x, start_y + size_y, start_x + size_x, start_y),
+    }[rotate % 4]
+    display_matrix = PdfMatrix((x2-x0)/width, (y2-y0)/width, (x1-x0)/height, (y1-y0)/height, x0, y0)
+    
+    return page_matrix.multiply(display_matrix)
+
+
+def _invert_matrix(m):
+    det = m.a*m.d - m.b*m.c
+    a, b, c, d = m.d/det, -m.b/det, -m.c/det, m.a/det
+    return PdfMatrix(a, b, c, d, -(m.e*a + m.f*c), -(m.e*b + m.f*d))
+
+
+def _apply_matrix(m, points):
+    np = Lazy.numpy
+    points = np.asarray(points, dtype=np.float64)
+    if points.shape[-1:] != (2, ):
+        raise ValueError(f"Points must have shape (..., 2), got {points.shape}")
+    return points @ np.array([[m.a, m.b], [m.c, m.d]]) + (m.e, m.f)
@@ -0,0 +1,275 @@
+# SPDX-FileCopyrightText: 2026 geisserml <geisserml@gmail.com>
+# SPDX-License-Identifier: Apache-2.0 OR BSD-3-Clause
+
+__all__ = ("PdfRenderCache", )
+
+import os
+import time
+import ctypes
+import struct
+import hashlib
+import inspect
+import logging
+import weakref
+from pathlib import Path
+from collections import OrderedDict
+import pypdfium2.raw as pdfium_c
+from pypdfium2._helpers.bitmap import PdfBitmap
+from pypdfium2._helpers.page import PdfPage, _parse_renderopts
+
+logger = logging.getLogger(__name__)
+
+# Render options that do not affect the pixel data.
+_IGNORED_OPTS = ("bitmap_maker", )
+
+# Defaults of all options accepted by PdfPage.render(), including the ones passed through to _parse_renderopts().
+_RENDER_DEFAULTS = {
+    name: param.default
+    for func in (PdfPage.render, _parse_renderopts)
+    for name, param in inspect.signature(func).parameters.items()
+    if param.default is not inspect.Parameter.empty and name not in _IGNORED_OPTS
+}
+
+# Bitmap entries: magic, width, height, stride, format, rev_byteorder, followed by the buffer.
+_BITMAP_HEADER = struct.Struct("<4sIIIi?")
+_BITMAP_MAGIC = b"PFBM"
+
+
+class PdfRenderCache:
+    """
+    Cache for rendering results, to avoid re-rendering the same pages with the same options.
+    
+    Entries are keyed by document identity, page index and the normalized rendering options.
+    They are held in memory and/or stored in a directory on disk, each bounded by size with least recently used eviction.
+    The disk cache may be shared across processes and runs. Files are written atomically, and the least recently used files are deleted if the total size exceeds the limit.
+    
+    Besides bitmaps, arbitrary data (e.g. encoded image files) may be stored using :meth:`.get_key`, :meth:`.get` and :meth:`.put`.
+    
+    Note:
+        Document identity is based on the changing file identifier by default.
+        This is re-calculated by producers when a document is saved, but not when it is modified in memory, so do not use the cache with documents that are edited between renderings.
+        Documents without identifier fall back to a hash of their content, which requires them to have been loaded from a file path or bytes.
+    
+    Parameters:
+        max_memory (int):
+            Maximum number of bytes to hold in memory. 0 disables the memory cache.
+        directory (str | pathlib.Path | None):
+            Directory for the disk cache. If None, only cache in memory.
+        max_disk (int):
+            Maximum total number of bytes to store on disk.
+        key_by (str):
+            How to identify documents: ``"id"`` for the changing file identifier with hash fallback, or ``"hash"`` to always hash the content.
+    """
+    
+    def __init__(self, max_memory=256*1024**2, directory=None, max_disk=1024**3, key_by="id"):
+        if key_by not in ("id", "hash"):
+            raise ValueError(f"Invalid key_by {key_by!r}, expected 'id' or 'hash'.")
+        self.max_memory = max_memory
+        self.directory = None if directory is None else Path(directory).expanduser().resolve()
+        self.max_disk = max_disk
+        self.key_by = key_by
+        self._memory = OrderedDict()
+        self._memory_size = 0
+        self._disk_size = None
+        self._doc_keys = weakref.WeakKeyDictionary()
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+    
+    def __repr__(self):
+        return f"{type(self).__name__}(max_memory={self.max_memory}, directory={self.directory!r}, max_disk={self.max_disk})"
+    
+    def _get_doc_key(self, pdf):
+        doc_key = self._doc_keys.get(pdf)
+        if doc_key is None:
+            identifier = pdf.get_identifier(pdfium_c.FILEIDTYPE_CHANGING) if self.key_by == "id" else b""
+            if identifier:
+                doc_key = "id:" + identifier.hex()
+            else:
+                doc_key = "sha256:" + _hash_input(pdf._input)
+            self._doc_keys[pdf] = doc_key
+        return doc_key
+    
+    def get_key(self, pdf, index, extra=None, **kwargs):
+        """
+        Parameters:
+            pdf (PdfDocument): The document.
+            index (int): Zero-based index of the page.
+            extra (typing.Any):
+                Further data to include in the key (e.g. output format, if storing encoded files). Must have a stable :func:`repr`.
+            kwargs (dict):
+                Rendering options, as taken by :meth:`.PdfPage.render`.
+        Returns:
+            str: Cache key (a hex digest).
+        """
+        unknown = kwargs.keys() - _RENDER_DEFAULTS.keys() - set(_IGNORED_OPTS)
+        if unknown:
+            raise TypeError(f"Unknown rendering options {sorted(unknown)}")
+        opts = {**_RENDER_DEFAULTS, **{k: v for k, v in kwargs.items() if k not in _IGNORED_OPTS}}
+        # forms are only drawn if the document has a form env
+        opts["may_draw_forms"] = bool(opts["may_draw_forms"] and pdf.formenv)
+        if opts["color_scheme"] is not None:
+            opts["color_scheme"] = opts["color_scheme"].colors
+        key_data = (self._get_doc_key(pdf), index, sorted((k, _normalize(v)) for k, v in opts.items()), extra)
+        return hashlib.sha256( repr(key_data).encode() ).hexdigest()
+    
+    def _get_path(self, key):
+        return self.directory / f"{key}.bin"
+    
+    def get(self, key):
+        """
+        Returns:
+            bytes | None: The data stored for *key*, or None if not cached.
+        """
+        data = self._memory.get(key)
+        if data is not None:
+            self._memory.move_to_end(key)
+            return data
+        if self.directory is None:
+            return None
+        path = self._get_path(key)
+        try:
+            data = path.read_bytes()
+            _touch(path)
+        except FileNotFoundError:
+            return None
+        self._memory_put(key, data)
+        return data
+    
+    def put(self, key, data):
+        """
+        Store *data* (bytes) for *key*.
+        """
+        self._memory_put(key, data)
+        if self.directory is not None:
+            self._disk_put(key, data)
+    
+    def _memory_put(self, key, data):
+        if len(data) > self.max_memory:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_size -= len(old)
+        self._memory[key] = data
+        self._memory_size += len(data)
+        while self._memory_size > self.max_memory:
+            _, dropped = self._memory.popitem(last=False)
+            self._memory_size -= len(dropped)
+    
+    def _disk_put(self, key, data):
+        if len(data) > self.max_disk:
+            return
+        path = self._get_path(key)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(data)
+        _touch(tmp_path)
+        os.replace(tmp_path, path)
+        if self._disk_size is None:
+            self._disk_size = sum(size for _, size, _ in self._scan_disk())
+        else:
+            self._disk_size += len(data)
+        if self._disk_size > self.max_disk:
+            self._evict_disk()
+    
+    def _scan_disk(self):
+        # other processes may write and evict concurrently, so tolerate files vanishing
+        for entry in os.scandir(self.directory):
+            if not entry.name.endswith(".bin"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            yield entry.path, stat.st_size, stat.st_mtime_ns
+    
+    def _evict_disk(self):
+        entries = sorted(self._scan_disk(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_disk:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._disk_size = total
+    
+    def clear(self):
+        """
+        Remove all entries from memory and disk.
+        """
+        self._memory.clear()
+        self._memory_size = 0
+        if self.directory is not None:
+            for path, _, _ in list( self._scan_disk() ):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            self._disk_size = 0
+    
+    def render(self, pdf, index, **kwargs):
+        """
+        Get a rendering of a page, from the cache if available.
+        On a cache hit, the page is not loaded or rendered, so the resulting bitmap does not support :meth:`.PdfBitmap.get_posconv`.
+        
+        Parameters:
+            pdf (PdfDocument): The document.
+            index (int): Zero-based index of the page.
+            kwargs (dict): Rendering options, as taken by :meth:`.PdfPage.render`.
+        Returns:
+            PdfBitmap: The rendered page. The bitmap is not shared with the cache, so it may be modified by the caller.
+        """
+        key = self.get_key(pdf, index, **kwargs)
+        data = self.get(key)
+        if data is not None:
+            return _unpack_bitmap(data)
+        bitmap = pdf[index].render(**kwargs)
+        self.put(key, _pack_bitmap(bitmap))
+        return bitmap
+
+
+def _touch(path):
+    # The modification time serves as last access time for eviction.
+    # Set it explicitly, because file system timestamps may be too coarse to order consecutive writes.
+    now = time.time()
+    os.utime(path, (now, now))
+
+
+def _normalize(value):
+    # make equal options produce equal keys (e.g. scale 1 vs 1.0, lists vs tuples)
+    if isinstance(value, bool) or value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _normalize(v)) for k, v in value.items()))
+    return repr(value)
+
+
+def _hash_input(input):
+    hasher = hashlib.sha256()
+    if isinstance(input, (str, Path)):
+        with open(input, "rb") as fh:
+            for chunk in iter(lambda: fh.read(2**20), b""):
+                hasher.update(chunk)
+    elif isinstance(input, (bytes, bytearray, memoryview)):
+        hasher.update(input)
+    else:
+        raise ValueError("Cannot identify document for caching: it has no file identifier and was not loaded from a file path or bytes.")
+    return hasher.hexdigest()
+
+
+def _pack_bitmap(bitmap):
+    header = _BITMAP_HEADER.pack(_BITMAP_MAGIC, bitmap.width, bitmap.height, bitmap.stride, bitmap.format, bitmap.rev_byteorder)
+    return header + bytes(bitmap.buffer)[:bitmap.stride*bitmap.height]
+
+
+def _unpack_bitmap(data):
+    magic, width, height, stride, format, rev_byteorder = _BITMAP_HEADER.unpack_from(data)
+    if magic != _BITMAP_MAGIC:
+        raise ValueError("Cache entry is not a bitmap.")
+    buffer = (ctypes.c_ubyte * (stride*height)).from_buffer_copy(data, _BITMAP_HEADER.size)
+    return PdfBitmap.new_native(width, height, format, rev_byteorder=rev_byteorder, buffer=buffer, stride=stride)
@@ -3,10 +3,12 @@
 
 __all__ = ("PdfDocument", "PdfFormEnv", "PdfXObject", "PdfBookmark", "PdfDest")
 
+import os
 import sys
 import ctypes
 import logging
 import warnings
+import functools
 from pathlib import Path
 from codecs import decode
 
@@ -17,6 +19,17 @@ from pypdfium2._helpers.misc import PdfiumError, PdfiumWarning
 from pypdfium2._helpers.page import PdfPage
 from pypdfium2._helpers.pageobjects import PdfObject
 from pypdfium2._helpers.attachment import PdfAttachment
+from pypdfium2._helpers.parallel import (
+    _render_job,
+    _render_shared_job,
+    _check_shared_memory,
+    _get_shared_name_prefix,
+    _attach_shared_results,
+    _estimate_costs,
+    _estimate_bitmap_bytes,
+    _render_parallel,
+)
+from pypdfium2._helpers.stats import _timed_job, _collect_stats
 
 logger = logging.getLogger(__name__)
 
@@ -485,6 +498,128 @@ class PdfDocument (pdfium_i.AutoCloseable):
         return (size.width, size.height)
     
     
+    def render_pages(self, pages=None, processes=None, ordered=True, converter=None, shared_memory=False, schedule="order", mp_strategy="spawn", timeout=None, retries=0, on_failure="raise", max_memory=None, recycle_after=None, recycle_rss=None, stats=None, **kwargs):
+        """
+        Render multiple pages in parallel, using a pool of worker processes.
+        
+        Each worker re-opens the document from its original input, so changes made to the document in the current process are not taken into account.
+        Documents loaded from a file path are opened by path. For byte buffers and streams, the data is copied into a single shared memory block, which workers open in place, so it is neither pickled for nor duplicated in each worker.
+        If the document has an active form env, workers will initialize forms as well.
+        
+        Transferring bitmaps from workers to the main process is expensive, so it is recommended to pass a *converter* that processes the bitmap within the worker (e.g. saves it to a file) and returns only a minimal result (e.g. the output path).
+        The converter is called as ``converter(index, bitmap, page)`` and must be picklable (e.g. a module-level function, or an instance of a module-level class).
+        If a :class:`.PdfBitmapPool` is passed as *bitmap_maker* along with a converter, each worker recycles bitmaps once the converter has returned, so the converter must not keep any references to the bitmap's buffer.
+        
+        If *timeout*, *retries* or ``on_failure="skip"`` are given, workers are supervised: each worker is handed one page at a time, a worker that exceeds the timeout on a page is killed, and a worker that crashes (e.g. on a segfault in pdfium) is detected. Either way, the worker is replaced and the page retried or reported as failed, while the other pages go on.
+        Supervised rendering always uses worker processes, even for a single process or page, so that the current process is isolated from crashes.
+        
+        If *max_memory* is given, the size of each page's bitmap is predicted from the page size and rendering options, and a page is only handed to a worker if it fits in what is left of the budget, so that several workers rendering large pages at once cannot exhaust memory. Pages are admitted in order, and a page that exceeds the budget on its own is rendered once no other page is in flight.
+        The budget only covers the bitmaps rendered by the workers. Memory used by a *converter* (e.g. encoding buffers), results held by the caller, and idle bitmaps kept by a :class:`.PdfBitmapPool` are not accounted for.
+        
+        On long runs, workers tend to grow due to pdfium's per-document caches and heap fragmentation. With *recycle_after* or *recycle_rss*, a worker is replaced by a fresh one once it has rendered the given number of pages or its resident memory exceeds the threshold. This happens between pages, and the replacement re-opens the document.
+        
+        Parameters:
+            pages (list[int] | None):
+                Zero-based indices of the pages to render. If None, all pages are rendered.
+            processes (int | None):
+                Maximum number of worker processes. Defaults to :func:`os.cpu_count`.
+                If this is 1, or only one page is to be rendered, pages are rendered linearly in the current process instead.
+            ordered (bool):
+                If True, yield results in the order of *pages*. Otherwise, yield results as soon as they are available (completion order).
+            converter (typing.Callable | None):
+                Callback to process each bitmap within the worker. If None, the bitmap itself is returned.
+            shared_memory (bool):
+                If True, workers render into :mod:`multiprocessing.shared_memory` blocks, and bitmaps are handed to the caller without copying the pixel data. This is meant for in-process consumers (e.g. feeding :meth:`.PdfBitmap.to_numpy` arrays to a model). Each bitmap's block is unmapped and freed once the bitmap and any views of its buffer (e.g. numpy arrays) have been garbage collected.
+                Cannot be combined with a *converter*. Requires numpy. Not supported on Windows.
+            schedule (str):
+                How to dispatch pages to workers. ``order`` dispatches pages in the given order.
+                ``cost`` estimates the cost of each page up front (from page size, object count, image pixels and transparency), and dispatches the most expensive pages first, with cheap pages batched together. This reduces idle workers at the end on documents with a few heavy pages. Results are still yielded in page order if *ordered* is True.
+                Note that the estimate is a serial up-front cost: every requested page is loaded once in the current process before any worker is started.
+            mp_strategy (str):
+                The process start method to use (``spawn``, ``forkserver`` or ``fork``).
+            timeout (float | None):
+                Wall-clock time limit per page in seconds, counting from when the page was handed to a worker. Enables supervision.
+            retries (int):
+                Number of times a failed page is retried with a fresh worker. Enables supervision if non-zero.
+            on_failure (str):
+                What to do with pages that failed on every attempt. ``raise`` raises a :exc:`RuntimeError` once the page is due in the results. ``skip`` yields a :class:`.PdfJobFailure` as the page's result instead, and enables supervision.
+            max_memory (int | None):
+                Budget in bytes for the bitmaps that workers render at a time. Pages are dispatched one at a time in this mode, as with supervision. Does not apply to linear rendering, which holds only one bitmap anyway (a warning is logged).
+            recycle_after (int | None):
+                Number of pages after which a worker is recycled. Pages are dispatched one at a time in this mode. Like supervision, this always uses worker processes.
+            recycle_rss (int | None):
+                Resident memory in bytes above which a worker is recycled after its current page. Pages are dispatched one at a time in this mode. Like supervision, this always uses worker processes. Not supported on Windows.
+            stats (PdfRenderStats | None):
+                If given, record per-page timings of the rendering stages, and bitmap and output bytes, into this object (see :class:`.PdfRenderStats`). Its wall clock is started on the first page and stopped once all results were yielded.
+            kwargs (dict):
+                Rendering options, as taken by :meth:`.PdfPage.render`.
+        Yields:
+            (int, typing.Any): A tuple of page index and result (i.e. the converter's return value, a :class:`.PdfBitmap`, or a :class:`.PdfJobFailure`).
+        """
+        
+        if shared_memory:
+            _check_shared_memory(converter)
+        
+        if pages is None:
+            pages = list(range(len(self)))
+        if processes is None:
+            processes = os.cpu_count()
+        
+        # supervision and worker recycling require worker processes, even for a single process or page
+        supervised = timeout is not None or retries > 0 or on_failure != "raise" or recycle_after is not None or recycle_rss is not None
+        linear = (processes <= 1 or len(pages) <= 1) and not supervised
+        if linear and max_memory is not None:
+            logger.warning("max_memory does not apply to linear rendering, which holds only one bitmap at a time.")
+        
+        if stats is not None:
+            stats.start()
+        
+        if linear:
+            job = _render_job if stats is None else functools.partial(_timed_job, _render_job)
+            results = ((i, job(i, self, kwargs, converter)) for i in pages)
+            if stats is not None:
+                results = _collect_stats(stats, results)
+        
+        else:
+            
+            if schedule == "order":
+                costs = None
+            elif schedule == "cost":
+                costs = _estimate_costs(self, pages, kwargs.get("scale", 1))
+            else:
+                raise ValueError(f"Invalid schedule {schedule!r}")
+            
+            if shared_memory:
+                name_prefix = _get_shared_name_prefix()
+                job = functools.partial(_render_shared_job, name_prefix=name_prefix)
+            else:
+                job = _render_job
+            results = _render_parallel(
+                type(self), self._input, self._password, bool(self.formenv), pages, kwargs,
+                converter = converter,
+                processes = processes,
+                ordered = ordered,
+                mp_strategy = mp_strategy,
+                job = job if stats is None else functools.partial(_timed_job, job),
+                costs = costs,
+                timeout = timeout,
+                retries = retries,
+                on_failure = on_failure,
+                max_memory = max_memory,
+                recycle_after = recycle_after,
+                recycle_rss = recycle_rss,
+                item_bytes = None if max_memory is None else _estimate_bitmap_bytes(self, pages, kwargs),
+            )
+            if stats is not None:
+                results = _collect_stats(stats, results)
+            if shared_memory:
+                results = _attach_shared_results(results, name_prefix, pages)
+        
+        yield from results
+        if stats is not None:
+            stats.stop()
+    
+    
     def get_page_label(self, index):
         """
         Returns:
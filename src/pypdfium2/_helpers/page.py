@@ -1,9 +1,10 @@
 # SPDX-FileCopyrightText: 2026 geisserml <geisserml@gmail.com>
 # SPDX-License-Identifier: Apache-2.0 OR BSD-3-Clause
 
-__all__ = ("PdfPage", "PdfColorScheme")
+__all__ = ("PdfPage", "PdfColorScheme", "PdfProgressiveRender")
 
 import math
+import time
 import ctypes
 import logging
 import weakref
@@ -11,6 +12,7 @@ import pypdfium2.raw as pdfium_c
 import pypdfium2.internal as pdfium_i
 from pypdfium2._helpers.misc import PdfiumError
 from pypdfium2._helpers.bitmap import PdfBitmap
+from pypdfium2._helpers.matrix import PdfMatrix
 from pypdfium2._helpers.textpage import PdfTextPage
 from pypdfium2._helpers.pageobjects import PdfObject
 from pypdfium2.version import PDFIUM_INFO
@@ -346,10 +348,8 @@ class PdfPage (pdfium_i.AutoCloseable):
         return rc
     
     
-    # TODO
-    # - add helpers for matrix-based and interruptible rendering
-    # - add lower-level renderer that takes a caller-provided bitmap
-    # e.g. render(), render_ex(), render_matrix(), render_matrix_ex()
+    # TODO add helpers for matrix-based rendering
+    # e.g. render_matrix(), render_matrix_into()
     
     def render(
             self,
@@ -360,6 +360,9 @@ class PdfPage (pdfium_i.AutoCloseable):
             bitmap_maker = PdfBitmap.new_native,
             color_scheme = None,
             fill_to_stroke = False,
+            max_width = None,
+            max_height = None,
+            max_pixels = None,
             **kwargs
         ):
         """
@@ -382,6 +385,16 @@ class PdfPage (pdfium_i.AutoCloseable):
             may_draw_forms (bool):
                 If True, render form fields (provided the document has forms and :meth:`~.PdfDocument.init_forms` was called).
             
+            max_width (int | None):
+                If given, reduce the scale as needed so that the rendering is at most this wide, in pixels.
+                This allows bounding the size of bitmaps for documents with varying page sizes. Limits apply to the page before cropping.
+            
+            max_height (int | None):
+                If given, reduce the scale as needed so that the rendering is at most this high, in pixels.
+            
+            max_pixels (int | None):
+                If given, reduce the scale as needed so that the rendering has at most this many pixels (width times height).
+            
             bitmap_maker (typing.Callable):
                 Callback function used to create the :class:`.PdfBitmap`.
             
@@ -456,10 +469,209 @@ class PdfPage (pdfium_i.AutoCloseable):
         .. [#user_unit] Since PDF 1.6, pages may define an additional user unit factor. In this case, 1 canvas unit is equivalent to ``user_unit * (1/72)`` inches. PDFium does not currently provide an API to get the user unit, so this is not taken into account.
         """
         
-        src_width  = math.ceil(self.get_width()  * scale)
-        src_height = math.ceil(self.get_height() * scale)
+        bitmap, render_args, fpdf_cs = self._prepare_render(None, scale, rotation, crop, bitmap_maker, color_scheme, fill_to_stroke, max_width=max_width, max_height=max_height, max_pixels=max_pixels, **kwargs)
+        _render_sync(self, bitmap, render_args, may_draw_forms, fpdf_cs)
+        return bitmap
+    
+    
+    def render_into(self, bitmap, may_draw_forms=True, **kwargs):
+        """
+        Rasterize the page into a caller-provided bitmap, instead of allocating a new one.
+        
+        This takes the same parameters as :meth:`.render`, except for *bitmap_maker*.
+        The pixel format and byte order are taken from the bitmap, so format selection options are ignored (but *grayscale* still applies as rendering flag).
+        The bitmap is filled with the fill color before rendering, so it may be reused across pages, e.g. with a :class:`.PdfBitmapPool`.
+        
+        Parameters:
+            bitmap (PdfBitmap):
+                The target bitmap. Its size must match the size of the rendering, as determined by *scale*, *rotation* and *crop*.
+        Returns:
+            PdfBitmap: The given bitmap, holding the rendered page.
+        Raises:
+            ValueError: If the bitmap size does not match.
+        """
+        bitmap, render_args, fpdf_cs = self._prepare_render(bitmap, **kwargs)
+        _render_sync(self, bitmap, render_args, may_draw_forms, fpdf_cs)
+        return bitmap
+    
+    
+    def render_tiles(
+            self,
+            scale = 1,
+            tile_size = 1024,
+            rotation = 0,
+            overlap = 0,
+            tiles = None,
+            may_draw_forms = True,
+            bitmap_maker = PdfBitmap.new_native,
+            **kwargs
+        ):
+        """
+        Rasterize the page in tiles, so that large pages can be rendered at high resolution with bounded memory usage.
+        
+        Each tile is rendered separately using :func:`FPDF_RenderPageBitmapWithMatrix`, clipped to the tile's region, so peak memory depends on the tile size rather than the page size.
+        Together, the tiles cover the same canvas as ``page.render(scale=scale, rotation=rotation)``. Tiles at the right and bottom edge may be smaller than *tile_size*.
+        Note that anti-aliasing may differ slightly at tile borders compared to a full rendering.
+        
+        This takes the rendering options of :meth:`.render`, except for *crop* and *color_scheme*.
+        The pixel format is selected once for all tiles. :meth:`.PdfBitmap.get_posconv` works on tiles, with coordinates relative to the tile.
+        
+        Parameters:
+            tile_size (int | tuple[int, int]):
+                Maximum width and height of a tile, in pixels (excluding overlap).
+            overlap (int):
+                Number of pixels by which tiles extend into their neighbours on each inner side (as in the Deep Zoom format).
+            tiles (typing.Iterable[tuple[int, int]] | None):
+                Grid positions (column, row) of the tiles to render, in the given order. If None, all tiles are rendered row by row, from top left to bottom right.
+        Yields:
+            (int, int, PdfBitmap): Horizontal and vertical offset of the tile in the full canvas, and the tile bitmap.
+        """
+        
+        if isinstance(tile_size, int):
+            tile_size = (tile_size, tile_size)
+        tile_w, tile_h = tile_size
+        if tile_w < 1 or tile_h < 1:
+            raise ValueError(f"Tile size must be positive, but got {tile_size}")
+        
+        matrix, width, height = self._get_tiling_matrix(scale, rotation)
+        cl_format, rev_byteorder, fill_color, flags = _parse_renderopts(self, **kwargs)
+        rotation = pdfium_i.RotationToConst[rotation]
+        
+        n_cols, n_rows = math.ceil(width / tile_w), math.ceil(height / tile_h)
+        if tiles is None:
+            tiles = ((col, row) for row in range(n_rows) for col in range(n_cols))
+        
+        for col, row in tiles:
+            if not (0 <= col < n_cols and 0 <= row < n_rows):
+                raise ValueError(f"Tile {(col, row)} is out of bounds for a grid of {n_cols}x{n_rows}")
+            x, y = max(col*tile_w - overlap, 0), max(row*tile_h - overlap, 0)
+            w = min((col+1)*tile_w + overlap, width) - x
+            h = min((row+1)*tile_h + overlap, height) - y
+            bitmap = bitmap_maker(w, h, format=cl_format, rev_byteorder=rev_byteorder)
+            bitmap.fill_rect(fill_color, 0, 0, w, h)
+            clip = pdfium_c.FS_RECTF(0, 0, w, h)
+            pdfium_c.FPDF_RenderPageBitmapWithMatrix(bitmap, self, matrix.translate(-x, -y), clip, flags)
+            # equivalent canvas args for form drawing and PdfPosConv
+            render_args = (bitmap, self, -x, -y, width, height, rotation, flags)
+            _finish_render(self, bitmap, render_args, may_draw_forms)
+            yield x, y, bitmap
+    
+    
+    def _get_tiling_matrix(self, scale, rotation):
+        
+        # FPDF_RenderPageBitmapWithMatrix() applies the page's display matrix first, which maps the page (including its own rotation) to a top-left based canvas of 1 unit per pixel.
+        # Add the extra rotation on top, and stretch to the same rounded-up canvas size as render() so tiles line up with a full rendering.
+        page_w, page_h = self.get_size()
+        matrix = {
+            0:   PdfMatrix(),
+            90:  PdfMatrix(0, 1, -1, 0, page_h, 0),
+            180: PdfMatrix(-1, 0, 0, -1, page_w, page_h),
+            270: PdfMatrix(0, -1, 1, 0, 0, page_w),
+        }[rotation]
         if rotation in (90, 270):
-            src_width, src_height = src_height, src_width
+            page_w, page_h = page_h, page_w
+        
+        width  = math.ceil(page_w * scale)
+        height = math.ceil(page_h * scale)
+        matrix = matrix.scale(width/page_w, height/page_h)
+        
+        return matrix, width, height
+    
+    
+    def get_thumbnail(self, max_size, use_embedded=True, **kwargs):
+        """
+        Get a thumbnail of the page that fits into *max_size*.
+        
+        If the page has an embedded thumbnail image that is big enough (i.e. at least the size of a rendering fitted to *max_size*, but not larger than *max_size*), it is returned as-is.
+        Otherwise, the page is rendered at the fitting scale, with reduced quality for speed (no image and path smoothing, unless overridden).
+        
+        Parameters:
+            max_size (int | tuple[int, int]):
+                Maximum width and height of the thumbnail, in pixels. A single int applies to both.
+            use_embedded (bool):
+                Whether to use an embedded thumbnail, if suitable. Embedded thumbnails are not considered if *rotation* or *crop* is given.
+            kwargs (dict):
+                Further options for the fallback rendering, as taken by :meth:`.render` (except *scale*).
+        Returns:
+            (PdfBitmap, bool): The thumbnail, and whether it is the page's embedded thumbnail (as opposed to a rendering).
+            Embedded thumbnails are in whichever pixel format pdfium decodes them to (commonly ``BGR``), regardless of format options, and do not support :meth:`.PdfBitmap.get_posconv`.
+        """
+        
+        max_width, max_height = (max_size, max_size) if isinstance(max_size, int) else max_size
+        width, height = self.get_size()
+        rotation = kwargs.get("rotation", 0)
+        if rotation in (90, 270):
+            width, height = height, width
+        scale = _get_fit_scale(width, height, max_width, max_height)
+        
+        if use_embedded and not rotation and not any(kwargs.get("crop", ())):
+            thumbnail = self._get_embedded_thumbnail()
+            if thumbnail is not None:
+                if math.ceil(width*scale) <= thumbnail.width <= max_width and math.ceil(height*scale) <= thumbnail.height <= max_height:
+                    return thumbnail, True
+                thumbnail.close()
+        
+        kwargs = {"no_smoothimage": True, "no_smoothpath": True, **kwargs}
+        return self.render(scale=scale, **kwargs), False
+    
+    
+    def _get_embedded_thumbnail(self):
+        raw = pdfium_c.FPDFPage_GetThumbnailAsBitmap(self)
+        if not raw:
+            return None
+        if pdfium_c.FPDFBitmap_GetFormat(raw) not in pdfium_i.BitmapTypeToNChannels:
+            pdfium_c.FPDFBitmap_Destroy(raw)
+            return None
+        return PdfBitmap.from_raw(raw)
+    
+    
+    def render_progressive(self, may_draw_forms=True, **kwargs):
+        """
+        Prepare interruptible rendering of the page, using PDFium's progressive rendering API.
+        
+        This takes the same parameters as :meth:`.render`, but returns a handle instead of a finished bitmap.
+        Rendering does not start until :meth:`.PdfProgressiveRender.resume` is called, which renders until the page is done, or until a time budget is exhausted or a pause callback requests to pause.
+        
+        Example::
+            
+            task = page.render_progressive(scale=2)
+            while not task.resume(timeout=0.005):
+                if is_stale():
+                    task.abort()
+                    break
+            else:
+                bitmap = task.bitmap
+        
+        Returns:
+            PdfProgressiveRender: Handle to the pending rendering operation.
+        """
+        bitmap, render_args, fpdf_cs = self._prepare_render(None, **kwargs)
+        return PdfProgressiveRender(self, bitmap, render_args, may_draw_forms, fpdf_cs)
+    
+    
+    def _prepare_render(
+            self,
+            target,
+            scale = 1,
+            rotation = 0,
+            crop = (0, 0, 0, 0),
+            bitmap_maker = PdfBitmap.new_native,
+            color_scheme = None,
+            fill_to_stroke = False,
+            max_width = None,
+            max_height = None,
+            max_pixels = None,
+            **kwargs
+        ):
+        
+        page_width, page_height = self.get_size()
+        if rotation in (90, 270):
+            page_width, page_height = page_height, page_width
+        if not (max_width is None and max_height is None and max_pixels is None):
+            scale = min(scale, _get_fit_scale(page_width, page_height, max_width, max_height, max_pixels))
+        
+        src_width  = math.ceil(page_width  * scale)
+        src_height = math.ceil(page_height * scale)
         
         crop = [math.ceil(c*scale) for c in crop]
         width  = src_width  - crop[0] - crop[2]
@@ -467,31 +679,62 @@ class PdfPage (pdfium_i.AutoCloseable):
         if any(d < 1 for d in (width, height)):
             raise ValueError("Crop exceeds page dimensions")
         
+        if target is not None:
+            if (target.width, target.height) != (width, height):
+                raise ValueError(f"Bitmap size {target.width}x{target.height} does not match rendering size {width}x{height}")
+            kwargs.update(force_bitmap_format=target.format, rev_byteorder=target.rev_byteorder)
+        
         cl_format, rev_byteorder, fill_color, flags = _parse_renderopts(self, **kwargs)
         if (color_scheme is not None) and fill_to_stroke:
             flags |= pdfium_c.FPDF_CONVERT_FILL_TO_STROKE
         
-        bitmap = bitmap_maker(width, height, format=cl_format, rev_byteorder=rev_byteorder)
+        if target is None:
+            bitmap = bitmap_maker(width, height, format=cl_format, rev_byteorder=rev_byteorder)
+        else:
+            bitmap = target
+            bitmap._render_args = None
         bitmap.fill_rect(fill_color, 0, 0, width, height)
         
         pos_args = (-crop[0], -crop[3], src_width, src_height, pdfium_i.RotationToConst[rotation])
         render_args = (bitmap, self, *pos_args, flags)
+        fpdf_cs = None if color_scheme is None else color_scheme.convert(rev_byteorder)
         
-        if color_scheme is None:
-            pdfium_c.FPDF_RenderPageBitmap(*render_args)
-        else:
-            pause = pdfium_c.IFSDK_PAUSE(version=1)
-            pdfium_i.set_callback(pause, "NeedToPauseNow", _pause_noop)
-            fpdf_cs = color_scheme.convert(rev_byteorder)
-            status = pdfium_c.FPDF_RenderPageBitmapWithColorScheme_Start(*render_args, fpdf_cs, pause)
-            assert status != pdfium_c.FPDF_RENDER_FAILED, "Progressive render return code indicates failure"
-            pdfium_c.FPDF_RenderPage_Close(self)
-        
-        if may_draw_forms and self.formenv:
-            pdfium_c.FPDF_FFLDraw(self.formenv, *render_args)
-        
-        bitmap._render_args = (weakref.ref(self), pos_args)
-        return bitmap
+        return bitmap, render_args, fpdf_cs
+
+
+def _render_sync(page, bitmap, render_args, may_draw_forms, fpdf_cs):
+    if fpdf_cs is None:
+        pdfium_c.FPDF_RenderPageBitmap(*render_args)
+        _finish_render(page, bitmap, render_args, may_draw_forms)
+    else:
+        # the color scheme renderer is only available through the progressive API, so run it without pausing
+        PdfProgressiveRender(page, bitmap, render_args, may_draw_forms, fpdf_cs).resume()
+
+
+def _finish_render(page, bitmap, render_args, may_draw_forms):
+    if may_draw_forms and page.formenv:
+        pdfium_c.FPDF_FFLDraw(page.formenv, *render_args)
+    pos_args = render_args[2:7]
+    bitmap._render_args = (weakref.ref(page), pos_args)
+
+
+def _get_fit_scale(width, height, max_width=None, max_height=None, max_pixels=None):
+    # Get the largest scale at which a page of the given size, rounded up to whole pixels, stays within the limits.
+    limits = []
+    if max_width is not None:
+        limits.append(max_width / width)
+    if max_height is not None:
+        limits.append(max_height / height)
+    if max_pixels is not None:
+        limits.append(math.sqrt(max_pixels / (width * height)))
+    scale = min(limits)
+    while True:
+        w_px, h_px = math.ceil(width * scale), math.ceil(height * scale)
+        if (max_width is None or w_px <= max_width) and (max_height is None or h_px <= max_height) and (max_pixels is None or w_px * h_px <= max_pixels):
+            return scale
+        # Rounding up may exceed the limits, due to float imprecision, or because max_pixels is approached from both sides.
+        # Step down to where one side loses a pixel. The small factor guarantees progress in spite of float imprecision.
+        scale = min(scale, max((w_px-1) / width, (h_px-1) / height)) * (1 - 1e-12)
 
 
 def _auto_bitmap_format(page, fill_color, grayscale, prefer_bgrx, maybe_alpha):
@@ -590,5 +833,135 @@ class PdfColorScheme:
         return fpdf_cs
 
 
-def _pause_noop(arg):
+class PdfProgressiveRender (pdfium_i.AutoCloseable):
+    """
+    Handle to an interruptible rendering operation, as returned by :meth:`.PdfPage.render_progressive`.
+    
+    Each call to :meth:`.resume` continues rendering until the page is done or pausing is requested.
+    PDFium checks for pause requests between drawing steps (e.g. pageobjects), so a single expensive object may still delay the pause.
+    If the handle is garbage collected or the page is closed while rendering is pending, the operation is aborted automatically.
+    
+    Note:
+        PDFium allows only one progressive rendering operation per page at a time. A pending operation must be finished or aborted before another one is started on the same page.
+    
+    Attributes:
+        page (PdfPage):
+            The page being rendered.
+        bitmap (PdfBitmap):
+            The target bitmap. Its content is only complete when :attr:`.done` is True.
+        status (int):
+            The current progressive rendering status (:attr:`FPDF_RENDER_*`).
+    """
+    
+    def __init__(self, page, bitmap, render_args, may_draw_forms, fpdf_cs=None):
+        self.raw = page.raw
+        self.page = page
+        self.bitmap = bitmap
+        self.status = pdfium_c.FPDF_RENDER_READY
+        self._render_args = render_args
+        self._may_draw_forms = may_draw_forms
+        self._fpdf_cs = fpdf_cs
+        self._aborted = False
+        self._should_pause = None
+        self._pause = pdfium_c.IFSDK_PAUSE(version=1)
+        pdfium_i.set_callback(self._pause, "NeedToPauseNow", self._need_to_pause)
+        # The finalizer is attached once rendering was started, and holds the bitmap so that it outlives the rendering context.
+        super().__init__(_close_progressive, bitmap, needs_free=False)
+    
+    @property
+    def parent(self):  # AutoCloseable hook
+        return self.page
+    
+    def __repr__(self):
+        return f"<{type(self).__name__} status={self.status} aborted={self._aborted}>"
+    
+    def _need_to_pause(self, _):
+        return self._should_pause()
+    
+    @property
+    def done(self):
+        """
+        bool: True if rendering has been completed successfully.
+        """
+        return self.status == pdfium_c.FPDF_RENDER_DONE
+    
+    @property
+    def pending(self):
+        """
+        bool: True if rendering has not been completed or aborted yet.
+        """
+        # raw is reset if the page was closed in the meantime, which closes the rendering operation as well
+        return self.status in (pdfium_c.FPDF_RENDER_READY, pdfium_c.FPDF_RENDER_TOBECONTINUED) and not self._aborted and self.raw is not None
+    
+    def resume(self, timeout=None, should_pause=None):
+        """
+        Start or continue rendering.
+        
+        Parameters:
+            timeout (float | None):
+                Time budget in seconds, after which rendering shall be paused. If None, there is no time limit.
+            should_pause (typing.Callable | None):
+                Callback without arguments, returning True if rendering shall be paused (e.g. :meth:`threading.Event.is_set` as cancellation token).
+        Returns:
+            bool: True if rendering is done, False if it was paused.
+        Raises:
+            PdfiumError: If rendering failed.
+        """
+        
+        if not self.pending:
+            raise RuntimeError("Progressive rendering has already been finished or aborted.")
+        
+        if timeout is None and should_pause is None:
+            self._should_pause = _pause_noop
+        else:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            def _should_pause():
+                if deadline is not None and time.monotonic() >= deadline:
+                    return True
+                return should_pause is not None and bool(should_pause())
+            self._should_pause = _should_pause
+        
+        try:
+            if self.status == pdfium_c.FPDF_RENDER_READY:
+                self._attach_finalizer()
+                self.page._add_kid(self)
+                if self._fpdf_cs is None:
+                    self.status = pdfium_c.FPDF_RenderPageBitmap_Start(*self._render_args, self._pause)
+                else:
+                    self.status = pdfium_c.FPDF_RenderPageBitmapWithColorScheme_Start(*self._render_args, self._fpdf_cs, self._pause)
+            else:
+                self.status = pdfium_c.FPDF_RenderPage_Continue(self.page, self._pause)
+        finally:
+            self._should_pause = None
+        
+        if self.status == pdfium_c.FPDF_RENDER_FAILED:
+            self.close()
+            raise PdfiumError("Progressive rendering failed.")
+        elif self.status == pdfium_c.FPDF_RENDER_DONE:
+            self.close()
+            _finish_render(self.page, self.bitmap, self._render_args, self._may_draw_forms)
+            return True
+        
+        return False
+    
+    def abort(self):
+        """
+        Cancel rendering and release the associated resources. The bitmap will remain incomplete.
+        If rendering is not pending anymore, this method does nothing.
+        
+        Returns:
+            bool: True if a pending rendering operation was aborted, False otherwise.
+        """
+        if not self.pending:
+            return False
+        self.close()
+        self._aborted = True
+        return True
+
+
+def _close_progressive(raw_page, bitmap):
+    pdfium_c.FPDF_RenderPage_Close(raw_page)
+
+
+def _pause_noop():
     return False
@@ -0,0 +1,790 @@
+# SPDX-FileCopyrightText: 2026 geisserml <geisserml@gmail.com>
+# SPDX-License-Identifier: Apache-2.0 OR BSD-3-Clause
+
+# Process pool machinery shared by PdfDocument.render_pages(), PdfRenderPool and the rendering CLI.
+# Worker functions have to be importable by module path, so that spawned workers can resolve them.
+
+__all__ = ("PdfRenderPool", "PdfJobFailure")
+
+import os
+import sys
+import math
+import time
+import secrets
+import ctypes
+import logging
+import functools
+import multiprocessing as mp
+import multiprocessing.pool
+import multiprocessing.connection
+import concurrent.futures as ft
+from pathlib import Path
+from collections import namedtuple, OrderedDict, deque
+import pypdfium2.raw as pdfium_c
+import pypdfium2.internal as pdfium_i
+from pypdfium2._lazy import Lazy
+from pypdfium2._helpers.misc import PdfiumError
+from pypdfium2._helpers.bitmap import PdfBitmap, PdfBitmapPool
+from pypdfium2._helpers.page import _get_fit_scale
+from pypdfium2._helpers.stats import PdfRenderStats
+
+logger = logging.getLogger(__name__)
+
+
+def _render_job(i, pdf, kwargs, converter):
+    with PdfRenderStats.stage("load"):
+        page = pdf[i]
+    with PdfRenderStats.stage("render"):
+        bitmap = page.render(**kwargs)
+    PdfRenderStats.add_bytes("bitmap", bitmap.stride * bitmap.height)
+    if converter is None:
+        result = bitmap
+    else:
+        result = converter(i, bitmap, page)
+        # the converter is done with the bitmap, so its buffer may be recycled for the next page
+        pool = kwargs.get("bitmap_maker")
+        if isinstance(pool, PdfBitmapPool):
+            pool.release(bitmap)
+    page.close()
+    return result
+
+
+# Shared memory bitmaps: The worker creates a block per page, renders into it, and only sends the block's name and the bitmap parameters to the main process, which maps the block and unlinks its name right away. The memory is then released along with the last mapping. (This relies on POSIX semantics, where a block outlives the handles of the process that created it.)
+
+_SharedBitmapInfo = namedtuple("_SharedBitmapInfo", ("name", "width", "height", "format", "rev_byteorder", "stride"))
+
+
+class _SharedBlock:
+    
+    # Owner of a mapped shared memory block, which holds a buffer export of the block for its whole lifetime and exposes the memory through the numpy array interface.
+    # Arrays made from it keep it as their base, so it is only closed once the last array (and the ctypes buffer made from one) was collected.
+    # Attaching the SharedMemory object to the ctypes buffer directly would not do: Python attributes are released before the buffer's own export, so closing would fail on the export still in place.
+    
+    def __init__(self, shm, size):
+        self.shm = shm
+        self._view = Lazy.numpy.frombuffer(shm.buf, dtype=ctypes.c_ubyte, count=size)
+        self.__array_interface__ = self._view.__array_interface__
+    
+    def __del__(self):
+        self._view = None
+        self.shm.close()
+
+
+def _get_shared_buffer(shm, size):
+    # The memory is unmapped when the buffer and any views of it (e.g. numpy arrays of the bitmap) have been garbage collected.
+    buffer = (ctypes.c_ubyte * size).from_buffer( Lazy.numpy.asarray(_SharedBlock(shm, size)) )
+    buffer._shm = shm
+    return buffer
+
+
+def _shared_bitmap_maker(width, height, format, rev_byteorder=False, name=None):
+    # deferred import, as multiprocessing.shared_memory requires Python >= 3.8
+    from multiprocessing.shared_memory import SharedMemory
+    stride = width * pdfium_i.BitmapTypeToNChannels[format]
+    size = stride * height
+    try:
+        shm = SharedMemory(name=name, create=True, size=size)
+    except FileExistsError:
+        # left behind by an earlier attempt at the page, on a worker that was killed (see supervised rendering)
+        _unlink_shared_block(name)
+        shm = SharedMemory(name=name, create=True, size=size)
+    buffer = _get_shared_buffer(shm, size)
+    return PdfBitmap.new_native(width, height, format, rev_byteorder, buffer=buffer, stride=stride)
+
+
+def _render_shared_job(i, pdf, kwargs, converter, name_prefix=None):
+    # With *name_prefix*, the block is named after the page, so the main process can remove blocks of pages it did not receive (see _attach_shared_results())
+    name = None if name_prefix is None else f"{name_prefix}{i}"
+    bitmap = _render_job(i, pdf, {**kwargs, "bitmap_maker": functools.partial(_shared_bitmap_maker, name=name)}, None)
+    # the worker's mapping is closed when the bitmap goes out of scope, but the block itself persists until the main process unlinks it
+    return _SharedBitmapInfo(bitmap.buffer._shm.name, bitmap.width, bitmap.height, bitmap.format, bitmap.rev_byteorder, bitmap.stride)
+
+
+def _get_shared_name_prefix():
+    # short enough for platforms that limit block names to 31 characters (e.g. macOS)
+    return f"psm_{secrets.token_hex(6)}_"
+
+
+def _check_shared_memory(converter):
+    if converter is not None:
+        raise ValueError("shared_memory cannot be combined with a converter.")
+    if sys.platform.startswith("win32"):
+        raise NotImplementedError("shared_memory is not supported on Windows, because shared memory blocks do not outlive the worker's handle.")
+    if sys.version_info < (3, 8):
+        raise NotImplementedError("shared_memory requires Python >= 3.8.")
+    if not _have_numpy():
+        raise NotImplementedError("shared_memory requires numpy, which backs the shared buffers.")
+
+
+def _have_numpy():
+    try:
+        Lazy.numpy
+    except ImportError:
+        return False
+    return True
+
+
+def _attach_shared_bitmap(info):
+    from multiprocessing.shared_memory import SharedMemory
+    size = info.stride * info.height
+    buffer = _get_shared_buffer(SharedMemory(name=info.name), size)
+    buffer._shm.unlink()
+    return PdfBitmap.new_native(info.width, info.height, info.format, info.rev_byteorder, buffer=buffer, stride=info.stride)
+
+
+def _unlink_shared_block(name):
+    from multiprocessing.shared_memory import SharedMemory
+    try:
+        shm = SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+    shm.close()
+    shm.unlink()
+
+
+def _attach_shared_results(results, name_prefix, pages):
+    # Closing *results* has to stop the workers. Then the blocks of any pages that were not handed out (in flight, finished but not consumed, or failed) are removed by name, in case iteration stopped early.
+    try:
+        for i, info in results:
+            yield i, (info if isinstance(info, PdfJobFailure) else _attach_shared_bitmap(info))
+    finally:
+        results.close()
+        for i in pages:
+            _unlink_shared_block(f"{name_prefix}{i}")
+
+
+def _drain_shared_results(results):
+    # A persistent pool's workers cannot be stopped, so if iteration stopped early, wait for the remaining results and remove their blocks.
+    try:
+        for i, info in results:
+            yield i, _attach_shared_bitmap(info)
+    finally:
+        while True:
+            try:
+                i, info = next(results)
+            except StopIteration:
+                break
+            except Exception:
+                continue
+            _unlink_shared_block(info.name)
+
+
+# Heuristic weights for page cost estimation, in units of output pixels.
+# Rasterization scales with the canvas area, but drawing many objects or decoding large images may dominate on complex pages.
+_OBJECT_COST = 2000
+_IMAGE_PX_COST = 1
+_TRANSPARENCY_FACTOR = 2
+
+
+def _estimate_cost(page, scale=1):
+    width, height = page.get_size()
+    cost = width * height * scale**2
+    if pdfium_c.FPDFPage_HasTransparency(page):
+        cost *= _TRANSPARENCY_FACTOR
+    cost += pdfium_c.FPDFPage_CountObjects(page) * _OBJECT_COST
+    for image in page.get_objects(filter=(pdfium_c.FPDF_PAGEOBJ_IMAGE, ), max_depth=2):
+        try:
+            px_width, px_height = image.get_px_size()
+        except PdfiumError:
+            continue
+        cost += px_width * px_height * _IMAGE_PX_COST
+    return cost
+
+
+def _estimate_costs(pdf, pages, scale=1):
+    costs = []
+    for i in pages:
+        page = pdf[i]
+        costs.append( _estimate_cost(page, scale) )
+        page.close()
+    return costs
+
+
+def _estimate_bitmap_bytes(pdf, pages, kwargs, max_rows=None):
+    
+    # Predict the size of each page's bitmap from the page size and rendering options, as PdfPage._prepare_render() does, without loading the pages.
+    # With maybe_alpha, the format depends on page content, so assume the widest one. If *max_rows* is given, pages are rendered in bands of up to this height.
+    
+    scale, rotation, crop = kwargs.get("scale", 1), kwargs.get("rotation", 0), kwargs.get("crop", (0, 0, 0, 0))
+    limits = {k: kwargs.get(k) for k in ("max_width", "max_height", "max_pixels")}
+    
+    if "force_bitmap_format" in kwargs:
+        n_channels = pdfium_i.BitmapTypeToNChannels[kwargs["force_bitmap_format"]]
+    elif kwargs.get("fill_color", (255, 255, 255, 255))[3] < 255 or kwargs.get("maybe_alpha") or kwargs.get("prefer_bgrx"):
+        n_channels = 4
+    elif kwargs.get("grayscale"):
+        n_channels = 1
+    else:
+        n_channels = 3
+    
+    sizes = []
+    for i in pages:
+        page_width, page_height = pdf.get_page_size(i)
+        if rotation in (90, 270):
+            page_width, page_height = page_height, page_width
+        page_scale = scale
+        if any(v is not None for v in limits.values()):
+            page_scale = min(scale, _get_fit_scale(page_width, page_height, **limits))
+        width  = math.ceil(page_width  * page_scale) - math.ceil(crop[0]*page_scale) - math.ceil(crop[2]*page_scale)
+        height = math.ceil(page_height * page_scale) - math.ceil(crop[1]*page_scale) - math.ceil(crop[3]*page_scale)
+        if max_rows is not None:
+            height = min(height, max_rows)
+        # native bitmaps are packed (pdfium-allocated ones pad rows to 4 bytes, which is negligible)
+        sizes.append(width * n_channels * height)
+    
+    return sizes
+
+
+def _plan_chunks(costs, n_procs):
+    # Dispatch longest first, so that a heavy page does not hold up the end of the run.
+    # Heavy items go alone, while cheaper ones are batched up to a target cost, which keeps the dispatch overhead low. As costs are descending, chunks grow towards the end.
+    order = sorted(range(len(costs)), key=lambda pos: costs[pos], reverse=True)
+    target = sum(costs) / (n_procs * 4)
+    chunks, chunk, chunk_cost = [], [], 0
+    for pos in order:
+        chunk.append(pos)
+        chunk_cost += costs[pos]
+        if chunk_cost >= target:
+            chunks.append(chunk)
+            chunk, chunk_cost = [], 0
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+# Shared document input: Rather than pickling the document's bytes into every worker, the main process copies them into one shared memory block, and workers open the document from the block in place. The main process holds the block until the pool is done.
+# File paths are passed as-is, because pdfium reads files on demand, so workers only load the parts they need.
+
+_SharedInputInfo = namedtuple("_SharedInputInfo", ("name", "size"))
+
+
+def _share_input(input):
+    
+    # Returns the input to pass to workers, and the shared memory block to release afterwards, if any.
+    
+    if isinstance(input, Path):
+        return input, None
+    is_stream = pdfium_i.is_stream(input, "r")
+    if not (is_stream or isinstance(input, (bytes, ctypes.Array))):
+        raise ValueError(f"Parallel rendering requires file path, bytes or stream input, but the document was loaded from {type(input).__name__}.")
+    
+    if sys.version_info < (3, 8) or not _have_numpy():
+        # no shared memory (or no numpy to back the workers' buffers), so fall back to pickling the bytes
+        if is_stream:
+            pos = input.tell()
+            input.seek(0)
+            data = input.read()
+            input.seek(pos)
+            return data, None
+        return bytes(input), None
+    
+    from multiprocessing.shared_memory import SharedMemory
+    if is_stream:
+        pos = input.tell()
+        size = input.seek(0, os.SEEK_END)
+        shm = SharedMemory(create=True, size=size)
+        input.seek(0)
+        n_read = 0
+        while n_read < size:
+            n = input.readinto(shm.buf[n_read:size])
+            if not n:
+                shm.close()
+                shm.unlink()
+                raise EOFError(f"Stream ended after {n_read} of {size} bytes.")
+            n_read += n
+        input.seek(pos)
+    else:
+        size = len(input)
+        shm = SharedMemory(create=True, size=size)
+        ctypes.memmove((ctypes.c_ubyte * size).from_buffer(shm.buf), input, size)
+    
+    return _SharedInputInfo(shm.name, size), shm
+
+
+def _release_input(shm):
+    # workers keep their mappings, so the block may be unlinked while they are still running
+    shm.close()
+    shm.unlink()
+
+
+def _parallel_init(pdf_cls, input, password, may_init_forms, job, kwargs, converter, init_hooks):
+    
+    for hook in init_hooks:
+        hook()
+    logger.info(f"Initializing data for process {os.getpid()}")
+    
+    if isinstance(input, _SharedInputInfo):
+        # open the document in place from the shared block (FPDF_LoadMemDocument64() does not copy)
+        from multiprocessing.shared_memory import SharedMemory
+        input = _get_shared_buffer(SharedMemory(name=input.name), input.size)
+    pdf = pdf_cls(input, password=password, autoclose=True)
+    if may_init_forms:
+        pdf.init_forms()
+    
+    global ProcObjs
+    ProcObjs = (job, pdf, kwargs, converter)
+
+
+def _parallel_job(item):
+    global ProcObjs
+    job, *objs = ProcObjs
+    return item, job(item, *objs)
+
+
+def _parallel_chunk_job(chunk):
+    return [(pos, _parallel_job(item)) for pos, item in chunk]
+
+
+def _yield_by_pos(pos_results, ordered):
+    # *pos_results* yields (pos, result) tuples in completion order
+    done, next_pos = {}, 0
+    for pos, result in pos_results:
+        if not ordered:
+            yield result
+            continue
+        # hold back results until all earlier pages are done
+        done[pos] = result
+        while next_pos in done:
+            yield done.pop(next_pos)
+            next_pos += 1
+
+
+def _map_by_cost(map_func, pages, costs, n_procs, ordered):
+    chunks = [[(pos, pages[pos]) for pos in chunk] for chunk in _plan_chunks(costs, n_procs)]
+    pos_results = (r for chunk_results in map_func(_parallel_chunk_job, chunks) for r in chunk_results)
+    yield from _yield_by_pos(pos_results, ordered)
+
+
+# Supervised execution: Instead of a pool, the main process manages workers itself and hands them one item at a time through a pipe, so it knows which item each worker is on. A worker that exceeds the per-item timeout is killed, a worker that dies (e.g. on a segfault in pdfium) is noticed through its sentinel, and either way the worker is replaced and the item retried or reported as failed. This costs a round trip per item, so it is only used if asked for.
+# Workers may also be recycled after a number of items or once their resident memory exceeds a threshold, to counter growth from pdfium's per-document caches and heap fragmentation on long runs. A worker is only recycled between items, and its replacement re-opens the document on startup.
+# Memory admission control goes through the same path, as it needs to decide per item when to dispatch: an item is only handed out if its predicted bitmap size fits in what is left of the budget. Items are admitted in order, so that a large item cannot be starved by smaller ones. An item that exceeds the whole budget on its own is run once nothing else is in flight.
+
+PdfJobFailure = namedtuple("PdfJobFailure", ("item", "reason", "message", "attempts"))
+PdfJobFailure.__doc__ = """
+Placeholder result for a work item that could not be processed in supervised mode (see :meth:`.PdfDocument.render_pages`).
+
+Attributes:
+    item (typing.Any): The work item, i.e. the page index for rendering.
+    reason (str): ``timeout`` if the item exceeded the time limit, ``crash`` if the worker died, or ``error`` if the job raised an exception.
+    message (str): Description of the failure.
+    attempts (int): Number of attempts made.
+"""
+
+FailurePolicies = ("raise", "skip")
+
+
+def _get_rss():
+    # Returns the current resident set size of this process in bytes, or None if unavailable.
+    try:
+        with open("/proc/self/statm", "r") as fh:
+            return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    # fall back to the peak RSS, which is in KiB on Linux and other Unices, but in bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def _supervised_worker(conn, initargs):
+    # Messages to the main process are (status, payload, rss) tuples.
+    try:
+        _parallel_init(*initargs)
+    except Exception as e:
+        conn.send( ("init_error", f"{type(e).__name__}: {e}", None) )
+        return
+    conn.send( ("ready", None, None) )
+    while True:
+        item = conn.recv()
+        if item is None:
+            break
+        try:
+            _, result = _parallel_job(item)
+        except Exception as e:
+            # send the error as text, as exceptions need not be picklable
+            conn.send( ("error", f"{type(e).__name__}: {e}", _get_rss()) )
+        else:
+            conn.send( ("ok", result, _get_rss()) )
+
+
+class _SupervisedWorker:
+    
+    def __init__(self, ctx, initargs):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_supervised_worker, args=(child_conn, initargs), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.ready = False
+        self.task = None
+        self.deadline = None
+        self.n_done = 0
+    
+    def submit(self, task, timeout):
+        self.task = task
+        self.deadline = None if timeout is None else time.monotonic() + timeout
+        self.conn.send(task[1])
+    
+    def stop(self, kill=False):
+        if not kill:
+            try:
+                self.conn.send(None)
+            except OSError:
+                kill = True
+            else:
+                self.process.join(5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+def _supervised_map(ctx, initargs, tasks, n_procs, timeout, retries, max_memory=None, item_bytes=None, recycle_after=None, recycle_rss=None):
+    
+    # *tasks* are (pos, item) tuples. Yields (pos, result) tuples in completion order, with a PdfJobFailure as result for items that failed on every attempt.
+    # If *max_memory* is given, *item_bytes* holds the predicted memory use of each item by position.
+    # *recycle_after* (number of items) and *recycle_rss* (bytes) control when a worker is replaced by a fresh one.
+    
+    if recycle_rss is not None and _get_rss() is None:
+        logger.warning("Cannot determine the memory use of processes on this platform, so workers will not be recycled by RSS.")
+    pending = deque( (pos, item, 1) for pos, item in tasks )
+    workers = [_SupervisedWorker(ctx, initargs) for _ in range(n_procs)]
+    
+    def _admit():
+        if max_memory is None:
+            return True
+        in_use = sum(item_bytes[w.task[0]] for w in workers if w.task)
+        pos, item, _ = pending[0]
+        if in_use == 0 and item_bytes[pos] > max_memory:
+            logger.warning(f"Job {item!r} needs {item_bytes[pos]} bytes, which exceeds the memory budget of {max_memory} bytes, running it alone")
+            return True
+        return in_use + item_bytes[pos] <= max_memory
+    
+    def _replace(k):
+        workers[k].stop(kill=True)
+        workers[k] = _SupervisedWorker(ctx, initargs)
+    
+    def _maybe_recycle(k, rss):
+        w = workers[k]
+        w.n_done += 1
+        if recycle_after is not None and w.n_done >= recycle_after:
+            reason = f"after {w.n_done} jobs"
+        elif recycle_rss is not None and rss is not None and rss > recycle_rss:
+            reason = f"at {rss / 1024**2:.0f} MiB RSS"
+        else:
+            return
+        logger.info(f"Recycling worker process {w.process.pid} {reason}")
+        w.stop()
+        workers[k] = _SupervisedWorker(ctx, initargs)
+    
+    def _fail(worker, reason, message):
+        pos, item, attempt = worker.task
+        worker.task = None
+        if attempt <= retries:
+            logger.warning(f"Job {item!r} failed ({message}), retrying ({attempt}/{retries})")
+            pending.appendleft( (pos, item, attempt+1) )
+            return None
+        return pos, PdfJobFailure(item, reason, message, attempt)
+    
+    try:
+        while pending or any(w.task for w in workers):
+            
+            for w in workers:
+                if w.ready and w.task is None and pending and _admit():
+                    w.submit(pending.popleft(), timeout)
+            
+            deadlines = [w.deadline for w in workers if w.deadline is not None and w.task]
+            wait_timeout = max(0, min(deadlines) - time.monotonic()) if deadlines else None
+            ready = mp.connection.wait([w.conn for w in workers] + [w.process.sentinel for w in workers], timeout=wait_timeout)
+            
+            for k, w in enumerate(workers):
+                failure = None
+                if w.conn in ready:
+                    try:
+                        status, payload, rss = w.conn.recv()
+                    except EOFError:
+                        # the worker closed its end of the pipe, so it is about to exit
+                        status, payload, rss = "eof", None, None
+                        w.process.join(5)
+                    if status == "ready":
+                        w.ready = True
+                        continue
+                    elif status == "init_error":
+                        raise RuntimeError(f"Failed to initialize worker process: {payload}")
+                    elif status == "ok":
+                        pos = w.task[0]
+                        w.task = None
+                        _maybe_recycle(k, rss)
+                        yield pos, payload
+                        continue
+                    elif status == "error":
+                        failure = _fail(w, "error", payload)
+                        _maybe_recycle(k, rss)
+                        if failure:
+                            yield failure
+                        continue
+                if not w.process.is_alive():
+                    if not w.ready:
+                        raise RuntimeError(f"Worker process died during initialization (exit code {w.process.exitcode}).")
+                    if w.task:
+                        failure = _fail(w, "crash", f"worker process died with exit code {w.process.exitcode}")
+                    _replace(k)
+                elif w.task and w.deadline is not None and time.monotonic() >= w.deadline:
+                    failure = _fail(w, "timeout", f"exceeded timeout of {timeout}s")
+                    _replace(k)
+                if failure:
+                    yield failure
+        
+        for w in workers:
+            w.stop()
+    
+    finally:
+        for w in workers:
+            if w.process.is_alive() or w.process.exitcode is None:
+                w.stop(kill=True)
+
+
+def _render_supervised(ctx, pages, costs, n_procs, initargs, ordered, timeout, retries, on_failure, max_memory, item_bytes, recycle_after, recycle_rss):
+    tasks = list(enumerate(pages))
+    if costs is not None:
+        tasks.sort(key=lambda t: costs[t[0]], reverse=True)
+    pos_results = _supervised_map(ctx, initargs, tasks, n_procs, timeout, retries, max_memory, item_bytes, recycle_after, recycle_rss)
+    for item, result in _yield_by_pos(((pos, (pages[pos], r)) for pos, r in pos_results), ordered):
+        if isinstance(result, PdfJobFailure) and on_failure == "raise":
+            raise RuntimeError(f"Job {item!r} failed after {result.attempts} attempt(s): {result.message}")
+        yield item, result
+
+
+def _render_parallel(
+        pdf_cls,
+        input,
+        password,
+        may_init_forms,
+        pages,
+        kwargs,
+        converter = None,
+        processes = None,
+        ordered = True,
+        mp_strategy = "spawn",
+        pool_lib = "mp",
+        map_attr = None,
+        init_hooks = (),
+        job = _render_job,
+        costs = None,
+        timeout = None,
+        retries = 0,
+        on_failure = "raise",
+        max_memory = None,
+        item_bytes = None,
+        recycle_after = None,
+        recycle_rss = None,
+    ):
+    
+    # *pages* may be any picklable work items, provided a matching *job* function that is called as job(item, pdf, kwargs, converter)
+    # If *costs* are given (estimates per item), items are dispatched by cost rather than in order, and reordered in the main process if needed
+    # If a *timeout*, *retries* or the "skip" failure policy are given, items are processed by supervised workers (see above); pool_lib and map_attr do not apply then
+    # The same goes for *max_memory*, which requires *item_bytes*, the predicted memory use per item (e.g. from _estimate_bitmap_bytes()), and for worker recycling (*recycle_after*, *recycle_rss*)
+    
+    if on_failure not in FailurePolicies:
+        raise ValueError(f"Invalid failure policy {on_failure!r}, expected one of {FailurePolicies}")
+    if max_memory is not None and item_bytes is None:
+        raise ValueError("max_memory requires item_bytes.")
+    supervised = timeout is not None or retries > 0 or on_failure != "raise" or max_memory is not None or recycle_after is not None or recycle_rss is not None
+    
+    ctx = mp.get_context(mp_strategy)
+    pool_backends = dict(
+        mp = (ctx.Pool, "imap" if ordered and costs is None else "imap_unordered"),
+        ft = (functools.partial(ft.ProcessPoolExecutor, mp_context=ctx), "map"),
+    )
+    pool_ctor, default_map_attr = pool_backends[pool_lib]
+    if map_attr is None:
+        map_attr = default_map_attr
+    
+    if processes is None:
+        processes = os.cpu_count()
+    n_procs = min(processes, len(pages))
+    input, shm = _share_input(input)
+    pool_kwargs = dict(
+        initializer = _parallel_init,
+        initargs = (pdf_cls, input, password, may_init_forms, job, kwargs, converter, init_hooks),
+    )
+    
+    try:
+        if supervised:
+            yield from _render_supervised(ctx, pages, costs, n_procs, pool_kwargs["initargs"], ordered, timeout, retries, on_failure, max_memory, item_bytes, recycle_after, recycle_rss)
+            return
+        with pool_ctor(n_procs, **pool_kwargs) as pool:
+            map_func = getattr(pool, map_attr)
+            if costs is None:
+                yield from map_func(_parallel_job, pages)
+            else:
+                yield from _map_by_cost(map_func, pages, costs, n_procs, ordered)
+            if isinstance(pool, mp.pool.Pool):
+                # on success, let workers exit gracefully so they can run exit handlers (e.g. to finish pending saves), instead of being terminated by the context manager
+                pool.close()
+                pool.join()
+    finally:
+        if shm is not None:
+            _release_input(shm)
+
+
+def _pool_init(max_documents, init_hooks):
+    
+    for hook in init_hooks:
+        hook()
+    logger.info(f"Initializing render pool process {os.getpid()}")
+    
+    global PoolDocs, PoolMaxDocs
+    PoolDocs = OrderedDict()
+    PoolMaxDocs = max_documents
+
+
+def _pool_get_document(doc_key):
+    
+    global PoolDocs
+    pdf = PoolDocs.get(doc_key)
+    if pdf is not None:
+        PoolDocs.move_to_end(doc_key)
+        return pdf
+    
+    # deferred import, as the document module imports this one
+    from pypdfium2._helpers.document import PdfDocument
+    (path, _, _), password, may_init_forms = doc_key
+    pdf = PdfDocument(path, password=password)
+    if may_init_forms:
+        pdf.init_forms()
+    
+    PoolDocs[doc_key] = pdf
+    while len(PoolDocs) > PoolMaxDocs:
+        _, old_pdf = PoolDocs.popitem(last=False)
+        old_pdf.close()
+    
+    return pdf
+
+
+def _get_pool_doc_key(input, password, may_init_forms):
+    # Workers identify documents by path, modification time and size, so that a document changed on disk is re-opened.
+    if isinstance(input, (str, Path)):
+        path = Path(input).expanduser().resolve()
+    elif isinstance(getattr(input, "_input", None), Path):
+        path, password, may_init_forms = input._input.resolve(), input._password, bool(input.formenv)
+    else:
+        raise ValueError(f"Render pool requires a file path or a document loaded from a file path, but got {input!r}.")
+    stat = path.stat()
+    return ((str(path), stat.st_mtime_ns, stat.st_size), password, may_init_forms)
+
+
+def _pool_job(item):
+    doc_key, i, kwargs, converter, job = item
+    pdf = _pool_get_document(doc_key)
+    return i, job(i, pdf, kwargs, converter)
+
+
+class PdfRenderPool:
+    """
+    Persistent pool of rendering processes, reusable across documents.
+    
+    :meth:`.PdfDocument.render_pages` starts new worker processes on each call, which then have to import pypdfium2 and open the document.
+    When rendering a stream of short documents, this startup cost dominates.
+    A render pool instead keeps its workers alive between jobs, and each worker keeps recently used documents open.
+    
+    Example::
+        
+        with PdfRenderPool(processes=4) as pool:
+            for path in paths:
+                for i, result in pool.render(path, converter=save_page, scale=2):
+                    ...
+    
+    Note:
+        Workers identify documents by path, modification time and size, so a document that was changed on disk is re-opened.
+    
+    Parameters:
+        processes (int | None):
+            Number of worker processes. Defaults to :func:`os.cpu_count`.
+        max_documents (int):
+            Number of open documents each worker keeps. If exceeded, the least recently used document is closed.
+        mp_strategy (str):
+            The process start method to use (``spawn``, ``forkserver`` or ``fork``).
+            With ``forkserver``, pypdfium2 is preloaded in the server process, so that new workers start with the library already imported and initialized. This only takes effect if the forkserver has not been started yet.
+        preload (typing.Sequence[str]):
+            Names of further modules to preload in the forkserver (e.g. modules needed by the converter).
+        init_hooks (typing.Sequence[typing.Callable]):
+            Picklable callables to run in each worker on startup.
+        recycle_after (int | None):
+            If given, each worker is replaced by a fresh one after rendering this many pages, which releases memory held by pdfium's caches and heap fragmentation on long runs. The replacement re-opens documents as needed.
+            (Recycling by memory use is only available with :meth:`.PdfDocument.render_pages`, which dispatches pages one at a time.)
+    """
+    
+    def __init__(self, processes=None, max_documents=8, mp_strategy="spawn", preload=(), init_hooks=(), recycle_after=None):
+        ctx = mp.get_context(mp_strategy)
+        if mp_strategy == "forkserver":
+            ctx.set_forkserver_preload(["pypdfium2", *preload])
+        self.max_documents = max_documents
+        # each job is a single page, so the pool's task limit amounts to a page limit
+        self._pool = ctx.Pool(processes, initializer=_pool_init, initargs=(max_documents, init_hooks), maxtasksperchild=recycle_after)
+    
+    def __repr__(self):
+        return f"<{type(self).__name__} max_documents={self.max_documents}>"
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *_):
+        self.close()
+    
+    def close(self):
+        """
+        Let the workers finish pending jobs, then shut them down.
+        """
+        self._pool.close()
+        self._pool.join()
+    
+    def terminate(self):
+        """
+        Stop the workers immediately, discarding pending jobs.
+        """
+        self._pool.terminate()
+        self._pool.join()
+    
+    def render(self, input, pages=None, password=None, may_init_forms=False, converter=None, shared_memory=False, ordered=True, **kwargs):
+        """
+        Render pages of a document on the pool's workers.
+        
+        This takes the same parameters as :meth:`.PdfDocument.render_pages`, except for the parallelization options that are defined by the pool.
+        Multiple render calls may be in progress at the same time.
+        
+        Parameters:
+            input (str | pathlib.Path | PdfDocument):
+                The document. If a :class:`.PdfDocument` is given, it must have been loaded from a file path. Its password and form env are taken over.
+            password (str | None):
+                A password to unlock the document, if encrypted.
+            may_init_forms (bool):
+                If True, workers initialize forms for the document.
+        Yields:
+            (int, typing.Any): A tuple of page index and result (i.e. the converter's return value, or a :class:`.PdfBitmap`).
+        """
+        
+        if shared_memory:
+            _check_shared_memory(converter)
+        
+        doc_key = _get_pool_doc_key(input, password, may_init_forms)
+        if pages is None:
+            if isinstance(input, (str, Path)):
+                from pypdfium2._helpers.document import PdfDocument
+                (path, _, _), password, _ = doc_key
+                pdf = PdfDocument(path, password=password)
+                pages = list(range(len(pdf)))
+                pdf.close()
+            else:
+                pages = list(range(len(input)))
+        
+        job = _render_shared_job if shared_memory else _render_job
+        items = [(doc_key, i, kwargs, converter, job) for i in pages]
+        
+        map_func = self._pool.imap if ordered else self._pool.imap_unordered
+        results = map_func(_pool_job, items)
+        if shared_memory:
+            results = _drain_shared_results(results)
+        yield from results
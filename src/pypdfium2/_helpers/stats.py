@@ -0,0 +1,169 @@
+# SPDX-FileCopyrightText: 2026 geisserml <geisserml@gmail.com>
+# SPDX-License-Identifier: Apache-2.0 OR BSD-3-Clause
+
+__all__ = ("PdfRenderStats", )
+
+import os
+import math
+import time
+import threading
+import contextlib
+from collections import namedtuple
+
+# Each job records into the record of the current thread, so that stages timed by encoder threads or other concurrent work are not attributed to the wrong page.
+_local = threading.local()
+
+_TimedResult = namedtuple("_TimedResult", ("result", "record"))
+
+
+def _timed_job(job, item, *args):
+    # Wrapper around a job function (see _render_parallel()), to be bound with functools.partial(), which keeps it picklable.
+    record = dict(item=item, pid=os.getpid(), stages={}, bytes={})
+    _local.record = record
+    try:
+        with PdfRenderStats.stage("total"):
+            result = job(item, *args)
+    finally:
+        _local.record = None
+    return _TimedResult(result, record)
+
+
+def _collect_stats(stats, results):
+    # Take the records off the results of timed jobs. Other results (e.g. failures) are passed through.
+    for item, result in results:
+        if isinstance(result, _TimedResult):
+            stats.add(result.record)
+            result = result.result
+        yield item, result
+
+
+def _get_distribution(values):
+    values = sorted(values)
+    # nearest-rank percentiles
+    percentile = lambda p: values[max(0, math.ceil(p/100 * len(values)) - 1)]
+    return dict(p50=percentile(50), p95=percentile(95), max=values[-1], total=sum(values))
+
+
+class PdfRenderStats:
+    """
+    Per-stage timing and throughput statistics of rendering jobs.
+    
+    If passed to :meth:`.PdfDocument.render_pages`, each page records the wall and CPU time of its stages, as well as bitmap and output bytes.
+    Records are sent back along with the results, so pages rendered by worker processes are covered as well.
+    Built-in stages are ``load`` (loading the page), ``render`` (rasterization) and ``total`` (the whole job, including the converter).
+    Converters can time further stages with :meth:`.stage` and report sizes with :meth:`.add_bytes`.
+    
+    Example::
+        
+        stats = PdfRenderStats()
+        for i, result in pdf.render_pages(converter=save_page, stats=stats):
+            ...
+        print(stats.summary())
+    
+    Attributes:
+        records (list[dict]):
+            Per-page records, with keys ``item`` (the page index), ``pid`` (the rendering process), ``stages`` (mapping of stage name to ``[wall, cpu]`` seconds) and ``bytes`` (mapping of kind to byte count).
+    """
+    
+    def __init__(self):
+        self.records = []
+        self._start = None
+        self._end = None
+    
+    def __repr__(self):
+        return f"<{type(self).__name__} records={len(self.records)}>"
+    
+    @staticmethod
+    @contextlib.contextmanager
+    def stage(name):
+        """
+        Context manager to time a stage of the current page's job. Times of a stage entered multiple times per page add up.
+        This does nothing if statistics are not being recorded for the current job, so it is cheap to leave in place.
+        
+        Parameters:
+            name (str): Name of the stage.
+        """
+        record = getattr(_local, "record", None)
+        if record is None:
+            yield
+            return
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            times = record["stages"].setdefault(name, [0.0, 0.0])
+            times[0] += time.perf_counter() - wall
+            times[1] += time.process_time() - cpu
+    
+    @staticmethod
+    def add_bytes(kind, n_bytes):
+        """
+        Add to a byte count of the current page's job (e.g. ``output`` for the size of the written file).
+        This does nothing if statistics are not being recorded for the current job.
+        
+        Parameters:
+            kind (str): Name of the count. ``bitmap`` is used for the rendered bitmaps.
+            n_bytes (int): Number of bytes.
+        """
+        record = getattr(_local, "record", None)
+        if record is not None:
+            record["bytes"][kind] = record["bytes"].get(kind, 0) + n_bytes
+    
+    def start(self):
+        """
+        Start the wall clock of the run, which throughput is based on. Has no effect if already started.
+        """
+        if self._start is None:
+            self._start = time.perf_counter()
+    
+    def stop(self):
+        """
+        Stop the wall clock of the run.
+        """
+        self._end = time.perf_counter()
+    
+    def add(self, record):
+        """
+        Add a page record, as made by a timed job.
+        """
+        self.records.append(record)
+    
+    def summary(self):
+        """
+        Aggregate the page records.
+        
+        Returns:
+            dict: JSON-serializable summary with the number of ``pages`` and ``processes``, the run's ``wall_time`` in seconds and ``pages_per_s``,
+            and distributions (``p50``, ``p95``, ``max``, ``total``) per stage (``stages``, each with ``wall`` and ``cpu`` seconds) and per byte count (``bytes``, with ``mb_per_s`` in 10^6 bytes per second of wall time).
+            Throughput values are None if the wall clock was not started.
+        """
+        
+        wall_time = None
+        if self._start is not None:
+            wall_time = (time.perf_counter() if self._end is None else self._end) - self._start
+        per_s = lambda n: None if not wall_time else n / wall_time
+        
+        stage_times, byte_counts = {}, {}
+        for record in self.records:
+            for name, (wall, cpu) in record["stages"].items():
+                walls, cpus = stage_times.setdefault(name, ([], []))
+                walls.append(wall)
+                cpus.append(cpu)
+            for kind, n_bytes in record["bytes"].items():
+                byte_counts.setdefault(kind, []).append(n_bytes)
+        
+        stages = {name: dict(wall=_get_distribution(walls), cpu=_get_distribution(cpus)) for name, (walls, cpus) in stage_times.items()}
+        byte_stats = {}
+        for kind, counts in byte_counts.items():
+            dist = byte_stats[kind] = _get_distribution(counts)
+            mb_per_s = per_s(dist["total"])
+            dist["mb_per_s"] = None if mb_per_s is None else mb_per_s / 1e6
+        
+        return dict(
+            pages = len(self.records),
+            processes = len({r["pid"] for r in self.records}),
+            wall_time = wall_time,
+            pages_per_s = per_s(len(self.records)),
+            stages = stages,
+            bytes = byte_stats,
+        )
@@ -0,0 +1,303 @@
+# SPDX-FileCopyrightText: 2026 geisserml <geisserml@gmail.com>
+# SPDX-License-Identifier: Apache-2.0 OR BSD-3-Clause
+
+"""
+asyncio front-end to pdfium, running all pdfium work in dedicated worker processes.
+
+Calling pdfium directly from a coroutine blocks the event loop, and threads are no alternative because pdfium is not thread-safe.
+Instead, a :class:`.PdfAsyncPool` owns a set of worker processes and hands out awaitable results.
+This module requires Python >= 3.7.
+
+Example::
+    
+    async with PdfAsyncPool(processes=2) as pool:
+        pdf = await pool.open("document.pdf")
+        first = await pdf.render(0, scale=2)
+        async for i, bitmap in pdf.render_pages(scale=0.5):
+            ...
+        text = await pdf.get_textpage(0).text()
+"""
+
+__all__ = ("PdfAsyncPool", "PdfAsyncDocument", "PdfAsyncTextPage")
+
+import os
+import sys
+import asyncio
+import logging
+import multiprocessing as mp
+from collections import deque
+from pypdfium2._helpers.parallel import (
+    _SharedBitmapInfo,
+    _render_job,
+    _render_shared_job,
+    _attach_shared_bitmap,
+    _check_shared_memory,
+    _have_numpy,
+    _pool_init,
+    _pool_get_document,
+    _get_pool_doc_key,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# Worker side
+
+def _aio_len_job(doc_key):
+    return len( _pool_get_document(doc_key) )
+
+def _aio_render_job(doc_key, index, kwargs, shared_memory):
+    job = _render_shared_job if shared_memory else _render_job
+    return job(index, _pool_get_document(doc_key), kwargs, None)
+
+def _aio_text_job(doc_key, index, method, kwargs):
+    page = _pool_get_document(doc_key)[index]
+    textpage = page.get_textpage()
+    text = getattr(textpage, method)(**kwargs)
+    textpage.close()
+    page.close()
+    return text
+
+
+# Main process side
+
+def _discard_result(result):
+    # Release the shared memory block of a result nobody is waiting for. This does not call into pdfium, so it is safe from any thread.
+    if isinstance(result, _SharedBitmapInfo):
+        from multiprocessing.shared_memory import SharedMemory
+        shm = SharedMemory(name=result.name)
+        shm.close()
+        shm.unlink()
+
+
+class PdfAsyncPool:
+    """
+    Pool of pdfium worker processes with an asyncio interface.
+    
+    Jobs are submitted to the workers as they are requested, but at most *max_in_flight* at a time across all documents.
+    Further requests wait for a free slot, which provides backpressure to producers.
+    Cancelling a request withdraws its interest in the result. A job that a worker has already started still runs to completion, but its result is dropped.
+    
+    Warning:
+        If a worker process dies while running a job (e.g. on a segfault in pdfium), the job's result never arrives, as :class:`multiprocessing.pool.Pool` replaces the worker without reporting the lost job.
+        The request then never completes, and its slot is not released even if the request is cancelled, so the pool's capacity shrinks by one.
+        Use :func:`asyncio.wait_for` to bound waiting on untrusted input, and replace the pool (see :meth:`.terminate`) once requests time out.
+    
+    Parameters:
+        processes (int | None):
+            Number of worker processes. Defaults to :func:`os.cpu_count`.
+        max_in_flight (int | None):
+            Maximum number of jobs submitted to the workers at a time. Defaults to twice the number of processes.
+        max_documents (int):
+            Number of open documents each worker keeps (see :class:`.PdfRenderPool`).
+        mp_strategy (str):
+            The process start method to use (``spawn``, ``forkserver`` or ``fork``).
+        shared_memory (bool | None):
+            Whether workers return bitmaps through shared memory rather than pickled pixel data. Defaults to True where supported (not on Windows, Python >= 3.8, and numpy installed).
+        init_hooks (typing.Sequence[typing.Callable]):
+            Picklable callables to run in each worker on startup.
+        recycle_after (int | None):
+            If given, each worker is replaced by a fresh one after this many jobs (see :class:`.PdfRenderPool`).
+    """
+    
+    def __init__(self, processes=None, max_in_flight=None, max_documents=8, mp_strategy="spawn", shared_memory=None, init_hooks=(), recycle_after=None):
+        if processes is None:
+            processes = os.cpu_count()
+        if shared_memory is None:
+            shared_memory = not sys.platform.startswith("win32") and sys.version_info >= (3, 8) and _have_numpy()
+        elif shared_memory:
+            _check_shared_memory(None)
+        ctx = mp.get_context(mp_strategy)
+        if mp_strategy == "forkserver":
+            ctx.set_forkserver_preload(["pypdfium2"])
+        self.max_in_flight = 2*processes if max_in_flight is None else max_in_flight
+        self.shared_memory = shared_memory
+        self._pool = ctx.Pool(processes, initializer=_pool_init, initargs=(max_documents, init_hooks), maxtasksperchild=recycle_after)
+        # asyncio primitives have to be created within the event loop on older Python versions, so defer this to the first submission
+        self._slots = None
+    
+    def __repr__(self):
+        return f"<{type(self).__name__} max_in_flight={self.max_in_flight}>"
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *_):
+        await self.close()
+    
+    async def close(self):
+        """
+        Let the workers finish submitted jobs, then shut them down.
+        """
+        self._pool.close()
+        await asyncio.get_running_loop().run_in_executor(None, self._pool.join)
+    
+    def terminate(self):
+        """
+        Stop the workers immediately, discarding submitted jobs.
+        """
+        self._pool.terminate()
+        self._pool.join()
+    
+    async def _submit(self, func, *args):
+        
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+        await self._slots.acquire()
+        
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        
+        def _on_done(result, error=None):
+            # called on the pool's result handler thread
+            try:
+                loop.call_soon_threadsafe(self._resolve, future, result, error)
+            except RuntimeError:  # event loop closed
+                _discard_result(result)
+        
+        try:
+            self._pool.apply_async(func, args, callback=_on_done, error_callback=lambda e: _on_done(None, e))
+        except BaseException:
+            self._slots.release()
+            raise
+        return future
+    
+    def _resolve(self, future, result, error):
+        # the slot is only free once the worker is done, regardless of whether the request was cancelled before
+        self._slots.release()
+        if future.cancelled():
+            _discard_result(result)
+        elif error is not None:
+            future.set_exception(error)
+        elif isinstance(result, _SharedBitmapInfo):
+            future.set_result( _attach_shared_bitmap(result) )
+        else:
+            future.set_result(result)
+    
+    async def _run(self, func, *args):
+        return await (await self._submit(func, *args))
+    
+    async def open(self, input, password=None, may_init_forms=False):
+        """
+        Open a document on the workers.
+        
+        Parameters:
+            input (str | pathlib.Path | PdfDocument):
+                The document. If a :class:`.PdfDocument` is given, it must have been loaded from a file path. Its password and form env are taken over.
+            password (str | None):
+                A password to unlock the document, if encrypted.
+            may_init_forms (bool):
+                If True, workers initialize forms for the document.
+        Returns:
+            PdfAsyncDocument: Handle to the document.
+        """
+        doc_key = _get_pool_doc_key(input, password, may_init_forms)
+        n_pages = await self._run(_aio_len_job, doc_key)
+        return PdfAsyncDocument(self, doc_key, n_pages)
+
+
+class PdfAsyncDocument:
+    """
+    Handle to a document opened on the workers of a :class:`.PdfAsyncPool`.
+    Workers open the document on demand, so this object holds no pdfium resources itself.
+    """
+    
+    def __init__(self, pool, doc_key, n_pages):
+        self.pool = pool
+        self._doc_key = doc_key
+        self._n_pages = n_pages
+    
+    def __repr__(self):
+        return f"<{type(self).__name__} {self._doc_key[0][0]!r}>"
+    
+    def __len__(self):
+        return self._n_pages
+    
+    async def render(self, index, **kwargs):
+        """
+        Render a page.
+        
+        Parameters:
+            index (int): Zero-based index of the page.
+            kwargs (dict): Rendering options, as taken by :meth:`.PdfPage.render`.
+        Returns:
+            PdfBitmap: The rendered page.
+        """
+        return await self.pool._run(_aio_render_job, self._doc_key, index, kwargs, self.pool.shared_memory)
+    
+    async def render_pages(self, pages=None, **kwargs):
+        """
+        Render multiple pages, to be used with ``async for``.
+        
+        Up to the pool's *max_in_flight* pages are rendered ahead of the consumer, so that workers stay busy without results piling up.
+        If iteration is stopped early, pages that were rendered ahead are dropped.
+        
+        Parameters:
+            pages (typing.Sequence[int] | None): Zero-based indices of the pages to render. Defaults to all.
+            kwargs (dict): Rendering options, as taken by :meth:`.PdfPage.render`.
+        Yields:
+            (int, PdfBitmap): Page index and bitmap, in the order of *pages*.
+        """
+        
+        if pages is None:
+            pages = range(self._n_pages)
+        pages = iter(pages)
+        pending = deque()
+        
+        try:
+            while True:
+                while len(pending) < self.pool.max_in_flight:
+                    index = next(pages, None)
+                    if index is None:
+                        break
+                    future = await self.pool._submit(_aio_render_job, self._doc_key, index, kwargs, self.pool.shared_memory)
+                    pending.append( (index, future) )
+                if not pending:
+                    break
+                index, future = pending.popleft()
+                yield index, await future
+        finally:
+            for _, future in pending:
+                future.cancel()
+    
+    def get_textpage(self, index):
+        """
+        Returns:
+            PdfAsyncTextPage: Handle to extract text from the page at *index*.
+        """
+        return PdfAsyncTextPage(self, index)
+
+
+class PdfAsyncTextPage:
+    """
+    Handle to extract text from a page of a :class:`.PdfAsyncDocument`.
+    Each call loads the text page on a worker, so prefer extracting all needed text in one call.
+    """
+    
+    def __init__(self, pdf, index):
+        self.pdf = pdf
+        self.index = index
+    
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.index} of {self.pdf!r}>"
+    
+    async def _run(self, method, **kwargs):
+        return await self.pdf.pool._run(_aio_text_job, self.pdf._doc_key, self.index, method, kwargs)
+    
+    async def text(self, **kwargs):
+        """
+        Extract text from a range of chars, taking the same parameters as :meth:`.PdfTextPage.get_text_range`.
+        
+        Returns:
+            str: The text.
+        """
+        return await self._run("get_text_range", **kwargs)
+    
+    async def text_bounded(self, **kwargs):
+        """
+        Extract text from an area of the page, taking the same parameters as :meth:`.PdfTextPage.get_text_bounded`.
+        
+        Returns:
+            str: The text.
+        """
+        return await self._run("get_text_bounded", **kwargs)
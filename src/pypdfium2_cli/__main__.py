@@ -38,7 +38,10 @@ SubCommands = {
     "default-fonts":  "Dump info about default fonts",
     "render":         "Rasterize pages",
     "tile":           "Tile pages (N-up)",
+    "tiles":          "Write tile pyramids for pan/zoom viewers",
+    "thumbnails":     "Write page thumbnails",
     "toc":            "Print table of contents",
+    "tune":           "Find the fastest rendering options",
 }
 
 
@@ -92,6 +92,61 @@ def add_n_digits(parser):
     )
 
 
+def add_supervision(parser):
+    supervision = parser.add_argument_group(
+        title = "Supervision",
+        description = "Process pages in supervised worker processes, so that a page that hangs or crashes pdfium does not take down the whole run. A worker that exceeds the timeout or dies is replaced, and the page is retried or reported as failed. Workers can also be recycled on long runs, to keep memory use flat. Any of --timeout, --retries, --on-failure skip or the recycling options enables supervision.",
+    )
+    supervision.add_argument(
+        "--timeout",
+        type = float,
+        help = "Wall-clock time limit per page in seconds.",
+    )
+    supervision.add_argument(
+        "--retries",
+        default = 0,
+        type = int,
+        help = "Number of times a failed page is retried with a fresh worker (default: 0).",
+    )
+    supervision.add_argument(
+        "--on-failure",
+        default = "raise",
+        choices = ("raise", "skip"),
+        type = str.lower,
+        help = "Whether to abort on a page that failed on every attempt, or skip it and go on (default: raise).",
+    )
+    supervision.add_argument(
+        "--failure-report",
+        type = lambda p: Path(p).expanduser().resolve(),
+        help = "Write skipped pages to this JSON file, as a list of objects with page number, reason (timeout, crash or error), message and number of attempts. The file is written even if there were no failures.",
+    )
+    supervision.add_argument(
+        "--recycle-after",
+        metavar = "N",
+        type = int,
+        help = "Replace each worker by a fresh one after N pages, releasing memory held by pdfium's caches and heap fragmentation.",
+    )
+    supervision.add_argument(
+        "--recycle-rss",
+        metavar = "MIB",
+        type = int,
+        help = "Replace a worker by a fresh one after a page if its resident memory exceeds this many MiB. Not supported on Windows.",
+    )
+
+
+def get_supervision_kwargs(args):
+    # Returns the keyword arguments for _render_parallel(), or None if supervision is not requested.
+    if args.timeout is None and args.retries == 0 and args.on_failure == "raise" and args.recycle_after is None and args.recycle_rss is None:
+        return None
+    return dict(
+        timeout = args.timeout,
+        retries = args.retries,
+        on_failure = args.on_failure,
+        recycle_after = args.recycle_after,
+        recycle_rss = None if args.recycle_rss is None else args.recycle_rss * 1024**2,
+    )
+
+
 def get_input(args, init_forms=False, **kwargs):
     pdf = pdfium.PdfDocument(args.input, password=args.password, **kwargs)
     if init_forms:
@@ -0,0 +1,282 @@
+# SPDX-FileCopyrightText: 2026 geisserml <geisserml@gmail.com>
+# SPDX-License-Identifier: Apache-2.0 OR BSD-3-Clause
+
+# Image writers that work on raw pixel data directly, without going through an imaging library.
+
+import io
+import abc
+import sys
+import json
+import time
+import zlib
+import struct
+import tarfile
+import zipfile
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+class PngStreamWriter:
+    """
+    Write a PNG file row by row, compressing with a streaming zlib encoder.
+    
+    Parameters:
+        path (pathlib.Path): Output file.
+        width (int): Image width.
+        height (int): Image height. Exactly this many rows must be written before closing.
+        mode (str): Pixel mode, one of ``L``, ``RGB`` or ``RGBA``.
+        compress_level (int): zlib compression level.
+        chunk_size (int): Size of compressed data to collect before writing an ``IDAT`` chunk.
+    """
+    
+    # mode: (PNG color type, number of channels)
+    ColorTypes = {"L": (0, 1), "RGB": (2, 3), "RGBA": (6, 4)}
+    
+    def __init__(self, path, width, height, mode, compress_level=6, chunk_size=2**16):
+        if mode not in self.ColorTypes:
+            raise ValueError(f"Unsupported mode {mode!r} for PNG streaming, expected one of {tuple(self.ColorTypes)}")
+        color_type, n_channels = self.ColorTypes[mode]
+        self.path = path
+        self.height = height
+        self.row_size = width * n_channels
+        self.chunk_size = chunk_size
+        self._rows_written = 0
+        self._compressor = zlib.compressobj(compress_level)
+        self._pending = bytearray()
+        self._file = open(path, "wb")
+        self._file.write(PNG_SIGNATURE)
+        # bit depth 8, default compression and filter method, no interlacing
+        self._write_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0))
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, *_):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+    
+    def _write_chunk(self, type, data):
+        self._file.write(struct.pack(">I", len(data)))
+        self._file.write(type)
+        self._file.write(data)
+        self._file.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(type))))
+    
+    def write_rows(self, buffer, stride, n_rows):
+        """
+        Append rows of pixel data.
+        
+        Parameters:
+            buffer (typing.Any): Object supporting the buffer protocol (e.g. a bitmap's ctypes buffer), with rows of packed pixels in the writer's mode.
+            stride (int): Number of bytes per row in *buffer*, which may include padding.
+            n_rows (int): Number of rows to take from *buffer*.
+        """
+        if self._rows_written + n_rows > self.height:
+            raise ValueError(f"Too many rows: {self._rows_written} + {n_rows} > {self.height}")
+        view = memoryview(buffer).cast("B")
+        compress = self._compressor.compress
+        for y in range(n_rows):
+            # each row is prefixed with its filter type; 0 means no filtering
+            self._pending += compress(b"\x00")
+            self._pending += compress(view[y*stride : y*stride + self.row_size])
+            if len(self._pending) >= self.chunk_size:
+                self._write_chunk(b"IDAT", self._pending)
+                self._pending = bytearray()
+        self._rows_written += n_rows
+    
+    def close(self):
+        """
+        Finish the image and close the file.
+        """
+        if self._rows_written != self.height:
+            self.abort()
+            raise ValueError(f"Incomplete image: {self._rows_written} of {self.height} rows written")
+        self._pending += self._compressor.flush()
+        self._write_chunk(b"IDAT", self._pending)
+        self._write_chunk(b"IEND", b"")
+        self._file.close()
+    
+    def abort(self):
+        """
+        Close and remove the incomplete file.
+        """
+        self._file.close()
+        self.path.unlink()
+
+
+def write_netpbm(fh, array):
+    """
+    Write a numpy array as binary PGM (8-bit gray) or PBM (1-bit).
+    
+    Parameters:
+        fh (typing.BinaryIO): Output file object.
+        array (numpy.ndarray):
+            Two-dimensional array, either of dtype uint8 for PGM, or of dtype bool (True for white) for PBM.
+            The array may be a strided view, e.g. of a bitmap buffer.
+    """
+    import numpy as np
+    height, width = array.shape
+    if array.dtype == bool:
+        # PBM uses 1 for black, with rows padded to whole bytes
+        header, data = f"P4\n{width} {height}\n", np.packbits(~array, axis=1)
+    elif array.dtype == np.uint8:
+        header, data = f"P5\n{width} {height}\n255\n", np.ascontiguousarray(array)
+    else:
+        raise ValueError(f"Cannot write array of dtype {array.dtype} as netpbm, expected uint8 or bool.")
+    fh.write(header.encode("ascii"))
+    fh.write(data)
+
+
+class ContainerWriter (abc.ABC):
+    """
+    Base class for writers that collect multiple encoded image files in a single output.
+    
+    Parameters:
+        dest (pathlib.Path | str): Output file, or ``-`` for standard output (if supported by the container format).
+    """
+    
+    supports_stdout = False
+    file_mode = "wb"
+    
+    def __init__(self, dest):
+        self.dest = dest
+        if dest == "-":
+            if not self.supports_stdout:
+                raise ValueError(f"{type(self).__name__} cannot write to standard output.")
+            self._fh = sys.stdout.buffer
+        else:
+            self._fh = open(dest, self.file_mode)
+        try:
+            self._open()
+        except BaseException:
+            self.abort()
+            raise
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, *_):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+    
+    def _open(self):
+        pass
+    
+    @abc.abstractmethod
+    def add(self, name, data):
+        """
+        Append an entry.
+        
+        Parameters:
+            name (str): File name of the entry.
+            data (bytes): Encoded file content.
+        """
+    
+    def _finish(self):
+        pass
+    
+    def close(self):
+        """
+        Finish the container. Standard output is flushed, but not closed.
+        """
+        self._finish()
+        if self.dest == "-":
+            self._fh.flush()
+        else:
+            self._fh.close()
+    
+    def abort(self):
+        """
+        Close and remove the incomplete output file.
+        """
+        if self.dest != "-":
+            self._fh.close()
+            self.dest.unlink()
+
+
+class TarWriter (ContainerWriter):
+    """
+    Write entries to an uncompressed TAR archive, in stream mode so that it can be piped.
+    """
+    
+    supports_stdout = True
+    
+    def _open(self):
+        self._tar = tarfile.open(fileobj=self._fh, mode="w|")
+        self._mtime = time.time()
+    
+    def add(self, name, data):
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = self._mtime
+        self._tar.addfile(info, io.BytesIO(data))
+    
+    def _finish(self):
+        self._tar.close()
+
+
+class ZipWriter (ContainerWriter):
+    """
+    Write entries to a ZIP archive. Entries are stored without further compression, as image files are compressed already.
+    """
+    
+    supports_stdout = True
+    
+    def _open(self):
+        self._zip = zipfile.ZipFile(self._fh, mode="w", compression=zipfile.ZIP_STORED)
+        self._date_time = time.localtime()[:6]
+    
+    def add(self, name, data):
+        self._zip.writestr(zipfile.ZipInfo(name, self._date_time), data)
+    
+    def _finish(self):
+        self._zip.close()
+
+
+class TiffWriter (ContainerWriter):
+    """
+    Append single-page TIFF files as pages of a multi-page TIFF.
+    The file needs to be seekable and readable, so this cannot write to standard output.
+    
+    This uses Pillow's :class:`~PIL.TiffImagePlugin.AppendingTiffWriter`, which copies the encoded pages as-is and only rewrites their offsets, so pages are neither decoded again nor held in memory.
+    Pillow's public ``save(..., save_all=True, append_images=...)`` would do neither, as it collects the appended images in a list and re-encodes each of them.
+    The helper is not documented, so it is only used with the Pillow versions it was tested with (see ``TIFF_MIN_PILLOW``).
+    """
+    
+    file_mode = "w+b"
+    
+    def _open(self):
+        import PIL
+        version = tuple(int(v) for v in PIL.__version__.split(".")[:2])
+        if version < TIFF_MIN_PILLOW:
+            raise RuntimeError(f"The TIFF container requires Pillow >= {'.'.join(map(str, TIFF_MIN_PILLOW))}, but got {PIL.__version__}.")
+        from PIL.TiffImagePlugin import AppendingTiffWriter
+        self._tiff = AppendingTiffWriter(self._fh, new=True)
+    
+    def add(self, name, data):
+        # each page is finalized when starting the next frame, so there is nothing left to do on close
+        self._tiff.write(data)
+        self._tiff.newFrame()
+
+
+#: Oldest Pillow version the TIFF container was tested with.
+TIFF_MIN_PILLOW = (9, 3)
+
+ContainerWriters = dict(tar=TarWriter, zip=ZipWriter, tiff=TiffWriter)
+
+
+def write_failure_report(path, failures):
+    """
+    Write pages that failed in supervised mode as JSON.
+    
+    Parameters:
+        path (pathlib.Path): Output file.
+        failures (list[PdfJobFailure]): Failures whose items are zero-based page indices.
+    """
+    records = [dict(page=f.item+1, reason=f.reason, message=f.message, attempts=f.attempts) for f in failures]
+    with open(path, "w") as fh:
+        json.dump(records, fh, indent=2)
+        fh.write("\n")
@@ -1,7 +1,14 @@
 # SPDX-FileCopyrightText: 2026 geisserml <geisserml@gmail.com>
 # SPDX-License-Identifier: Apache-2.0 OR BSD-3-Clause
 
-from pypdfium2_cli._parsers import add_input, get_input
+import logging
+import pypdfium2._helpers as pdfium
+from pypdfium2._helpers.parallel import _render_parallel
+from pypdfium2_cli._setup import setup_logging
+from pypdfium2_cli._writers import write_failure_report
+from pypdfium2_cli._parsers import add_input, get_input, add_supervision, get_supervision_kwargs
+
+logger = logging.getLogger(__name__)
 
 EXTRACT_RANGE   = "range"
 EXTRACT_BOUNDED = "bounded"
@@ -21,25 +28,60 @@ def attach(parser):
         choices = (EXTRACT_RANGE, EXTRACT_BOUNDED),
         help = "PDFium text extraction strategy (range, bounded).",
     )
+    add_supervision(parser)
+    parser.add_argument(
+        "--processes",
+        default = 1,
+        type = int,
+        help = "Number of worker processes for supervised extraction (default: 1). Without supervision, text is extracted in the current process.",
+    )
+
+
+def _extract_text(i, pdf, strategy):
+    
+    page = pdf[i]
+    textpage = page.get_textpage()
+    
+    # TODO let caller pass in possible range/boundary parameters
+    if strategy == EXTRACT_RANGE:
+        text = textpage.get_text_range()
+    elif strategy == EXTRACT_BOUNDED:
+        text = textpage.get_text_bounded()
+    else:
+        assert False
+    
+    return text
+
+
+def _text_job(i, pdf, kwargs, converter):
+    return _extract_text(i, pdf, kwargs["strategy"])
 
 
 def main(args):
     
     pdf = get_input(args)
+    supervision_kwargs = get_supervision_kwargs(args)
+    
+    if supervision_kwargs:
+        results = _render_parallel(
+            pdfium.PdfDocument, pdf._input, args.password, False, args.pages, dict(strategy=args.strategy),
+            processes = args.processes,
+            init_hooks = (setup_logging, ),
+            job = _text_job,
+            **supervision_kwargs,
+        )
+    else:
+        results = ((i, _extract_text(i, pdf, args.strategy)) for i in args.pages)
     
     sep = ""
-    for i in args.pages:
-        
-        page = pdf[i]
-        textpage = page.get_textpage()
-        
-        # TODO let caller pass in possible range/boundary parameters
-        if args.strategy == EXTRACT_RANGE:
-            text = textpage.get_text_range()
-        elif args.strategy == EXTRACT_BOUNDED:
-            text = textpage.get_text_bounded()
-        else:
-            assert False
-        
+    failures = []
+    for i, text in results:
+        if isinstance(text, pdfium.PdfJobFailure):
+            logger.error(f"Skipped page {i+1} after {text.attempts} attempt(s): {text.message}")
+            failures.append(text)
+            continue
         print(sep + f"# Page {i+1}\n" + text)
         sep = "\n"
+    
+    if args.failure_report:
+        write_failure_report(args.failure_report, failures)
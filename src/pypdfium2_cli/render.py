@@ -2,28 +2,36 @@
 # SPDX-License-Identifier: Apache-2.0 OR BSD-3-Clause
 
 import os
+import sys
+import io
+import json
 import math
+import time
 import types
 import logging
 import colorsys
+import threading
 import functools
-from pathlib import Path
-import multiprocessing as mp
+import multiprocessing.util as mp_util
 import concurrent.futures as ft
+from pathlib import Path
 from importlib.util import find_spec
 
 import pypdfium2._helpers as pdfium
 import pypdfium2.internal as pdfium_i
 import pypdfium2.raw as pdfium_c
+from pypdfium2._helpers.page import _get_fit_scale
+from pypdfium2._helpers.cache import _hash_input
+from pypdfium2._helpers.stats import _timed_job, _collect_stats
+from pypdfium2._helpers.parallel import _render_job, _render_parallel, _estimate_costs, _estimate_bitmap_bytes
+from pypdfium2_cli._writers import PngStreamWriter, ContainerWriters, write_netpbm, write_failure_report
 from pypdfium2_cli._setup import setup_logging
-from pypdfium2_cli._parsers import (
-    add_input, get_input,
-    iterator_hasvalue,
-)
+from pypdfium2_cli._parsers import add_input, get_input, add_supervision, get_supervision_kwargs
 from pypdfium2_cfg.stl import BooleanOptionalAction
 
 have_pil = find_spec("PIL") is not None
 have_cv2 = find_spec("cv2") is not None
+have_numpy = find_spec("numpy") is not None
 logger = logging.getLogger(__name__)
 
 
@@ -43,6 +51,7 @@ BitmapMakers = dict(
     foreign_simple = _bitmap_wrapper_foreign_simple,
 )
 
+NetpbmFormats = ("pbm", "pgm")
 ColorSchemeFields = ("path_fill", "path_stroke", "text_fill", "text_stroke")
 ColorOpts = dict(metavar="C", nargs=4, type=int)
 SampleTheme = dict(
@@ -57,9 +66,15 @@ def attach(parser):
     add_input(parser, pages=True)
     parser.add_argument(
         "--output", "-o",
-        type = lambda p: Path(p).expanduser().resolve(),
+        type = lambda p: p if p == "-" else Path(p).expanduser().resolve(),
         required = True,
-        help = "Output directory where the serially numbered images shall be placed.",
+        help = "Output directory where the serially numbered images shall be placed. With --container, the output file instead, or '-' for standard output.",
+    )
+    parser.add_argument(
+        "--container",
+        choices = ContainerWriters.keys(),
+        type = str.lower,
+        help = "Write all pages into a single file rather than one file per page: a TAR or ZIP archive of the serially numbered images, or a multi-page TIFF. Images are encoded by the rendering processes and appended by the main process in page order. TAR and ZIP may be written to standard output.",
     )
     parser.add_argument(
         "--prefix",
@@ -70,12 +85,11 @@ def attach(parser):
         type = str.lower,
         help = "The image format to use (default: conditional).",
     )
-    engines_map = {"pil": PILEngine, "numpy+pil": NumpyPILEngine, "numpy+cv2": NumpyCV2Engine}
     parser.add_argument(
         "--engine",
         dest = "engine_cls",
-        type = lambda k: engines_map[k.lower()],
-        help = f"The saver engine to use {tuple(engines_map.keys())}",
+        type = lambda k: Engines[k.lower()],
+        help = f"The saver engine to use {tuple(Engines.keys())}",
     )
     parser.add_argument(
         "--scale",
@@ -83,6 +97,33 @@ def attach(parser):
         type = float,
         help = "Define the resolution of the output images. By default, one PDF point (1/72in) is rendered to 1x1 pixel. This factor scales the number of pixels that represent one point.",
     )
+    parser.add_argument(
+        "--max-width",
+        type = int,
+        help = "Maximum width of output images, in pixels. Pages that would be wider at --scale are handled according to --oversize.",
+    )
+    parser.add_argument(
+        "--max-height",
+        type = int,
+        help = "Maximum height of output images, in pixels.",
+    )
+    parser.add_argument(
+        "--max-pixels",
+        type = int,
+        help = "Maximum number of pixels (width times height) of output images. This bounds the size of bitmaps in memory, e.g. for documents with a few oversized pages.",
+    )
+    parser.add_argument(
+        "--oversize",
+        choices = ("downscale", "skip", "error"),
+        default = "downscale",
+        type = str.lower,
+        help = "What to do with pages that exceed the size limits at --scale: 'downscale' renders them at the largest scale that fits, 'skip' leaves them out, and 'error' aborts before anything is rendered. Sizes are checked before any bitmap is allocated.",
+    )
+    parser.add_argument(
+        "--band-height",
+        type = int,
+        help = "Render pages in horizontal bands of this many pixel rows, and stream each band into the output file as it is rendered. Memory use then depends on the band height rather than the page size, which allows rendering huge pages to disk. Requires PNG output, and does not support --crop or color schemes. Anti-aliasing may differ slightly at band borders.",
+    )
     parser.add_argument(
         "--rotation",
         default = 0,
@@ -139,10 +180,15 @@ def attach(parser):
     bitmap.add_argument(
         "--bitmap-maker",
         choices = BitmapMakers.keys(),
-        default = "native",
-        help = "The bitmap maker to use.",
+        help = "The bitmap maker to use (default: native).",
         type = str.lower,
     )
+    bitmap.add_argument(
+        "--bitmap-pool",
+        action = BooleanOptionalAction,
+        default = True,
+        help = "Whether to recycle bitmap buffers across pages of equal size and format, rather than allocating a new bitmap for each page.",
+    )
     bitmap.add_argument(
         "--grayscale",
         action = "store_true",
@@ -180,29 +226,52 @@ def attach(parser):
     )
     parallel.add_argument(
         "--processes",
-        default = os.cpu_count(),
         type = int,
         help = "The maximum number of parallel rendering processes. Defaults to the number of CPU cores.",
     )
     parallel.add_argument(
         "--parallel-strategy",
         choices = ("spawn", "forkserver", "fork"),
-        default = "spawn",
         type = str.lower,
-        help = "The process start method to use. ('fork' is discouraged due to stability issues.)",
+        help = "The process start method to use (default: spawn). ('fork' is discouraged due to stability issues.)",
     )
     parallel.add_argument(
         "--parallel-lib",
         choices = ("mp", "ft"),
-        default = "mp",
         type = str.lower,
-        help = "The parallelization module to use (mp = multiprocessing, ft = concurrent.futures).",
+        help = "The parallelization module to use (mp = multiprocessing, ft = concurrent.futures; default: mp).",
+    )
+    parallel.add_argument(
+        "--encoder-threads",
+        default = 0,
+        type = int,
+        help = "Number of threads per process to encode and write images, so that encoding overlaps with rendering of the next page. Useful if encoding is expensive (e.g. PNG) and there are spare cores. By default, images are saved synchronously.",
+    )
+    parallel.add_argument(
+        "--schedule",
+        choices = ("order", "cost"),
+        default = "order",
+        type = str.lower,
+        help = "How to dispatch pages to workers. 'order' dispatches in page order. 'cost' estimates page costs up front and dispatches the most expensive pages first, with cheap pages batched together. This reduces idle workers at the end on documents with a few heavy pages, at the cost of loading every page once in the main process before the workers start.",
     )
     parallel.add_argument(
         "--parallel-map",
         type = str.lower,
         help = "The map function to use (backend specific, the default is an iterative map)."
     )
+    parallel.add_argument(
+        "--max-memory",
+        metavar = "MIB",
+        type = int,
+        help = "Memory budget in MiB for the bitmaps that rendering processes hold at a time. The bitmap size of each page is predicted from page size, scale, crop and pixel format, and a page is only handed to a process if it fits in the remaining budget. A page that exceeds the budget on its own is rendered alone. Encoding buffers are not accounted for, so leave some headroom. Implies --no-bitmap-pool (except with --band-height), as idle bitmaps would not be accounted for either.",
+    )
+    parallel.add_argument(
+        "--profile",
+        nargs = "?",
+        const = DefaultProfilePath,
+        type = lambda p: Path(p).expanduser().resolve(),
+        help = f"Apply a tuned profile for the output format, as written by the 'tune' subcommand. It sets engine, pixel format, bitmap maker and parallelization options, unless they are given explicitly. If this flag is given without a value, the default location is used ({DefaultProfilePath}).",
+    )
     
     color_scheme = parser.add_argument_group(
         title = "Flat color scheme",
@@ -223,9 +292,40 @@ def attach(parser):
         help = "When rendering with custom color scheme, only draw borders around fill areas using the `path_stroke` color, instead of filling with the `path_fill` color. This is actually recommended, since with a single fill color for paths the boundaries of adjacent fill paths are less visible.",
     )
     
+    cache = parser.add_argument_group(
+        title = "Caching",
+        description = "Options to reuse output images from previous runs.",
+    )
+    cache.add_argument(
+        "--cache-dir",
+        type = lambda p: Path(p).expanduser().resolve(),
+        help = "Directory for a persistent cache of output images. Pages that were previously rendered from the same document, with the same options and output format, are copied from the cache rather than rendered again. The cache may be shared across runs and concurrent invocations.",
+    )
+    cache.add_argument(
+        "--cache-size",
+        default = 1024,
+        type = int,
+        help = "Maximum size of the cache directory in MiB (default: 1024). Least recently used entries are deleted if the size is exceeded.",
+    )
+    
+    checkpoint = parser.add_argument_group(
+        title = "Checkpointing",
+        description = "Record finished pages in a manifest, so that an interrupted run can be resumed with only the remaining pages. The manifest is rewritten atomically every few seconds and at the end, and holds the output file's size and checksum for each page, along with a key of document and rendering options.",
+    )
+    checkpoint.add_argument(
+        "--manifest",
+        type = lambda p: Path(p).expanduser().resolve(),
+        help = "Path of the manifest. Defaults to a hidden file in the output directory if --resume is given (.{prefix}manifest.json).",
+    )
+    checkpoint.add_argument(
+        "--resume",
+        action = "store_true",
+        help = "Skip pages that are recorded as finished in the manifest, with an unchanged output file. Truncated or changed files, and pages recorded with other rendering options, are rendered again.",
+    )
+    
     postproc = parser.add_argument_group(
         title = "Post processing",
-        description = "Options to post-process rendered images. Note, this may have a strongly negative impact on performance.",
+        description = "Options to post-process rendered images. With the numpy-based engines, this is done in place on the bitmap buffer and adds little overhead. The pure PIL engine is slower.",
     )
     postproc.add_argument(
         "--invert-lightness",
@@ -237,18 +337,86 @@ def attach(parser):
         action = "store_true",
         help = "Whether to exclude PDF images from lightness inversion.",
     )
+    postproc.add_argument(
+        "--binarize",
+        metavar = "T",
+        type = lambda v: "otsu" if v.lower() == "otsu" else int(v),
+        help = "Convert to 1-bit black and white, e.g. for OCR. Pixels brighter than the threshold T (0-255) become white. If T is 'otsu', the threshold is chosen per page using Otsu's method. Implies --grayscale and requires a numpy-based engine. Images are saved as 1-bit files: PBM is written directly with packed rows, TIFF uses CCITT Group 4 compression, and PNG is written with 1 bit per pixel (default format with this option). With the numpy+cv2 engine, only PNG and PBM are supported, as cv2 has no CCITT G4 TIFF writer.",
+    )
+    
+    add_supervision(parser)
+    
+    parser.add_argument(
+        "--stats",
+        nargs = "?",
+        const = "-",
+        type = lambda p: p if p == "-" else Path(p).expanduser().resolve(),
+        help = "Record per-page wall and CPU time of the rendering stages (load, render, convert, postprocess, save), as well as bitmap and output bytes, and print a summary with p50/p95/max and throughput at the end. If a path is given, the full summary is also written to it as JSON. With --encoder-threads, saving runs in the background and is not recorded.",
+    )
+
+
+class EncoderQueue:
+    """
+    Run saving jobs on a small thread pool, so that encoding and file writing overlap with rendering of the next page.
+    Submitting blocks while *max_pending* jobs are in flight, which bounds memory usage.
+    """
+    
+    def __init__(self, n_threads, max_pending):
+        self._executor = ft.ThreadPoolExecutor(n_threads, thread_name_prefix="encoder")
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._futures = set()
+    
+    def submit(self, func, *args):
+        self._raise_errors()
+        self._slots.acquire()
+        future = self._executor.submit(func, *args)
+        future.add_done_callback(lambda _: self._slots.release())
+        self._futures.add(future)
+    
+    def _raise_errors(self):
+        done = {f for f in self._futures if f.done()}
+        self._futures -= done
+        for future in done:
+            future.result()
+    
+    def flush(self):
+        ft.wait(self._futures)
+        self._raise_errors()
+    
+    def shutdown(self):
+        self.flush()
+        self._executor.shutdown()
 
 
 class SavingEngine:
     
-    def __init__(self, saver_args, postproc_kwargs):
+    def __init__(self, saver_args, postproc_kwargs, encoder_threads=0):
         self.args = saver_args
         self.postproc_kwargs = postproc_kwargs
+        self.encoder_threads = encoder_threads
+        self._encoder = None
+    
+    def __getstate__(self):
+        # the encoder queue is created lazily within each process
+        state = self.__dict__.copy()
+        state["_encoder"] = None
+        return state
     
     def _get_path(self, i, ext):
         args = self.args
         return args.output_dir / f"{args.prefix}{i+1:0{args.n_digits}d}.{ext}"
     
+    def _get_encoder(self):
+        if self._encoder is None:
+            self._encoder = EncoderQueue(self.encoder_threads, max_pending=2*self.encoder_threads)
+            # worker processes exit without running atexit handlers, so use multiprocessing's exit hook to finish pending saves
+            mp_util.Finalize(self._encoder, self._encoder.shutdown, exitpriority=10)
+        return self._encoder
+    
+    def flush(self):
+        if self._encoder is not None:
+            self._encoder.flush()
+    
     def __call__(self, i, bitmap, page):
         if self.args.maybe_alpha and self.args.format in ("jpg", "jpeg") and pdfium_c.FPDFPage_HasTransparency(page):
             # alternatively, we could perhaps convert to RGB
@@ -257,29 +425,160 @@ class SavingEngine:
         else:
             ext = self.args.format
         out_path = self._get_path(i, ext)
-        self._saving_hook(out_path, bitmap, page, self.postproc_kwargs)
+        # anything that calls into pdfium has to be done here, on the rendering thread
+        need_quads = self.postproc_kwargs["invert_lightness"] and self.postproc_kwargs["exclude_images"]
+        image_quads = None
+        if need_quads:
+            with pdfium.PdfRenderStats.stage("postprocess"):
+                image_quads = self._get_image_quads(bitmap, page)
+        if self.encoder_threads > 0:
+            # the bitmap may be recycled once we return, so the encoder gets a detached copy
+            with pdfium.PdfRenderStats.stage("convert"):
+                image = self._get_image(bitmap, detach=True)
+            self._get_encoder().submit(self._save, i, out_path, image, image_quads)
+            return out_path
+        else:
+            with pdfium.PdfRenderStats.stage("convert"):
+                image = self._get_image(bitmap)
+            return self._save(i, out_path, image, image_quads)
+    
+    def _save(self, i, out_path, image, image_quads):
+        with pdfium.PdfRenderStats.stage("postprocess"):
+            image = self.postprocess(image, image_quads, **self.postproc_kwargs)
+        ext = out_path.suffix[1:]
+        with pdfium.PdfRenderStats.stage("save"):
+            if self.args.container:
+                # return the encoded file, to be added to the container by the main process
+                buffer = io.BytesIO()
+                self._saving_hook(buffer, ext, image)
+                data = buffer.getvalue()
+                pdfium.PdfRenderStats.add_bytes("output", len(data))
+                return out_path.name, data
+            with open(out_path, "wb") as fh:
+                self._saving_hook(fh, ext, image)
+                pdfium.PdfRenderStats.add_bytes("output", fh.tell())
         logger.info(f"Wrote page {i+1} as {out_path.name}")
+        return out_path
+    
+    @staticmethod
+    def _get_image_quads(bitmap, page):
+        # FIXME pdfium does not seem to provide APIs to translate XObject to page coordinates, so not sure how to handle images nested in XObjects.
+        # FIXME we'd also like to take alpha masks into account, but this may be difficult as long as pdfium does not expose them directly.
+        matrix = bitmap.get_posconv(page).get_matrix()
+        return [
+            [matrix.on_point(x, y) for x, y in obj.get_quad_points()]
+            for obj in page.get_objects([pdfium_c.FPDF_PAGEOBJ_IMAGE], max_depth=1)
+        ]
+
+
+def _np_get_image_quads(bitmap, page):
+    # like SavingEngine._get_image_quads(), but transform all points in a single matrix operation
+    quads = [obj.get_quad_points() for obj in page.get_objects([pdfium_c.FPDF_PAGEOBJ_IMAGE], max_depth=1)]
+    if not quads:
+        return None
+    return bitmap.get_posconv(page).to_bitmap_many(quads)
+
+
+def _np_quads_mask(shape, quads):
+    height, width = shape[:2]
+    mask = np.zeros((height, width), dtype=bool)
+    for quad in quads:
+        x0, y0 = np.floor(quad.min(axis=0)).astype(int).clip(0, (width, height))
+        x1, y1 = np.ceil(quad.max(axis=0)).astype(int).clip(0, (width, height))
+        if x0 >= x1 or y0 >= y1:
+            continue
+        # test pixel centers against each edge of the quad (convex, so the center is inside if it is on the same side of all edges)
+        ys, xs = np.ogrid[y0:y1, x0:x1]
+        xs, ys = xs + 0.5, ys + 0.5
+        sides = np.stack([(bx-ax)*(ys-ay) - (by-ay)*(xs-ax) for (ax, ay), (bx, by) in zip(quad, np.roll(quad, -1, axis=0))])
+        mask[y0:y1, x0:x1] |= (sides >= 0).all(axis=0) | (sides <= 0).all(axis=0)
+    return mask
+
+
+def _np_otsu_threshold(gray):
+    # Choose the threshold that maximizes the variance between the classes of pixels <= t and > t, based on the histogram.
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    w0 = np.cumsum(hist)
+    w1 = w0[-1] - w0
+    m0 = np.cumsum(hist * np.arange(256))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        between = w0 * w1 * (m0/w0 - (m0[-1]-m0)/w1) ** 2
+    return int(np.argmax(np.nan_to_num(between)))
+
+
+def _np_binarize(gray, binarize):
+    threshold = _np_otsu_threshold(gray) if binarize == "otsu" else binarize
+    return gray > threshold
+
+
+def _np_postprocess(array, image_quads, invert_lightness, exclude_images, binarize=None):
+    # Works in place on the given array, which may be a view of the bitmap buffer.
+    # If binarizing, returns a new bool array of the same height and width (True for white) instead.
+    if invert_lightness:
+        _np_invert_lightness(array, image_quads, exclude_images)
+    if binarize is not None:
+        return _np_binarize(array, binarize)
+    return array
+
+
+def _np_invert_lightness(array, image_quads, exclude_images):
+    if array.ndim == 2:
+        colors = array
+        inverted = 255 - array
+    else:
+        # Inverting HLS lightness while retaining hue and saturation shifts all channels by the same amount, i.e. c' = 255 - (max + min - c).
+        # This is exact and independent of the channel order. The result is always in range, because min <= c <= max.
+        colors = array[..., :3]
+        extremes = colors.max(axis=2, keepdims=True).astype(np.uint16) + colors.min(axis=2, keepdims=True)
+        inverted = (colors.astype(np.uint16) + 255) - extremes
+    if exclude_images and image_quads is not None:
+        keep = _np_quads_mask(array.shape, image_quads)
+        np.copyto(colors, inverted, casting="unsafe", where=~(keep if array.ndim == 2 else keep[..., None]))
+    else:
+        np.copyto(colors, inverted, casting="unsafe")
+
+
+def _np_to_pil(array, mode):
+    # Passing the mode to PIL.Image.fromarray() is deprecated, so bring the array into a layout from which PIL infers the mode (L, RGB or RGBA)
+    if mode.startswith("BGR"):
+        array = array[..., [2, 1, 0, 3][:array.shape[2]]]
+    if mode.endswith("X"):
+        array = array[..., :3]
+    return PIL.Image.fromarray(array)
+
+
+def _pil_save(pil_image, fh, ext, **kwargs):
+    # PIL can't determine the format from a file object, so look it up by extension
+    format = PIL.Image.registered_extensions().get(f".{ext}")
+    if format is None:
+        raise ValueError(f"Unknown image format {ext!r}")
+    pil_image.save(fh, format=format, **kwargs)
 
 
 class PILEngine (SavingEngine):
     
     def do_imports(self):
+        global PIL
+        import PIL.Image
         if not self.postproc_kwargs["invert_lightness"]:
             return
         logger.debug("PIL engine imports for post-processing")
-        global PIL
-        import PIL.Image
         import PIL.ImageOps
         import PIL.ImageFilter
         import PIL.ImageDraw
     
     _to_pil_hook = staticmethod(pdfium.PdfBitmap.to_pil)
     
-    def _saving_hook(self, out_path, bitmap, page, postproc_kwargs):
-        posconv = bitmap.get_posconv(page)
+    def _get_image(self, bitmap, detach=False):
         pil_image = self._to_pil_hook(bitmap)
-        pil_image = self.postprocess(pil_image, page, posconv, **postproc_kwargs)
-        pil_image.save(out_path)
+        # PIL only shares memory with the buffer if the pixel format is used as-is
+        if detach and pil_image.mode == bitmap.mode:
+            pil_image = pil_image.copy()
+        return pil_image
+    
+    @staticmethod
+    def _saving_hook(fh, ext, pil_image):
+        _pil_save(pil_image, fh, ext)
     
     @staticmethod
     def _invert_px_lightness(r, g, b):
@@ -295,24 +594,19 @@ class PILEngine (SavingEngine):
         return PIL.ImageFilter.Color3DLUT.generate(cls.LINV_LUT_SIZE, cls._invert_px_lightness)
     
     @classmethod
-    def postprocess(cls, src_image, page, posconv, invert_lightness, exclude_images):
+    def postprocess(cls, src_image, image_quads, invert_lightness, exclude_images, binarize=None):
         dst_image = src_image
         if invert_lightness:
             if src_image.mode == "L":
                 dst_image = PIL.ImageOps.invert(src_image)
             else:
                 dst_image = dst_image.filter(cls._get_linv_lut())
-            if exclude_images:
-                # FIXME pdfium does not seem to provide APIs to translate XObject to page coordinates, so not sure how to handle images nested in XObjects.
-                # FIXME we'd also like to take alpha masks into account, but this may be difficult as long as pdfium does not expose them directly.
-                have_images, obj_walker = iterator_hasvalue( page.get_objects([pdfium_c.FPDF_PAGEOBJ_IMAGE], max_depth=1) )
-                if have_images:
-                    mask = PIL.Image.new("1", src_image.size)
-                    draw = PIL.ImageDraw.Draw(mask)
-                    for obj in obj_walker:
-                        qpoints = [posconv.to_bitmap(x, y) for x, y in obj.get_quad_points()]
-                        draw.polygon(qpoints, fill=1)
-                    dst_image.paste(src_image, mask=mask)
+            if exclude_images and image_quads:
+                mask = PIL.Image.new("1", src_image.size)
+                draw = PIL.ImageDraw.Draw(mask)
+                for qpoints in image_quads:
+                    draw.polygon(qpoints, fill=1)
+                dst_image.paste(src_image, mask=mask)
         return dst_image
 
 
@@ -320,13 +614,33 @@ class NumpyPILEngine (PILEngine):
     
     def do_imports(self):
         logger.debug("NumPy+PIL engine imports")
-        global PIL
+        global PIL, np
         import PIL.Image
-        super().do_imports()
+        import numpy as np
+    
+    def _get_image(self, bitmap, detach=False):
+        np_array = bitmap.to_numpy()
+        if detach:
+            np_array = np_array.copy()
+        return types.SimpleNamespace(array=np_array, mode=bitmap.mode)
     
     @staticmethod
-    def _to_pil_hook(bitmap):
-        return PIL.Image.fromarray(bitmap.to_numpy(), bitmap.mode)
+    def _saving_hook(fh, ext, image):
+        if ext in NetpbmFormats:
+            write_netpbm(fh, image.array)
+        elif image.array.dtype == bool:
+            # PIL infers 1-bit mode from the dtype
+            pil_image = PIL.Image.fromarray(image.array)
+            _pil_save(pil_image, fh, ext, **(dict(compression="group4") if ext in ("tif", "tiff") else {}))
+        else:
+            _pil_save(_np_to_pil(image.array, image.mode), fh, ext)
+    
+    _get_image_quads = staticmethod(_np_get_image_quads)
+    
+    @staticmethod
+    def postprocess(image, image_quads, invert_lightness, exclude_images, binarize=None):
+        image.array = _np_postprocess(image.array, image_quads, invert_lightness, exclude_images, binarize)
+        return image
 
 
 class NumpyCV2Engine (SavingEngine):
@@ -335,75 +649,287 @@ class NumpyCV2Engine (SavingEngine):
         logger.debug("NumPy+cv2 engine imports")
         global cv2, np
         import cv2
-        if self.postproc_kwargs["exclude_images"]:
-            import numpy as np
+        import numpy as np
     
-    def _saving_hook(self, out_path, bitmap, page, postproc_kwargs):
+    def _get_image(self, bitmap, detach=False):
         np_array = bitmap.to_numpy()
-        np_array = self.postprocess(np_array, bitmap, page, **postproc_kwargs)
-        cv2.imwrite(str(out_path), np_array)
+        if detach:
+            np_array = np_array.copy()
+        return types.SimpleNamespace(array=np_array)
     
-    @classmethod
-    def postprocess(cls, src_image, bitmap, page, invert_lightness, exclude_images):
-        dst_image = src_image
-        if invert_lightness:
-            if bitmap.format == pdfium_c.FPDFBitmap_Gray:
-                dst_image = ~src_image
-            else:
-                convert_to, convert_from = (cv2.COLOR_RGB2HLS, cv2.COLOR_HLS2RGB) if bitmap.rev_byteorder else (cv2.COLOR_BGR2HLS, cv2.COLOR_HLS2BGR)
-                dst_image = cv2.cvtColor(dst_image, convert_to)
-                h, l, s = cv2.split(dst_image)
-                l = ~l
-                dst_image = cv2.merge([h, l, s])
-                dst_image = cv2.cvtColor(dst_image, convert_from)
-            if exclude_images:
-                assert bitmap.format != pdfium_c.FPDFBitmap_BGRx, "Not sure how to paste with mask on {RGB,BGR}X image using cv2"  # FIXME?
-                posconv = bitmap.get_posconv(page)
-                have_images, obj_walker = iterator_hasvalue( page.get_objects([pdfium_c.FPDF_PAGEOBJ_IMAGE], max_depth=1) )
-                if have_images:
-                    mask = np.zeros((bitmap.height, bitmap.width, 1), np.uint8)
-                    for obj in obj_walker:
-                        qpoints = np.array([posconv.to_bitmap(x, y) for x, y in obj.get_quad_points()], np.int32)
-                        cv2.fillPoly(mask, [qpoints], 1)
-                    dst_image = cv2.copyTo(src_image, mask=mask, dst=dst_image)
-        return dst_image
+    @staticmethod
+    def _saving_hook(fh, ext, image):
+        if ext in NetpbmFormats:
+            write_netpbm(fh, image.array)
+            return
+        array, params = image.array, []
+        if array.dtype == bool:
+            # cv2 has no 1-bit array type, but can write 1-bit PNGs (other formats are rejected up front)
+            array, params = array.view(np.uint8) * 255, [cv2.IMWRITE_PNG_BILEVEL, 1]
+        success, data = cv2.imencode(f".{ext}", array, params)
+        if not success:
+            raise RuntimeError(f"cv2 failed to encode image as {ext!r}")
+        fh.write(data)
+    
+    _get_image_quads = staticmethod(_np_get_image_quads)
+    
+    @staticmethod
+    def postprocess(image, image_quads, invert_lightness, exclude_images, binarize=None):
+        image.array = _np_postprocess(image.array, image_quads, invert_lightness, exclude_images, binarize)
+        return image
 
 
-def _render_parallel_init(logging_init, engine_init, input, password, may_init_forms, kwargs, engine):
+class BandStreamEngine (SavingEngine):
     
-    logging_init()
-    logger.info(f"Initializing data for process {os.getpid()}")
-    engine_init()
+    # Unlike the other engines, this one drives rendering itself, as it takes the page rather than a finished bitmap.
     
-    pdf = pdfium.PdfDocument(input, password=password, autoclose=True)
-    if may_init_forms:
-        pdf.init_forms()
+    def __init__(self, saver_args, postproc_kwargs, band_height):
+        super().__init__(saver_args, postproc_kwargs)
+        self.band_height = band_height
     
-    global ProcObjs
-    ProcObjs = (pdf, kwargs, engine)
+    def do_imports(self):
+        if not self.postproc_kwargs["invert_lightness"]:
+            return
+        logger.debug("Band streaming engine imports for post-processing")
+        global np
+        import numpy as np
+    
+    def __call__(self, i, page, kwargs):
+        
+        kwargs = kwargs.copy()
+        scale, rotation = kwargs.pop("scale"), kwargs.pop("rotation")
+        limits = {k: kwargs.pop(k) for k in ("max_width", "max_height", "max_pixels") if k in kwargs}
+        if limits:
+            page_w, page_h = page.get_size()
+            if rotation in (90, 270):
+                page_w, page_h = page_h, page_w
+            scale = min(scale, _get_fit_scale(page_w, page_h, **limits))
+        
+        _, width, height = page._get_tiling_matrix(scale, rotation)
+        out_path = self._get_path(i, "png")
+        pool = kwargs.get("bitmap_maker")
+        invert_lightness, exclude_images = self.postproc_kwargs["invert_lightness"], self.postproc_kwargs["exclude_images"]
+        
+        writer = None
+        bands = page.render_tiles(scale=scale, rotation=rotation, tile_size=(width, self.band_height), **kwargs)
+        try:
+            while True:
+                # bands are rendered on demand by the iterator
+                with pdfium.PdfRenderStats.stage("render"):
+                    band = next(bands, None)
+                if band is None:
+                    break
+                _, _, band = band
+                pdfium.PdfRenderStats.add_bytes("bitmap", band.stride * band.height)
+                if writer is None:
+                    # the pixel format is selected once for all bands
+                    writer = PngStreamWriter(out_path, width, height, band.mode)
+                if invert_lightness:
+                    with pdfium.PdfRenderStats.stage("postprocess"):
+                        image_quads = _np_get_image_quads(band, page) if exclude_images else None
+                        _np_postprocess(band.to_numpy(), image_quads, invert_lightness, exclude_images)
+                with pdfium.PdfRenderStats.stage("save"):
+                    writer.write_rows(band.buffer, band.stride, band.height)
+                if isinstance(pool, pdfium.PdfBitmapPool):
+                    pool.release(band)
+        except BaseException:
+            if writer is not None:
+                writer.abort()
+            raise
+        with pdfium.PdfRenderStats.stage("save"):
+            writer.close()
+        pdfium.PdfRenderStats.add_bytes("output", out_path.stat().st_size)
+        
+        logger.info(f"Wrote page {i+1} as {out_path.name}")
+        return out_path
 
 
-def _render_job(i, pdf, kwargs, engine):
-    # logger.info(f"Started page {i+1} ...")
-    page = pdf[i]
-    bitmap = page.render(**kwargs)
-    engine(i, bitmap, page)
+def _band_job(i, pdf, kwargs, engine):
+    with pdfium.PdfRenderStats.stage("load"):
+        page = pdf[i]
+    out_path = engine(i, page, kwargs)
     page.close()
+    return out_path
+
+
+Engines = {"pil": PILEngine, "numpy+pil": NumpyPILEngine, "numpy+cv2": NumpyCV2Engine}
+
+# Options set by tuning profiles, which default to None so that explicitly given values can be told apart.
+ProfileOptions = ("engine", "rev_byteorder", "prefer_bgrx", "bitmap_maker", "processes", "linear", "parallel_strategy", "parallel_lib")
+DefaultProfilePath = Path(os.environ.get("XDG_CONFIG_HOME") or "~/.config").expanduser() / "pypdfium2" / "render_profile.json"
 
-def _render_parallel_job(i):
-    global ProcObjs
-    _render_job(i, *ProcObjs)
 
-def _do_nothing(): pass
+def load_profiles(path):
+    # Profiles are stored per output format, as the best engine depends on it.
+    if not path.exists():
+        return {}
+    return json.loads( path.read_text() )
+
+
+def _write_json_atomic(path, data):
+    # Write to a temporary file and move it into place, so that readers (or a rerun after the process was killed) never see a partial file.
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w") as fh:
+        json.dump(data, fh, indent=2, allow_nan=False)
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp_path, path)
+
+
+def save_profile(path, format, profile):
+    profiles = load_profiles(path)
+    # JSON has no infinity, so an unbounded linear threshold (always render linearly) is stored as null
+    profiles[format] = {k: (None if k == "linear" and v == math.inf else v) for k, v in profile.items()}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    _write_json_atomic(path, profiles)
+
+
+def apply_profile(args, profile):
+    for key, value in profile.items():
+        if key not in ProfileOptions:
+            logger.warning(f"Ignoring unknown profile option {key!r}")
+            continue
+        dest = "engine_cls" if key == "engine" else key
+        if key == "linear" and value is None:
+            value = math.inf
+        if getattr(args, dest) is None:
+            setattr(args, dest, Engines[value] if key == "engine" else value)
+
+
+class RenderManifest:
+    """
+    Checkpoint of finished pages, so that an interrupted run can be resumed.
+    
+    Each page is recorded with a key of the document and rendering options (as used by the render cache), and the name, size and SHA-256 checksum of its output file.
+    A page is considered finished if its key matches and the file is unchanged, so truncated files and pages rendered with other options are redone.
+    The manifest is rewritten atomically at most every *interval* seconds while pages come in, and on close.
+    """
+    
+    Version = 1
+    
+    def __init__(self, path, interval=5):
+        self.path = path
+        self.interval = interval
+        self.pages = {}
+        if path.exists():
+            data = json.loads( path.read_text() )
+            if data.get("version") == self.Version:
+                self.pages = data["pages"]
+            else:
+                logger.warning(f"Ignoring manifest {path} of unknown version {data.get('version')!r}")
+        self._last_write = time.monotonic()
+        self._dirty = False
+    
+    def is_done(self, i, key, output_dir):
+        entry = self.pages.get(str(i+1))
+        if entry is None or entry["key"] != key:
+            return False
+        out_path = output_dir / entry["file"]
+        if not out_path.is_file():
+            return False
+        if out_path.stat().st_size != entry["size"] or _hash_input(out_path) != entry["sha256"]:
+            logger.warning(f"Output file of page {i+1} is truncated or was changed, rendering again: {out_path.name}")
+            return False
+        return True
+    
+    def add(self, i, key, out_path):
+        self.pages[str(i+1)] = dict(key=key, file=out_path.name, size=out_path.stat().st_size, sha256=_hash_input(out_path))
+        self._dirty = True
+        if time.monotonic() - self._last_write >= self.interval:
+            self.write()
+    
+    def write(self):
+        _write_json_atomic(self.path, dict(version=self.Version, pages=self.pages))
+        self._last_write = time.monotonic()
+        self._dirty = False
+    
+    def close(self):
+        if self._dirty:
+            self.write()
+
+
+def format_stats(summary):
+    
+    # Render a PdfRenderStats summary as text table.
+    
+    def _rate(value, unit):
+        return "n/a" if value is None else f"{value:.2f} {unit}"
+    
+    lines = [f"Rendered {summary['pages']} page(s) with {summary['processes']} process(es) in {summary['wall_time']:.3f}s: {_rate(summary['pages_per_s'], 'pages/s')}"]
+    for kind, dist in summary["bytes"].items():
+        lines.append(f"  {kind} bytes: {_rate(dist['mb_per_s'], 'MB/s')}, {dist['total'] / 1e6:.2f} MB total, per page p50 {dist['p50'] / 1e6:.3f} MB, p95 {dist['p95'] / 1e6:.3f} MB, max {dist['max'] / 1e6:.3f} MB")
+    
+    header = ("stage", "wall p50", "wall p95", "wall max", "wall sum", "cpu sum")
+    rows = [header]
+    for name, times in summary["stages"].items():
+        wall, cpu = times["wall"], times["cpu"]
+        rows.append( (name, *(f"{v*1000:.1f}ms" for v in (wall["p50"], wall["p95"], wall["max"], wall["total"], cpu["total"]))) )
+    widths = [max(len(row[k]) for row in rows) for k in range(len(header))]
+    for row in rows:
+        lines.append("  " + "  ".join(cell.ljust(w) if k == 0 else cell.rjust(w) for k, (cell, w) in enumerate(zip(row, widths))))
+    
+    return "\n".join(lines)
+
+
+def _exceeds_limits(page_size, scale, rotation, max_width, max_height, max_pixels):
+    width, height = page_size
+    if rotation in (90, 270):
+        width, height = height, width
+    width, height = math.ceil(width * scale), math.ceil(height * scale)
+    return (
+        (max_width is not None and width > max_width) or
+        (max_height is not None and height > max_height) or
+        (max_pixels is not None and width * height > max_pixels)
+    )
+
+
+def _pack_entry(name, content):
+    # cache entry for an output file: the extension (which may vary by page with --maybe-alpha), followed by the file content
+    return name.rpartition(".")[2].encode() + b"\n" + content
+
+
+def _unpack_file(data):
+    ext, _, content = data.partition(b"\n")
+    return ext.decode(), content
+
+
+def _merge_in_order(pages, cached, results):
+    # Yield (index, entry) for all *pages* in order, taking cached entries where available, and the others from *results*, which yields them in order.
+    results = iter(results)
+    for i in pages:
+        if i in cached:
+            yield i, cached[i]
+        else:
+            j, entry = next(results)
+            assert i == j
+            yield i, entry
+    # exhaust the results, so that a process pool is closed gracefully
+    assert next(results, None) is None
 
 
-# TODO turn into a python-usable API yielding output paths as they are written
 def main(args):
     
-    if not args.output.is_dir():
+    if args.container:
+        if args.output != "-" and not args.output.parent.is_dir():
+            raise ValueError(f"Output file's parent is not an existing directory: {args.output!r}")
+        if args.container == "tiff":
+            if args.format not in (None, "tif", "tiff"):
+                raise ValueError(f"TIFF container requires TIFF pages, but got format {args.format!r}")
+            args.format = "tif"
+        if args.band_height is not None:
+            raise ValueError("Band streaming writes files directly, so it cannot be combined with --container.")
+        if args.encoder_threads > 0:
+            raise ValueError("--encoder-threads cannot be combined with --container, as encoded images are passed on to the container writer.")
+    elif args.output == "-":
+        raise ValueError("Writing to standard output ('-o -') requires --container, as pages are otherwise saved as separate files.")
+    elif not args.output.is_dir():
         # make sure the output directory exists (PIL throws an error if it doesn't, but cv2 may silently skip)
         raise ValueError(f"Output path is not an existing directory: {args.output!r}")
     
+    supervision_kwargs = get_supervision_kwargs(args)
+    if supervision_kwargs and args.encoder_threads > 0:
+        raise ValueError("--encoder-threads cannot be combined with supervision, as a page would be reported done before it is saved.")
+    
     pdf = get_input(args, init_forms=args.draw_forms)
     pdf_len = len(pdf)
     if not all(0 <= i < pdf_len for i in args.pages):
@@ -417,18 +943,72 @@ def main(args):
         args.fill_color = (0, 0, 0, 255) if args.sample_theme else (255, 255, 255, 255)
     if args.format is None:
         # can't use jpeg with transparency rsp. when there is an alpha channel
-        args.format = "jpg" if args.fill_color[3] == 255 else "png"
+        args.format = "jpg" if args.fill_color[3] == 255 and args.band_height is None and args.binarize is None else "png"
+    
+    if args.band_height is not None:
+        if args.band_height < 1:
+            raise ValueError(f"Band height must be positive, but got {args.band_height}")
+        if args.format != "png":
+            raise ValueError(f"Band streaming requires PNG output, but got format {args.format!r}")
+        if any(args.crop):
+            raise ValueError("Band streaming does not support --crop.")
+        if args.sample_theme or any(getattr(args, f) for f in ColorSchemeFields):
+            raise ValueError("Band streaming does not support color schemes.")
+        if args.rev_byteorder is False or args.prefer_bgrx:
+            raise ValueError("Band streaming writes RGB(A) or grayscale pixels, so it cannot be combined with BGR byteorder or an x channel.")
+        if args.binarize is not None:
+            raise ValueError("Band streaming does not support --binarize.")
+        if args.invert_lightness and not have_numpy:
+            raise ValueError("Band streaming requires numpy for post-processing.")
+        if args.engine_cls is not None:
+            logger.warning("Band streaming uses its own writer, ignoring --engine.")
+        args.engine_cls = BandStreamEngine
+        args.rev_byteorder, args.prefer_bgrx = True, False
+    
+    if args.profile:
+        # explicitly given options, as well as those set for band streaming above, take precedence
+        profile = load_profiles(args.profile).get(args.format)
+        if profile is None:
+            logger.warning(f"No profile for format {args.format!r} in {args.profile}")
+        else:
+            logger.info(f"Applying profile for {args.format!r}: {profile}")
+            apply_profile(args, profile)
+    
     if args.linear is None:
         args.linear = 4
+    if args.bitmap_maker is None:
+        args.bitmap_maker = "native"
+    if args.parallel_strategy is None:
+        args.parallel_strategy = "spawn"
+    if args.parallel_lib is None:
+        args.parallel_lib = "mp"
     
     # numpy+cv2 is much faster for PNG, and PIL faster for JPG, but this might simply be due to different encoding defaults
     if args.engine_cls is None:
         assert have_pil or have_cv2, "Either pillow or numpy+cv2 must be installed for rendering CLI."
-        if (not have_pil) or (have_cv2 and args.format == "png"):
+        if (not have_pil) or (have_cv2 and args.format == "png" and args.binarize is None):
             args.engine_cls = NumpyCV2Engine
+        elif have_numpy and (args.invert_lightness or args.binarize is not None or args.format in ("pbm", "pgm")):
+            # lightness inversion is much faster with numpy than with PIL's 3D LUT filter, and binarization or netpbm writing work on the numpy view directly
+            args.engine_cls = NumpyPILEngine
         else:
             args.engine_cls = PILEngine
     
+    if args.binarize is not None:
+        if args.binarize != "otsu" and not (0 <= args.binarize <= 255):
+            raise ValueError(f"Binarization threshold must be 'otsu' or in range 0-255, but got {args.binarize}")
+        if args.engine_cls is PILEngine:
+            raise ValueError("--binarize requires a numpy-based engine.")
+        if args.engine_cls is NumpyCV2Engine and args.format not in ("png", "pbm"):
+            raise ValueError(f"cv2 cannot write 1-bit {args.format!r} images, so --binarize with the numpy+cv2 engine only supports PNG and PBM.")
+        if args.fill_color[3] < 255 or args.maybe_alpha:
+            raise ValueError("--binarize requires an opaque fill color and cannot be combined with --maybe-alpha.")
+        args.grayscale = True
+    if args.format == "pbm" and args.binarize is None:
+        raise ValueError("PBM output requires --binarize.")
+    if args.format == "pgm" and not (args.grayscale and args.binarize is None):
+        raise ValueError("PGM output requires --grayscale (without --binarize).")
+    
     # PIL is faster with rev_byteorder and prefer_bgrx = True, as this achieves a natively supported pixel format. For numpy+cv2 there doesn't seem to be a difference.
     if args.rev_byteorder is None:
         args.rev_byteorder = issubclass(args.engine_cls, PILEngine)
@@ -442,6 +1022,9 @@ def main(args):
     cs_kwargs.update(**{f: getattr(args, f) for f in ColorSchemeFields if getattr(args, f)})
     color_scheme = pdfium.PdfColorScheme(**cs_kwargs) if cs_kwargs else None
     
+    bitmap_maker = BitmapMakers[args.bitmap_maker]
+    # with band streaming, an idle band is the size of the next one, so recycling it takes no extra memory
+    use_bitmap_pool = args.bitmap_pool and (args.max_memory is None or args.band_height is not None)
     kwargs = dict(
         scale = args.scale,
         rotation = args.rotation,
@@ -455,15 +1038,30 @@ def main(args):
         rev_byteorder = args.rev_byteorder,
         prefer_bgrx = args.prefer_bgrx,
         maybe_alpha = args.maybe_alpha,
-        bitmap_maker = BitmapMakers[args.bitmap_maker],
+        bitmap_maker = pdfium.PdfBitmapPool(bitmap_maker=bitmap_maker) if use_bitmap_pool else bitmap_maker,
         color_scheme = color_scheme,
         fill_to_stroke = args.fill_to_stroke,
     )
     for type in args.no_antialias:
         kwargs[f"no_smooth{type}"] = True
     
+    limits = dict(max_width=args.max_width, max_height=args.max_height, max_pixels=args.max_pixels)
+    if any(v is not None for v in limits.values()):
+        if args.oversize == "downscale":
+            kwargs.update(limits)
+        else:
+            oversized = [i for i in args.pages if _exceeds_limits(pdf.get_page_size(i), args.scale, args.rotation, **limits)]
+            if oversized:
+                msg = f"Pages {[i+1 for i in oversized]} exceed the size limits at scale {args.scale}."
+                if args.oversize == "error":
+                    raise ValueError(msg)
+                logger.warning(f"{msg} Skipping them.")
+                args.pages = [i for i in args.pages if i not in oversized]
+    
     saver_args = types.SimpleNamespace(
-        output_dir = args.output,
+        # with a container, only the file names are used
+        output_dir = Path() if args.container else args.output,
+        container = args.container,
         prefix = args.prefix,
         n_digits = len(str(pdf_len)),
         format = args.format,
@@ -472,6 +1070,7 @@ def main(args):
     postproc_kwargs = dict(
         invert_lightness = args.invert_lightness,
         exclude_images = args.exclude_images,
+        binarize = args.binarize,
     )
     if args.invert_lightness and args.optimize_mode == "lcd":
         logger.warning("LCD optimization clashes with lightness inversion, as post-processing colors defeats the idea of subpixel rendering.")
@@ -484,41 +1083,143 @@ def main(args):
     if color_scheme:
         logger.debug(f"{color_scheme}")
     
-    engine = args.engine_cls(saver_args, postproc_kwargs)
+    if args.band_height is not None:
+        engine = BandStreamEngine(saver_args, postproc_kwargs, args.band_height)
+        job = _band_job
+        for key in ("crop", "color_scheme", "fill_to_stroke"):
+            del kwargs[key]
+    else:
+        engine = args.engine_cls(saver_args, postproc_kwargs, encoder_threads=args.encoder_threads)
+        job = _render_job
+    
+    manifest = None
+    if args.manifest or args.resume:
+        if args.container:
+            raise ValueError("A manifest records one file per page, so it cannot be combined with --container.")
+        if args.encoder_threads > 0:
+            raise ValueError("--encoder-threads cannot be combined with a manifest, as a page would be recorded before it is saved.")
+        manifest = RenderManifest(args.manifest or args.output / f".{args.prefix}manifest.json")
+    
+    pages = args.pages
+    cached = {}
+    if args.cache_dir:
+        cache = pdfium.PdfRenderCache(max_memory=0, directory=args.cache_dir, max_disk=args.cache_size * 1024**2)
+    if args.cache_dir or manifest:
+        # the keys identify document, page and rendering options, for both the cache and the manifest
+        key_extra = (args.engine_cls.__name__, args.format, args.maybe_alpha, sorted(postproc_kwargs.items()))
+        keymaker = cache if args.cache_dir else pdfium.PdfRenderCache(max_memory=0)
+        page_keys = {i: keymaker.get_key(pdf, i, extra=key_extra, **kwargs) for i in pages}
+    
+    if args.resume:
+        finished = {i for i in pages if manifest.is_done(i, page_keys[i], args.output)}
+        logger.info(f"Resuming with {len(pages) - len(finished)} of {len(pages)} pages, the others are finished according to {manifest.path}")
+        pages = [i for i in pages if i not in finished]
     
-    if len(args.pages) <= args.linear:
+    if args.cache_dir:
+        uncached = []
+        for i in pages:
+            data = cache.get(page_keys[i])
+            if data is None:
+                uncached.append(i)
+                continue
+            ext, content = _unpack_file(data)
+            out_path = engine._get_path(i, ext)
+            if args.container:
+                cached[i] = (out_path.name, content)
+                continue
+            out_path.write_bytes(content)
+            logger.info(f"Wrote page {i+1} as {out_path.name} (cached)")
+            if manifest:
+                manifest.add(i, page_keys[i], out_path)
+        pages = uncached
+    
+    stats = None
+    if args.stats:
+        stats = pdfium.PdfRenderStats()
+        job = functools.partial(_timed_job, job)
+        stats.start()
+    
+    if len(pages) <= args.linear and not supervision_kwargs:
         
         logger.info("Linear rendering ...")
         engine.do_imports()
-        for i in args.pages:
-            _render_job(i, pdf, kwargs, engine)
+        results = ((i, job(i, pdf, kwargs, engine)) for i in pages)
         
     else:
         
-        logger.info("Parallel rendering ...")
-        
-        ctx = mp.get_context(args.parallel_strategy)
-        pool_backends = dict(
-            mp = (ctx.Pool, "imap"),
-            ft = (functools.partial(ft.ProcessPoolExecutor, mp_context=ctx), "map"),
-        )
-        pool_ctor, map_attr = pool_backends[args.parallel_lib]
-        if args.parallel_map:
-            map_attr = args.parallel_map
+        # supervised rendering always uses worker processes, so that crashes are isolated from the main process
+        logger.info("Supervised rendering ..." if supervision_kwargs else "Parallel rendering ...")
         
         if args.parallel_strategy == "fork":
-            logging_init, engine_init = _do_nothing, _do_nothing
+            init_hooks = ()
             engine.do_imports()
         else:
-            logging_init, engine_init = setup_logging, engine.do_imports
+            init_hooks = (setup_logging, engine.do_imports)
         
-        pool_kwargs = dict(
-            initializer = _render_parallel_init,
-            initargs = (logging_init, engine_init, pdf._input, args.password, args.draw_forms, kwargs, engine),
+        results = _render_parallel(
+            pdfium.PdfDocument, pdf._input, args.password, args.draw_forms, pages, kwargs,
+            converter = engine,
+            processes = args.processes,
+            mp_strategy = args.parallel_strategy,
+            pool_lib = args.parallel_lib,
+            map_attr = args.parallel_map,
+            init_hooks = init_hooks,
+            job = job,
+            costs = _estimate_costs(pdf, pages, args.scale) if args.schedule == "cost" else None,
+            max_memory = None if args.max_memory is None else args.max_memory * 1024**2,
+            item_bytes = None if args.max_memory is None else _estimate_bitmap_bytes(pdf, pages, kwargs, max_rows=args.band_height),
+            **(supervision_kwargs or {}),
         )
-        
-        n_procs = min(args.processes, len(args.pages))
-        with pool_ctor(n_procs, **pool_kwargs) as pool:
-            map_func = getattr(pool, map_attr)
-            for _ in map_func(_render_parallel_job, args.pages):
-                pass
+    
+    if stats:
+        results = _collect_stats(stats, results)
+    
+    failures = []
+    def _skip_failure(i, result):
+        if isinstance(result, pdfium.PdfJobFailure):
+            logger.error(f"Skipped page {i+1} after {result.attempts} attempt(s): {result.message}")
+            failures.append(result)
+            return True
+        return False
+    
+    if args.container:
+        # single writer: entries arrive in page order and are appended as they come, so encoded images don't pile up in memory
+        with ContainerWriters[args.container](args.output) as writer:
+            for i, entry in _merge_in_order(args.pages, cached, results):
+                if _skip_failure(i, entry):
+                    continue
+                name, content = entry
+                writer.add(name, content)
+                logger.info(f"Added page {i+1} as {name}" + (" (cached)" if i in cached else ""))
+                if args.cache_dir and i not in cached:
+                    cache.put(page_keys[i], _pack_entry(name, content))
+    else:
+        # exhaust the iterator, so that the pool is closed and all pending saves are done
+        done = []
+        try:
+            for i, out_path in results:
+                if _skip_failure(i, out_path):
+                    continue
+                done.append( (i, out_path) )
+                if manifest:
+                    manifest.add(i, page_keys[i], out_path)
+        finally:
+            # keep the progress if the run is interrupted
+            if manifest:
+                manifest.close()
+        engine.flush()
+        if args.cache_dir:
+            for i, out_path in done:
+                cache.put(page_keys[i], _pack_entry(out_path.name, out_path.read_bytes()))
+    
+    if args.failure_report:
+        write_failure_report(args.failure_report, failures)
+    if failures:
+        logger.error(f"{len(failures)} page(s) failed: {[f.item+1 for f in failures]}")
+    
+    if stats:
+        stats.stop()
+        summary = stats.summary()
+        print(format_stats(summary), file=sys.stderr)
+        if args.stats != "-":
+            _write_json_atomic(args.stats, summary)
@@ -0,0 +1,81 @@
+# SPDX-FileCopyrightText: 2026 geisserml <geisserml@gmail.com>
+# SPDX-License-Identifier: Apache-2.0 OR BSD-3-Clause
+
+import logging
+from pathlib import Path
+from pypdfium2_cli._parsers import add_input, get_input
+from pypdfium2_cfg.stl import BooleanOptionalAction
+
+logger = logging.getLogger(__name__)
+
+
+PARSER_DESC = """\
+Write a thumbnail image per page.
+Embedded page thumbnails are used where they fit the requested size. Other pages are rendered at reduced quality, which is considerably faster than a full rendering.\
+"""
+
+
+def attach(parser):
+    add_input(parser, pages=True)
+    parser.add_argument(
+        "--output", "-o",
+        type = lambda p: Path(p).expanduser().resolve(),
+        required = True,
+        help = "Output directory where the thumbnails shall be placed.",
+    )
+    parser.add_argument(
+        "--prefix",
+        help = "Custom prefix for the thumbnails. Defaults to the input filename's stem.",
+    )
+    parser.add_argument(
+        "--format", "-f",
+        default = "jpg",
+        type = str.lower,
+        help = "The image format to use (default: jpg).",
+    )
+    parser.add_argument(
+        "--size",
+        default = 256,
+        type = int,
+        help = "Maximum width and height of a thumbnail, in pixels (default: 256).",
+    )
+    parser.add_argument(
+        "--use-embedded",
+        action = BooleanOptionalAction,
+        default = True,
+        help = "Whether to use embedded page thumbnails if they fit the size (default: true).",
+    )
+    parser.add_argument(
+        "--draw-annots",
+        action = BooleanOptionalAction,
+        default = True,
+        help = "Whether annotations may be shown on rendered thumbnails (default: true).",
+    )
+
+
+def main(args):
+    
+    pdf = get_input(args)
+    if not args.output.is_dir():
+        raise NotADirectoryError(args.output)
+    if args.prefix is None:
+        args.prefix = f"{args.input.stem}_"
+    n_digits = len(str(len(pdf)))
+    
+    n_embedded = 0
+    for i in args.pages:
+        page = pdf[i]
+        bitmap, is_embedded = page.get_thumbnail(
+            args.size,
+            use_embedded = args.use_embedded,
+            draw_annots = args.draw_annots,
+            may_draw_forms = False,
+            rev_byteorder = True,
+        )
+        n_embedded += is_embedded
+        out_path = args.output / f"{args.prefix}{i+1:0{n_digits}d}.{args.format}"
+        bitmap.to_pil().save(out_path)
+        logger.info(f"Wrote page {i+1} as {out_path.name}" + (" (embedded thumbnail)" if is_embedded else ""))
+        page.close()
+    
+    logger.info(f"{n_embedded} of {len(args.pages)} thumbnails were embedded.")
@@ -0,0 +1,328 @@
+# SPDX-FileCopyrightText: 2026 geisserml <geisserml@gmail.com>
+# SPDX-License-Identifier: Apache-2.0 OR BSD-3-Clause
+
+import os
+import math
+import logging
+from pathlib import Path
+import pypdfium2._helpers as pdfium
+from pypdfium2._helpers.parallel import _render_parallel
+from pypdfium2_cli._setup import setup_logging
+from pypdfium2_cli._parsers import add_input, get_input
+from pypdfium2_cfg.stl import BooleanOptionalAction
+
+logger = logging.getLogger(__name__)
+
+
+PARSER_DESC = """\
+Write a tile pyramid per page, for use with pan/zoom viewers.
+Each tile is rendered directly at its zoom level, rather than downsampling a full rendering.
+Tiles that consist only of the fill color are skipped by default. Viewers are expected to show the background for missing tiles.
+
+Layouts:
+  dzi: Deep Zoom, i.e. {name}.dzi descriptor and {name}_files/{level}/{column}_{row}.{format}
+       Levels go down to 1x1 pixel, as specified by the format.
+  xyz: {name}/{z}/{x}/{y}.{format}, where z=0 is the first level that fits into a single tile.\
+"""
+
+Layouts = ("dzi", "xyz")
+
+DZI_TEMPLATE = """\
+<?xml version="1.0" encoding="UTF-8"?>
+<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" Format="{format}" Overlap="{overlap}" TileSize="{tile_size}">
+  <Size Width="{width}" Height="{height}"/>
+</Image>
+"""
+
+
+def attach(parser):
+    add_input(parser, pages=True)
+    parser.add_argument(
+        "--output", "-o",
+        type = lambda p: Path(p).expanduser().resolve(),
+        required = True,
+        help = "Output directory where the tile pyramids shall be placed.",
+    )
+    parser.add_argument(
+        "--prefix",
+        help = "Custom prefix for the pyramid names. Defaults to the input filename's stem.",
+    )
+    parser.add_argument(
+        "--layout",
+        choices = Layouts,
+        default = "dzi",
+        type = str.lower,
+        help = "The pyramid layout to write (see above).",
+    )
+    parser.add_argument(
+        "--format", "-f",
+        type = str.lower,
+        help = "The image format to use for tiles (default: conditional).",
+    )
+    parser.add_argument(
+        "--scale",
+        default = 1,
+        type = float,
+        help = "Resolution of the deepest zoom level, as a factor of pixels per PDF point (1/72in).",
+    )
+    parser.add_argument(
+        "--tile-size",
+        default = 256,
+        type = int,
+        help = "Width and height of a tile, in pixels.",
+    )
+    parser.add_argument(
+        "--overlap",
+        default = 0,
+        type = int,
+        help = "Number of pixels by which tiles overlap their neighbours (dzi layout only).",
+    )
+    parser.add_argument(
+        "--fill-color",
+        metavar = "C", nargs = 4, type = int,
+        default = (255, 255, 255, 255),
+        help = "Background color in RGBA format, as a sequence of integers ranging from 0 to 255. Defaults to white.",
+    )
+    parser.add_argument(
+        "--skip-blank",
+        action = BooleanOptionalAction,
+        default = True,
+        help = "Whether to skip tiles that consist only of the fill color (default: true).",
+    )
+    parser.add_argument(
+        "--draw-annots",
+        action = BooleanOptionalAction,
+        default = True,
+        help = "Whether annotations may be shown (default: true).",
+    )
+    parser.add_argument(
+        "--draw-forms",
+        action = BooleanOptionalAction,
+        default = True,
+        help = "Whether forms may be shown (default: true).",
+    )
+    parser.add_argument(
+        "--processes",
+        type = int,
+        help = "The maximum number of parallel rendering processes. Defaults to the number of CPU cores. Pass 1 to render linear.",
+    )
+    parser.add_argument(
+        "--parallel-strategy",
+        choices = ("spawn", "forkserver", "fork"),
+        type = str.lower,
+        help = "The process start method to use (default: spawn). ('fork' is discouraged due to stability issues.)",
+    )
+
+
+class PyramidWriter:
+    """
+    Write the tile pyramids of pages to a directory.
+    This object is passed to the workers, so it must remain picklable.
+    
+    Parameters:
+        output_dir (pathlib.Path): Directory where the pyramids shall be placed.
+        prefix (str): Prefix for the pyramid names, followed by the page number.
+        n_digits (int): Number of digits to pad page numbers to.
+        layout (str): The pyramid layout (``dzi`` or ``xyz``).
+        scale (float): Resolution of the deepest zoom level.
+        tile_size (int): Width and height of a tile.
+        overlap (int): Tile overlap (``dzi`` only).
+        format (str): Image format of tiles.
+        fill_color (tuple[int, int, int, int]): Background color.
+        skip_blank (bool): Whether to skip tiles that consist only of the fill color.
+    """
+    
+    def __init__(self, output_dir, prefix, n_digits, layout="dzi", scale=1, tile_size=256, overlap=0, format="png", fill_color=(255, 255, 255, 255), skip_blank=True):
+        if layout not in Layouts:
+            raise ValueError(f"Unknown layout {layout!r}, expected one of {Layouts}")
+        if overlap and layout != "dzi":
+            raise ValueError("Tile overlap is only supported with the dzi layout.")
+        if format in ("jpg", "jpeg") and fill_color[3] < 255:
+            raise ValueError("Cannot use JPEG with a transparent fill color.")
+        self.output_dir = output_dir
+        self.prefix = prefix
+        self.n_digits = n_digits
+        self.layout = layout
+        self.scale = scale
+        self.tile_size = tile_size
+        self.overlap = overlap
+        self.format = format
+        self.fill_color = fill_color
+        self.skip_blank = skip_blank
+    
+    def _get_name(self, i):
+        return f"{self.prefix}{i+1:0{self.n_digits}d}"
+    
+    def get_levels(self, page_size):
+        """
+        Returns:
+            list[tuple[float, int, int]]: Scale, width and height of each zoom level, starting with the smallest.
+        """
+        page_w, page_h = page_size
+        max_extent = max(math.ceil(page_w * self.scale), math.ceil(page_h * self.scale))
+        if self.layout == "dzi":
+            n_levels = math.ceil(math.log2(max_extent)) + 1
+        else:
+            n_levels = max(math.ceil(math.log2(max_extent / self.tile_size)), 0) + 1
+        levels = []
+        for level in range(n_levels):
+            # dividing by a power of 2 is exact, so this yields the same size as downscaling the deepest level with rounding up
+            scale = self.scale / 2**(n_levels-1 - level)
+            levels.append( (scale, math.ceil(page_w * scale), math.ceil(page_h * scale)) )
+        return levels
+    
+    def get_jobs(self, i, page_size):
+        """
+        Returns:
+            list[tuple[int, tuple[int, int, int]]]: Number of tiles (as cost estimate) and work item (page index, level, row) for each tile row of the page's pyramid.
+        """
+        jobs = []
+        for level, (_, width, height) in enumerate( self.get_levels(page_size) ):
+            n_cols = math.ceil(width / self.tile_size)
+            n_rows = math.ceil(height / self.tile_size)
+            jobs.extend( (n_cols, (i, level, row)) for row in range(n_rows) )
+        return jobs
+    
+    def write_descriptor(self, i, page_size):
+        """
+        Write the pyramid descriptor of the page, if the layout has one.
+        """
+        if self.layout != "dzi":
+            return
+        _, width, height = self.get_levels(page_size)[-1]
+        dzi_path = self.output_dir / f"{self._get_name(i)}.dzi"
+        dzi_path.write_text( DZI_TEMPLATE.format(format=self.format, overlap=self.overlap, tile_size=self.tile_size, width=width, height=height) )
+    
+    def _get_tile_path(self, i, level, col, row):
+        name = self._get_name(i)
+        if self.layout == "dzi":
+            return self.output_dir / f"{name}_files" / str(level) / f"{col}_{row}.{self.format}"
+        else:
+            return self.output_dir / name / str(level) / str(col) / f"{row}.{self.format}"
+    
+    def write_row(self, page, i, level, row, kwargs):
+        """
+        Render and save a row of tiles.
+        
+        Returns:
+            (int, int): Number of tiles written and skipped.
+        """
+        scale, width, _ = self.get_levels(page.get_size())[level]
+        tiles = [(col, row) for col in range(math.ceil(width / self.tile_size))]
+        rendered = page.render_tiles(
+            scale = scale,
+            tile_size = self.tile_size,
+            overlap = self.overlap,
+            tiles = tiles,
+            fill_color = self.fill_color,
+            rev_byteorder = True,
+            **kwargs,
+        )
+        n_written = 0
+        for (col, _), (_, _, bitmap) in zip(tiles, rendered):
+            if self.skip_blank and _is_blank(bitmap, self.fill_color):
+                continue
+            path = self._get_tile_path(i, level, col, row)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            bitmap.to_pil().save(path)
+            n_written += 1
+        return n_written, len(tiles) - n_written
+
+
+def _is_blank(bitmap, fill_color):
+    ref = pdfium.PdfBitmap.new_native(1, 1, bitmap.format, rev_byteorder=bitmap.rev_byteorder)
+    ref.fill_rect(fill_color, 0, 0, 1, 1)
+    line = bytes(ref.buffer) * bitmap.width
+    data = bytes(bitmap.buffer)
+    return all(data[start:start+len(line)] == line for start in range(0, bitmap.stride*bitmap.height, bitmap.stride))
+
+
+def _pyramid_job(item, pdf, kwargs, writer):
+    i, level, row = item
+    page = pdf[i]
+    result = writer.write_row(page, i, level, row, kwargs)
+    page.close()
+    return result
+
+
+def write_pyramids(pdf, pages, writer, processes=None, mp_strategy=None, password=None, **kwargs):
+    """
+    Write tile pyramids for the given pages, spreading tile rows across a process pool.
+    
+    Parameters:
+        pdf (PdfDocument): The document. For parallel rendering, it must have been loaded from a file path or bytes.
+        pages (list[int]): Zero-based indices of the pages to process.
+        writer (PyramidWriter): The pyramid writer.
+        processes (int | None): Maximum number of worker processes. If 1, render linear in the current process. Defaults to :func:`os.cpu_count`.
+        mp_strategy (str | None): The process start method to use. Defaults to ``spawn``.
+        password (str | None): Password to re-open the document in workers.
+        kwargs (dict): Further rendering options, as taken by :meth:`.PdfPage.render_tiles`.
+    Returns:
+        (int, int): Number of tiles written and skipped.
+    """
+    
+    jobs = []
+    for i in pages:
+        page_size = pdf.get_page_size(i)
+        writer.write_descriptor(i, page_size)
+        jobs.extend( writer.get_jobs(i, page_size) )
+    costs = [n_tiles for n_tiles, _ in jobs]
+    items = [item for _, item in jobs]
+    
+    if processes is None:
+        processes = os.cpu_count()
+    if mp_strategy is None:
+        mp_strategy = "spawn"
+    if processes <= 1 or len(items) <= 1:
+        results = (_pyramid_job(item, pdf, kwargs, writer) for item in items)
+    else:
+        results = _render_parallel(
+            type(pdf), pdf._input, password, bool(pdf.formenv), items, kwargs,
+            converter = writer,
+            processes = processes,
+            ordered = False,
+            mp_strategy = mp_strategy,
+            init_hooks = (setup_logging, ),
+            job = _pyramid_job,
+            costs = costs,
+        )
+        results = (r for _, r in results)
+    
+    n_written, n_skipped = 0, 0
+    for written, skipped in results:
+        n_written += written
+        n_skipped += skipped
+    return n_written, n_skipped
+
+
+def main(args):
+    
+    pdf = get_input(args, init_forms=args.draw_forms)
+    if not args.output.is_dir():
+        raise NotADirectoryError(args.output)
+    if args.prefix is None:
+        args.prefix = f"{args.input.stem}_"
+    if args.format is None:
+        args.format = "jpg" if args.fill_color[3] == 255 else "png"
+    
+    writer = PyramidWriter(
+        output_dir = args.output,
+        prefix = args.prefix,
+        n_digits = len(str(len(pdf))),
+        layout = args.layout,
+        scale = args.scale,
+        tile_size = args.tile_size,
+        overlap = args.overlap,
+        format = args.format,
+        fill_color = tuple(args.fill_color),
+        skip_blank = args.skip_blank,
+    )
+    n_written, n_skipped = write_pyramids(
+        pdf, args.pages, writer,
+        processes = args.processes,
+        mp_strategy = args.parallel_strategy,
+        password = args.password,
+        draw_annots = args.draw_annots,
+        may_draw_forms = args.draw_forms,
+    )
+    logger.info(f"Wrote {n_written} tiles, skipped {n_skipped} blank tiles.")
@@ -0,0 +1,187 @@
+# SPDX-FileCopyrightText: 2026 geisserml <geisserml@gmail.com>
+# SPDX-License-Identifier: Apache-2.0 OR BSD-3-Clause
+
+import os
+import sys
+import math
+import time
+import logging
+import argparse
+import tempfile
+import contextlib
+from pathlib import Path
+from importlib.util import find_spec
+import pypdfium2_cli.render as cli_render
+from pypdfium2_cli._parsers import add_input, get_input
+
+logger = logging.getLogger(__name__)
+
+
+PARSER_DESC = """\
+Benchmark rendering configurations on a sample of pages, and save the fastest as a profile for `render --profile`.
+Engine, pixel format and bitmap maker are tuned one after another with linear rendering, then the number of processes and the parallelization strategy. Each stage builds on the best candidates of the previous ones. Candidates that fail (e.g. a pixel format the engine can't save in the target format) are skipped.
+The threshold for linear rendering is estimated from the pool startup overhead measured on the sample.
+Profiles are stored per output format. Results depend on the machine and document, so tune with representative input and rendering options.\
+"""
+
+
+def attach(parser):
+    add_input(parser, pages=True)
+    parser.add_argument(
+        "--format", "-f",
+        default = "jpg",
+        type = str.lower,
+        help = "The image format to tune for (default: jpg).",
+    )
+    parser.add_argument(
+        "--scale",
+        default = 1,
+        type = float,
+        help = "The rendering scale to tune for (default: 1).",
+    )
+    parser.add_argument(
+        "--sample",
+        default = 8,
+        type = int,
+        help = "Number of pages to benchmark, spread evenly over the document or the given pages (default: 8).",
+    )
+    parser.add_argument(
+        "--repeats",
+        default = 1,
+        type = int,
+        help = "Number of runs per candidate, taking the fastest (default: 1).",
+    )
+    parser.add_argument(
+        "--profile",
+        default = cli_render.DefaultProfilePath,
+        type = lambda p: Path(p).expanduser().resolve(),
+        help = f"Profile file to update (default: {cli_render.DefaultProfilePath}).",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action = "store_true",
+        help = "Only report the results, without saving the profile.",
+    )
+
+
+def _get_sample(pages, n):
+    if n >= len(pages):
+        return list(pages)
+    step = len(pages) / n
+    return [pages[int(k*step)] for k in range(n)]
+
+
+@contextlib.contextmanager
+def _quiet_rendering():
+    # Silence per-page logging of the render runs, including spawned workers, which set up logging from the environment.
+    loggers = [logging.getLogger(name) for name in ("pypdfium2", "pypdfium2_cli.render")]
+    orig_levels = [l.level for l in loggers]
+    orig_env = os.environ.get("PYPDFIUM_LOGLEVEL")
+    for l in loggers:
+        l.setLevel(logging.WARNING)
+    os.environ["PYPDFIUM_LOGLEVEL"] = "warning"
+    try:
+        yield
+    finally:
+        for l, level in zip(loggers, orig_levels):
+            l.setLevel(level)
+        if orig_env is None:
+            del os.environ["PYPDFIUM_LOGLEVEL"]
+        else:
+            os.environ["PYPDFIUM_LOGLEVEL"] = orig_env
+
+
+class _Benchmark:
+    
+    def __init__(self, args, pages, output_dir):
+        self.base_argv = [str(args.input), "-o", str(output_dir), "-f", args.format, "--scale", str(args.scale)]
+        if args.password:
+            self.base_argv += ["--password", args.password]
+        self.pages = pages
+        self.repeats = args.repeats
+        self.parser = argparse.ArgumentParser()
+        cli_render.attach(self.parser)
+    
+    def run(self, config, repeats=None):
+        # Returns the fastest time of the configuration.
+        times = []
+        for _ in range(self.repeats if repeats is None else repeats):
+            args = self.parser.parse_args(self.base_argv)
+            args.subcommand = "render"
+            args.pages = self.pages
+            cli_render.apply_profile(args, config)
+            start = time.perf_counter()
+            cli_render.main(args)
+            times.append(time.perf_counter() - start)
+        return min(times)
+    
+    def pick(self, stage, base, candidates):
+        # Returns the best configuration (base updated with the fastest candidate) and its time.
+        results = []
+        for candidate in candidates:
+            config = {**base, **candidate}
+            try:
+                duration = self.run(config)
+            except Exception as e:
+                logger.info(f"  {candidate}: failed ({type(e).__name__}: {e})")
+                continue
+            logger.info(f"  {candidate}: {duration:.3f}s")
+            results.append((duration, config))
+        if not results:
+            raise RuntimeError(f"All candidates failed at stage {stage!r}.")
+        duration, best = min(results, key=lambda r: r[0])
+        logger.info(f"{stage}: {duration:.3f}s with {best}")
+        return best, duration
+
+
+def _get_engines():
+    engines = []
+    if find_spec("PIL"):
+        engines.append("pil")
+        if find_spec("numpy"):
+            engines.append("numpy+pil")
+    if find_spec("cv2") and find_spec("numpy"):
+        engines.append("numpy+cv2")
+    return engines
+
+
+def _estimate_linear_threshold(n_pages, linear_time, parallel_time, processes):
+    # Model parallel rendering as a fixed startup overhead plus the linear per-page cost spread over the processes, and return the page count up to which linear rendering is faster.
+    page_time = linear_time / n_pages
+    overhead = parallel_time - n_pages * page_time / processes
+    if overhead <= 0:
+        return 0
+    return math.ceil( overhead / (page_time * (1 - 1/processes)) )
+
+
+def main(args):
+    
+    pdf = get_input(args)
+    pages = _get_sample(args.pages, args.sample)
+    n_cpus = os.cpu_count() or 1
+    pdf.close()
+    logger.info(f"Tuning for {args.format!r} at scale {args.scale} with pages {[i+1 for i in pages]}")
+    
+    with tempfile.TemporaryDirectory(prefix="pypdfium2_tune_") as tmp_dir, _quiet_rendering():
+        
+        bench = _Benchmark(args, pages, Path(tmp_dir))
+        best = dict(linear=math.inf)
+        # warm up, so that the first candidate is not charged for imports and file caching
+        bench.run(best, repeats=1)
+        best, _ = bench.pick("engine", best, [dict(engine=e) for e in _get_engines()])
+        best, _ = bench.pick("pixel format", best, [dict(rev_byteorder=r, prefer_bgrx=x) for r in (True, False) for x in (True, False)])
+        best, linear_time = bench.pick("bitmap maker", best, [dict(bitmap_maker=m) for m in cli_render.BitmapMakers])
+        
+        if n_cpus > 1 and len(pages) > 1:
+            # more processes than sample pages would not be used
+            proc_counts = sorted({n for n in (2, n_cpus//2, n_cpus) if 2 <= n <= max(2, len(pages))})
+            best, _ = bench.pick("processes", {**best, "linear": 0}, [dict(processes=n) for n in proc_counts])
+            strategies = ["spawn"] + (["forkserver"] if sys.platform != "win32" else [])
+            best, parallel_time = bench.pick("strategy", best, [dict(parallel_strategy=s, parallel_lib=l) for s in strategies for l in ("mp", "ft")])
+            best["linear"] = _estimate_linear_threshold(len(pages), linear_time, parallel_time, best["processes"])
+    
+    logger.info(f"Best profile for {args.format!r}: {best}")
+    if args.dry_run:
+        return
+    cli_render.save_profile(args.profile, args.format, best)
+    logger.info(f"Saved profile to {args.profile}")
@@ -0,0 +1,67 @@
+# SPDX-FileCopyrightText: 2026 geisserml <geisserml@gmail.com>
+# SPDX-License-Identifier: Apache-2.0 OR BSD-3-Clause
+
+import asyncio
+import numpy
+import pytest
+import pypdfium2 as pdfium
+from pypdfium2.aio import PdfAsyncPool
+from .conftest import TestFiles
+
+
+@pytest.fixture(scope="module")
+def exp_arrays():
+    pdf = pdfium.PdfDocument(TestFiles.multipage)
+    return [page.render(scale=0.5).to_numpy() for page in pdf]
+
+
+@pytest.mark.parametrize("shared_memory", [None, False])
+def test_aio_render(exp_arrays, shared_memory):
+    
+    async def main():
+        async with PdfAsyncPool(processes=2, max_in_flight=2, shared_memory=shared_memory) as pool:
+            pdf = await pool.open(TestFiles.multipage)
+            assert len(pdf) == 3
+            
+            bitmap = await pdf.render(1, scale=0.5)
+            assert numpy.array_equal(bitmap.to_numpy(), exp_arrays[1])
+            
+            # more concurrent requests than slots wait for each other
+            bitmaps = await asyncio.gather(*[pdf.render(i % 3, scale=0.5) for i in range(7)])
+            for i, bitmap in enumerate(bitmaps):
+                assert numpy.array_equal(bitmap.to_numpy(), exp_arrays[i % 3])
+            
+            results = [(i, bitmap) async for i, bitmap in pdf.render_pages([2, 0, 1], scale=0.5)]
+            assert [i for i, _ in results] == [2, 0, 1]
+            for i, bitmap in results:
+                assert numpy.array_equal(bitmap.to_numpy(), exp_arrays[i])
+    
+    asyncio.run(main())
+
+
+def test_aio_text_and_cancel():
+    
+    pdf = pdfium.PdfDocument(TestFiles.text)
+    exp_text = pdf[0].get_textpage().get_text_range()
+    
+    async def main():
+        async with PdfAsyncPool(processes=1, max_in_flight=1) as pool:
+            pdf = await pool.open(TestFiles.text)
+            assert await pdf.get_textpage(0).text() == exp_text
+            
+            # cancelled requests free their slot once the worker is done, so further requests still go through
+            task = asyncio.ensure_future(pdf.render(0, scale=2))
+            await asyncio.sleep(0)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            bitmap = await asyncio.wait_for(pdf.render(0, scale=0.5), timeout=30)
+            assert bitmap.width > 0
+            
+            # stopping iteration early drops pages rendered ahead
+            async for i, _ in pdf.render_pages(scale=0.5):
+                break
+            with pytest.raises(pdfium.PdfiumError):
+                await pdf.get_textpage(len(pdf)).text()
+    
+    asyncio.run(main())
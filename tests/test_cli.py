@@ -2,15 +2,26 @@
 # SPDX-License-Identifier: Apache-2.0 OR BSD-3-Clause
 
 import io
+import os
+import json
+import math
 import sys
 import logging
+import argparse
+import tarfile
+import zipfile
 import filecmp
 import contextlib
 from pathlib import Path
 import pytest
+import numpy
+import PIL.Image
 import pypdfium2 as pdfium
 import pypdfium2.raw as pdfium_c
 import pypdfium2_cli.__main__ as pdfium_cli
+import pypdfium2_cli.render as cli_render
+import pypdfium2_cli.tune as cli_tune
+import pypdfium2_cli._writers as cli_writers
 from pypdfium2_cli._sysfonts import PdfSysfontListener
 from .conftest import TestFiles, TestExpectations
 
@@ -124,6 +135,13 @@ def test_extract_text(strategy):
     run_cli(["extract-text", TestFiles.text, "--strategy", strategy], TestExpectations.text_extract, normalize_lfs=True)
 
 
+def test_extract_text_supervised(tmp_path):
+    report = tmp_path / "failures.json"
+    run_cli(["extract-text", TestFiles.text, "--timeout", 60, "--failure-report", report], TestExpectations.text_extract, capture=["out"], normalize_lfs=True)
+    assert json.loads(report.read_text()) == []
+    run_cli(["extract-text", TestFiles.text, "--recycle-after", 1], TestExpectations.text_extract, capture=["out"], normalize_lfs=True)
+
+
 @pytest.mark.parametrize("resource", ["multipage", "attachments", "forms"])
 def test_pdfinfo(resource):
     run_cli(["pdfinfo", getattr(TestFiles, resource)], getattr(TestExpectations, "pdfinfo_%s" % resource))
@@ -159,17 +177,86 @@ def test_tile(tmp_path):
     assert all(o.type == pdfium_c.FPDF_PAGEOBJ_FORM for o in pageobjs)
 
 
-def test_render_multipage(tmp_path):
+@pytest.mark.parametrize("linear", [None, 0])
+def test_render_multipage(tmp_path, linear):
     
     out_dir = tmp_path / "out"
     out_dir.mkdir()
     
-    run_cli(["render", TestFiles.multipage, "-o", out_dir, "--scale", 0.2, "-f", "jpg"])
+    argv = ["render", TestFiles.multipage, "-o", out_dir, "--scale", 0.2, "-f", "jpg"]
+    if linear is not None:
+        argv += ["--linear", linear, "--processes", 2, "--schedule", "cost"]
+    run_cli(argv)
     
     out_files = list(out_dir.iterdir())
     assert sorted([f.name for f in out_files]) == ["multipage_1.jpg", "multipage_2.jpg", "multipage_3.jpg"]
 
 
+@pytest.mark.parametrize("engine", ["pil", "numpy+pil"])
+@pytest.mark.parametrize("linear", [None, 0])
+def test_render_encoder_threads(tmp_path, engine, linear):
+    
+    sync_dir, async_dir = tmp_path / "sync", tmp_path / "async"
+    sync_dir.mkdir(); async_dir.mkdir()
+    
+    argv = ["render", TestFiles.images, "--scale", 0.5, "-f", "png", "--engine", engine, "--invert-lightness", "--exclude-images"]
+    if linear is not None:
+        argv += ["--linear", linear, "--processes", 2]
+    run_cli(argv + ["-o", sync_dir])
+    run_cli(argv + ["-o", async_dir, "--encoder-threads", 2])
+    
+    sync_files = _get_files(sync_dir)
+    assert sync_files and _get_files(async_dir) == sync_files
+    for name in sync_files:
+        with PIL.Image.open(sync_dir/name) as sync_img, PIL.Image.open(async_dir/name) as async_img:
+            assert sync_img.tobytes() == async_img.tobytes()
+
+
+def test_render_invert_lightness_kernel(monkeypatch):
+    
+    monkeypatch.setattr(cli_render, "np", numpy, raising=False)
+    rng = numpy.random.default_rng(0)
+    array = rng.integers(0, 256, (16, 16, 4), dtype=numpy.uint8)
+    orig = array.copy()
+    result = cli_render._np_postprocess(array, None, invert_lightness=True, exclude_images=False)
+    assert result is array  # in place
+    assert numpy.array_equal(array[..., 3], orig[..., 3])
+    
+    for px_in, px_out in zip(orig.reshape(-1, 4), array.reshape(-1, 4)):
+        exp = cli_render.PILEngine._invert_px_lightness(*(px_in[:3] / 255))
+        assert px_out[:3] == pytest.approx([round(v*255) for v in exp], abs=1)
+
+
+@pytest.mark.parametrize("render_kwargs", [dict(), dict(rev_byteorder=True), dict(prefer_bgrx=True), dict(prefer_bgrx=True, rev_byteorder=True), dict(fill_color=(255, 255, 255, 0)), dict(grayscale=True)])
+def test_render_np_to_pil(monkeypatch, render_kwargs):
+    monkeypatch.setattr(cli_render, "PIL", PIL, raising=False)
+    pdf = pdfium.PdfDocument(TestFiles.multipage)
+    bitmap = pdf[0].render(scale=0.5, **render_kwargs)
+    pil_image = cli_render._np_to_pil(bitmap.to_numpy(), bitmap.mode)
+    exp_image = bitmap.to_pil()
+    assert pil_image.mode == exp_image.mode.replace("X", "")
+    assert numpy.array_equal(numpy.asarray(pil_image), numpy.asarray(exp_image.convert(pil_image.mode)))
+
+
+def test_render_image_quads(monkeypatch):
+    
+    pdf = pdfium.PdfDocument(TestFiles.images)
+    page = pdf[0]
+    monkeypatch.setattr(cli_render, "np", numpy, raising=False)
+    for rotation in (0, 90, 180, 270):
+        bitmap = page.render(scale=0.5, rotation=rotation, crop=(10, 20, 30, 40))
+        posconv = bitmap.get_posconv(page)
+        quads = cli_render._np_get_image_quads(bitmap, page)
+        objs = list( page.get_objects([pdfium_c.FPDF_PAGEOBJ_IMAGE], max_depth=1) )
+        assert len(objs) > 0 and quads.shape == (len(objs), 4, 2)
+        for obj, quad in zip(objs, quads):
+            exp = [posconv.to_bitmap(x, y) for x, y in obj.get_quad_points()]
+            assert numpy.abs(quad - exp).max() <= 1
+        mask = cli_render._np_quads_mask(bitmap.to_numpy().shape, quads)
+        x, y = numpy.mean(quads[0], axis=0).astype(int)
+        assert mask[y, x] and mask.sum() < mask.size
+
+
 # # worked around by avoiding inclusion of system <windows.h> (or use reference bindings)
 # @pytest.mark.skipif(
 #     sys.platform.startswith("win32"),
@@ -183,3 +270,324 @@ def test_default_fonts(sfl_class):
         run_cli(["default-fonts"])
     finally:
         sfl.close()
+
+
+@pytest.mark.parametrize("layout", ["dzi", "xyz"])
+def test_tiles(tmp_path, layout):
+    
+    argv = ["tiles", TestFiles.multipage, "-o", tmp_path, "--pages", "1", "--layout", layout, "--scale", 0.5, "--tile-size", 128, "-f", "png"]
+    if layout == "dzi":
+        argv += ["--overlap", 1]
+    run_cli(argv + ["--processes", 2])
+    
+    page_w, page_h = pdfium.PdfDocument(TestFiles.multipage).get_page_size(0)
+    width, height = math.ceil(page_w*0.5), math.ceil(page_h*0.5)
+    if layout == "dzi":
+        assert f'<Size Width="{width}" Height="{height}"/>' in (tmp_path / "multipage_1.dzi").read_text()
+        levels_dir = tmp_path / "multipage_1_files"
+        top_level = math.ceil(math.log2(max(width, height)))
+        assert sorted(int(p.name) for p in levels_dir.iterdir()) == list(range(top_level+1))
+        assert (levels_dir / "0" / "0_0.png").exists()
+        with PIL.Image.open(levels_dir / str(top_level) / "0_0.png") as image:
+            assert image.size == (128+1, 128+1)
+    else:
+        levels_dir = tmp_path / "multipage_1"
+        top_level = math.ceil(math.log2(max(width, height) / 128))
+        assert sorted(int(p.name) for p in levels_dir.iterdir()) == list(range(top_level+1))
+        with PIL.Image.open(levels_dir / "0" / "0" / "0.png") as image:
+            assert image.size == (math.ceil(width / 2**top_level), math.ceil(height / 2**top_level))
+    
+    # blank tiles are skipped, so linear rendering without skipping must produce more tiles
+    n_tiles = len(list(levels_dir.glob("*/**/*.png")))
+    linear_dir = tmp_path / "linear"
+    linear_dir.mkdir()
+    run_cli(argv + ["--processes", 1, "--no-skip-blank", "-o", linear_dir])
+    assert len(list(linear_dir.glob("**/*.png"))) > n_tiles
+
+
+def test_render_cache(tmp_path, monkeypatch):
+    
+    out_dir, cache_dir = tmp_path / "out", tmp_path / "cache"
+    out_dir.mkdir()
+    argv = ["render", TestFiles.multipage, "-o", out_dir, "--scale", 0.2, "-f", "png", "--cache-dir", cache_dir, "--linear"]
+    run_cli(argv)
+    exp_files = {name: (out_dir/name).read_bytes() for name in _get_files(out_dir)}
+    assert len(exp_files) == 3 and len(list(cache_dir.iterdir())) == 3
+    
+    # a second run takes all pages from the cache
+    for name in exp_files:
+        (out_dir/name).unlink()
+    monkeypatch.setattr(cli_render, "_render_job", lambda *_: pytest.fail("page rendered despite cache"))
+    run_cli(argv)
+    assert {name: (out_dir/name).read_bytes() for name in _get_files(out_dir)} == exp_files
+
+
+def test_thumbnails(tmp_path):
+    
+    run_cli(["thumbnails", TestFiles.multipage, "-o", tmp_path, "--size", 64])
+    assert _get_files(tmp_path) == ["multipage_1.jpg", "multipage_2.jpg", "multipage_3.jpg"]
+    for name in _get_files(tmp_path):
+        with PIL.Image.open(tmp_path/name) as image:
+            assert max(image.size) == 64
+    
+    # the first page has an embedded 8x8 thumbnail, whereas a rendering would keep the page's portrait aspect ratio
+    run_cli(["thumbnails", TestFiles.toc_viewmodes, "-o", tmp_path, "--size", 8, "--pages", "1"])
+    with PIL.Image.open(tmp_path/"toc_viewmodes_1.jpg") as image:
+        assert image.size == (8, 8)
+
+
+@pytest.mark.parametrize("oversize", ["downscale", "skip", "error"])
+def test_render_oversize(tmp_path, oversize):
+    
+    pdf = pdfium.PdfDocument.new()
+    pdf.new_page(200, 100)
+    pdf.new_page(2000, 1000)
+    in_path = tmp_path / "mixed.pdf"
+    pdf.save(in_path)
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    
+    argv = ["render", in_path, "-o", out_dir, "-f", "png", "--max-pixels", 50_000, "--oversize", oversize]
+    if oversize == "error":
+        with pytest.raises(ValueError, match=r"Pages \[2\]"):
+            run_cli(argv)
+        assert _get_files(out_dir) == []
+        return
+    run_cli(argv)
+    
+    with PIL.Image.open(out_dir / "mixed_1.png") as image:
+        assert image.size == (200, 100)
+    if oversize == "skip":
+        assert _get_files(out_dir) == ["mixed_1.png"]
+    else:
+        with PIL.Image.open(out_dir / "mixed_2.png") as image:
+            width, height = image.size
+            assert width * height <= 50_000 and width > 300
+
+
+@pytest.mark.parametrize("grayscale", [False, True])
+def test_render_bands(tmp_path, grayscale):
+    
+    full_dir, bands_dir = tmp_path / "full", tmp_path / "bands"
+    full_dir.mkdir(), bands_dir.mkdir()
+    argv = ["render", TestFiles.multipage, "-f", "png", "--scale", 2, "--rotation", 90]
+    if grayscale:
+        argv.append("--grayscale")
+    run_cli([*argv, "-o", full_dir])
+    run_cli([*argv, "-o", bands_dir, "--band-height", 100])
+    
+    assert _get_files(bands_dir) == _get_files(full_dir)
+    for name in _get_files(full_dir):
+        with PIL.Image.open(full_dir/name) as full, PIL.Image.open(bands_dir/name) as bands:
+            assert bands.mode == ("L" if grayscale else "RGB")
+            assert bands.size == full.size
+            # anti-aliasing may differ slightly at band borders
+            diff = numpy.abs(numpy.asarray(full, dtype=int) - numpy.asarray(bands, dtype=int))
+            assert diff.max() <= 2 and diff.mean() < 0.01
+
+
+def test_render_bands_unsupported(tmp_path):
+    with pytest.raises(ValueError, match="requires PNG"):
+        run_cli(["render", TestFiles.multipage, "-o", tmp_path, "-f", "jpg", "--band-height", 100])
+    with pytest.raises(ValueError, match="--crop"):
+        run_cli(["render", TestFiles.multipage, "-o", tmp_path, "--crop", 10, 0, 0, 0, "--band-height", 100])
+    assert _get_files(tmp_path) == []
+
+
+def test_render_binarize_kernel(monkeypatch):
+    monkeypatch.setattr(cli_render, "np", numpy, raising=False)
+    gray = numpy.full((10, 20), 40, dtype=numpy.uint8)
+    gray[:, 12:] = 200
+    assert 40 <= cli_render._np_otsu_threshold(gray) < 200
+    binary = cli_render._np_postprocess(gray, None, invert_lightness=False, exclude_images=False, binarize="otsu")
+    assert binary.dtype == bool and binary.shape == gray.shape
+    assert not binary[:, :12].any() and binary[:, 12:].all()
+    assert not cli_render._np_binarize(gray, 200).any()
+
+
+@pytest.mark.parametrize("format", ["pbm", "png", "tif"])
+def test_render_binarize(tmp_path, format):
+    run_cli(["render", TestFiles.multipage, "-o", tmp_path, "-f", format, "--binarize", "otsu", "--pages", "1"])
+    with PIL.Image.open(tmp_path / f"multipage_1.{format}") as image:
+        assert image.mode == "1"
+        if format == "tif":
+            assert image.info["compression"] == "group4"
+        array = numpy.asarray(image)
+    # mostly white page with black text
+    assert 0.5 < array.mean() < 1
+
+
+def test_render_binarize_cv2_formats(tmp_path):
+    # cv2 cannot write 1-bit TIFF, which is rejected instead of silently writing 8-bit gray
+    with pytest.raises(ValueError, match="only supports PNG and PBM"):
+        run_cli(["render", TestFiles.multipage, "-o", tmp_path, "-f", "tif", "--engine", "numpy+cv2", "--binarize", "otsu"])
+
+
+def test_render_pgm(tmp_path):
+    run_cli(["render", TestFiles.multipage, "-o", tmp_path, "-f", "pgm", "--grayscale", "--pages", "1"])
+    pdf = pdfium.PdfDocument(TestFiles.multipage)
+    expected = pdf[0].render(grayscale=True).to_numpy()
+    with PIL.Image.open(tmp_path / "multipage_1.pgm") as image:
+        assert image.mode == "L"
+        assert numpy.array_equal(numpy.asarray(image), expected)
+    with pytest.raises(ValueError, match="PBM output requires --binarize"):
+        run_cli(["render", TestFiles.multipage, "-o", tmp_path, "-f", "pbm"])
+
+
+@pytest.mark.parametrize("linear", [None, 0])
+@pytest.mark.parametrize("container", ["zip", "tar", "tiff"])
+def test_render_container(tmp_path, container, linear):
+    
+    out_path = tmp_path / f"out.{container}"
+    argv = ["render", TestFiles.multipage, "-o", out_path, "--container", container, "-f", "tif" if container == "tiff" else "png"]
+    if linear is not None:
+        argv += ["--linear", linear]
+    run_cli(argv)
+    assert _get_files(tmp_path) == [out_path.name]
+    
+    pdf = pdfium.PdfDocument(TestFiles.multipage)
+    exp_names = ["multipage_1.png", "multipage_2.png", "multipage_3.png"]
+    if container == "zip":
+        with zipfile.ZipFile(out_path) as archive:
+            assert archive.namelist() == exp_names
+            images = [PIL.Image.open(io.BytesIO(archive.read(n))) for n in exp_names]
+    elif container == "tar":
+        with tarfile.open(out_path) as archive:
+            assert archive.getnames() == exp_names
+            images = [PIL.Image.open(io.BytesIO(archive.extractfile(n).read())) for n in exp_names]
+    else:
+        with PIL.Image.open(out_path) as tiff:
+            assert tiff.n_frames == len(pdf)
+            images = []
+            for i in range(tiff.n_frames):
+                tiff.seek(i)
+                images.append(tiff.copy())
+    
+    assert [im.size for im in images] == [tuple(math.ceil(v) for v in page.get_size()) for page in pdf]
+
+
+def test_tiff_writer(tmp_path, monkeypatch):
+    
+    # pages of different modes and compressions are chained as-is
+    images = [
+        PIL.Image.fromarray((numpy.arange(40*60*3).reshape(40, 60, 3) % 251).astype(numpy.uint8)),
+        PIL.Image.fromarray(numpy.arange(20*30).reshape(20, 30) % 3 == 0),
+        PIL.Image.fromarray((numpy.arange(25*25).reshape(25, 25) % 256).astype(numpy.uint8)),
+    ]
+    out_path = tmp_path / "out.tif"
+    with cli_writers.TiffWriter(out_path) as writer:
+        for i, image in enumerate(images):
+            buffer = io.BytesIO()
+            image.save(buffer, format="TIFF", **(dict(compression="group4") if image.mode == "1" else {}))
+            writer.add(f"{i}.tif", buffer.getvalue())
+    with PIL.Image.open(out_path) as tiff:
+        assert tiff.n_frames == len(images)
+        for i, image in enumerate(images):
+            tiff.seek(i)
+            assert tiff.mode == image.mode
+            assert numpy.array_equal(numpy.asarray(tiff), numpy.asarray(image))
+    
+    monkeypatch.setattr(PIL, "__version__", "9.2.0")
+    with pytest.raises(RuntimeError, match="requires Pillow"):
+        cli_writers.TiffWriter(tmp_path / "old.tif")
+    assert not (tmp_path / "old.tif").exists()
+
+
+def test_render_stdout_requires_container():
+    with pytest.raises(ValueError, match="requires --container"):
+        run_cli(["render", TestFiles.multipage, "-o", "-"])
+
+
+def test_render_supervised(tmp_path):
+    # supervision uses worker processes even below the linear threshold
+    run_cli(["render", TestFiles.multipage, "-o", tmp_path, "--retries", 1, "--on-failure", "skip"])
+    assert _get_files(tmp_path) == ["multipage_1.jpg", "multipage_2.jpg", "multipage_3.jpg"]
+    with pytest.raises(ValueError, match="supervision"):
+        run_cli(["render", TestFiles.multipage, "-o", tmp_path, "--timeout", 10, "--encoder-threads", 2])
+
+
+def test_render_max_memory(tmp_path):
+    run_cli(["render", TestFiles.multipage, "-o", tmp_path, "--linear", 0, "--processes", 2, "--max-memory", 1])
+    assert _get_files(tmp_path) == ["multipage_1.jpg", "multipage_2.jpg", "multipage_3.jpg"]
+
+
+def test_render_resume(tmp_path):
+    
+    argv = ["render", TestFiles.multipage, "-o", tmp_path, "--resume"]
+    run_cli(argv)
+    exp_files = ["multipage_1.jpg", "multipage_2.jpg", "multipage_3.jpg"]
+    manifest = json.loads( (tmp_path / ".multipage_manifest.json").read_text() )
+    assert [e["file"] for e in manifest["pages"].values()] == exp_files
+    
+    # mark the files, then truncate one, which should be the only one rendered again
+    sizes = {}
+    for name in exp_files:
+        sizes[name] = (tmp_path/name).stat().st_size
+        os.utime(tmp_path/name, (0, 0))
+    with open(tmp_path/exp_files[1], "r+b") as fh:
+        fh.truncate(100)
+    run_cli(argv)
+    assert [(tmp_path/n).stat().st_mtime == 0 for n in exp_files] == [True, False, True]
+    assert (tmp_path/exp_files[1]).stat().st_size == sizes[exp_files[1]]
+    
+    # other rendering options invalidate all pages
+    run_cli(argv + ["--scale", 0.5])
+    assert not any((tmp_path/n).stat().st_mtime == 0 for n in exp_files)
+
+
+@pytest.mark.parametrize("linear", [None, 0])
+def test_render_stats(tmp_path, linear):
+    stats_path = tmp_path / "stats.json"
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+    argv = ["render", TestFiles.multipage, "-o", output_dir, "--stats", stats_path]
+    if linear is not None:
+        argv += ["--linear", linear]
+    run_cli(argv)
+    summary = json.loads( stats_path.read_text() )
+    assert summary["pages"] == 3
+    assert list(summary["stages"]) == ["load", "render", "convert", "postprocess", "save", "total"]
+    assert summary["bytes"]["output"]["total"] == sum(p.stat().st_size for p in output_dir.iterdir())
+
+
+def test_tune(tmp_path, monkeypatch):
+    
+    # pretend there are multiple cores, so that the parallel stages are run as well
+    monkeypatch.setattr(os, "cpu_count", lambda: 2)
+    profile_path = tmp_path / "profile.json"
+    run_cli(["tune", TestFiles.multipage, "-f", "png", "--sample", 2, "--profile", profile_path])
+    profiles = json.loads(profile_path.read_text())
+    assert list(profiles.keys()) == ["png"]
+    profile = profiles["png"]
+    assert set(profile.keys()) == set(cli_render.ProfileOptions)
+    assert profile["engine"] in cli_render.Engines and profile["processes"] == 2
+    
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    run_cli(["render", TestFiles.multipage, "-o", out_dir, "-f", "png", "--profile", profile_path])
+    assert _get_files(out_dir) == ["multipage_1.png", "multipage_2.png", "multipage_3.png"]
+
+
+def _reject_constant(name):
+    raise ValueError(f"Non-standard JSON constant {name}")
+
+
+def test_tune_single_core(tmp_path, monkeypatch):
+    
+    # without parallel stages, the profile always renders linearly, which must be stored as standard JSON
+    monkeypatch.setattr(os, "cpu_count", lambda: 1)
+    profile_path = tmp_path / "profile.json"
+    run_cli(["tune", TestFiles.multipage, "-f", "png", "--sample", 2, "--profile", profile_path])
+    profile = json.loads(profile_path.read_text(), parse_constant=_reject_constant)["png"]
+    assert profile["linear"] is None
+    
+    args = argparse.Namespace(**{k: None for k in cli_render.ProfileOptions if k != "engine"}, engine_cls=None)
+    cli_render.apply_profile(args, profile)
+    assert args.linear == math.inf
+
+
+def test_tune_linear_threshold():
+    # 1s per page linear; in parallel, 4 pages take 2s with 2 processes, i.e. 0s of overhead
+    assert cli_tune._estimate_linear_threshold(4, 4, 2, 2) == 0
+    # 1s of overhead; linear rendering wins up to 2 pages (2s vs. 1s + 1s)
+    assert cli_tune._estimate_linear_threshold(4, 4, 3, 2) == 2
@@ -1,7 +1,9 @@
 # SPDX-FileCopyrightText: 2026 geisserml <geisserml@gmail.com>
 # SPDX-License-Identifier: Apache-2.0 OR BSD-3-Clause
 
+import math
 import pytest
+import numpy
 import pypdfium2 as pdfium
 import pypdfium2.raw as pdfium_c
 from .conftest import TestFiles, OutputDir
@@ -78,3 +80,73 @@ def test_posconv():
     assert bmp_corners == exp_bmp_corners
     reverse_page_corners = [posconv.to_page(x, y) for x, y in bmp_corners]
     assert reverse_page_corners == page_corners
+
+
+@pytest.mark.parametrize("page_rotation", [0, 90, 180, 270])
+@pytest.mark.parametrize("rotate", [0, 1, 2, 3])
+def test_posconv_many(page_rotation, rotate):
+    
+    pdf = pdfium.PdfDocument.new()
+    page = pdf.new_page(100, 150)
+    page.set_cropbox(10, 20, 90, 140)
+    page.set_rotation(page_rotation)
+    posconv = pdfium.PdfPosConv(page, (-7, 13, 160, 200, rotate))
+    
+    page_points = numpy.random.default_rng(0).uniform(-50, 200, (64, 2))
+    bitmap_points = posconv.to_bitmap_many(page_points)
+    assert bitmap_points.shape == page_points.shape
+    exp_bitmap_points = [posconv.to_bitmap(x, y) for x, y in page_points]
+    # pdfium rounds to integers, so allow for float imprecision at .5 boundaries
+    assert numpy.abs(bitmap_points - exp_bitmap_points).max() <= 0.5 + 1e-3
+    
+    int_points = numpy.rint(bitmap_points).astype(int)
+    exp_page_points = [posconv.to_page(x, y) for x, y in int_points.tolist()]
+    assert posconv.to_page_many(int_points) == pytest.approx(numpy.array(exp_page_points), abs=1e-3)
+    assert posconv.to_page_many(bitmap_points) == pytest.approx(page_points, abs=1e-6)
+    
+    # plain sequences and arbitrary leading dimensions
+    assert posconv.to_bitmap_many([(1, 2), (3, 4)]).shape == (2, 2)
+    assert posconv.to_bitmap_many(page_points.reshape(4, 16, 2)).shape == (4, 16, 2)
+    with pytest.raises(ValueError):
+        posconv.to_bitmap_many([1, 2, 3])
+
+
+def test_get_thumbnail():
+    
+    pdf = pdfium.PdfDocument(TestFiles.toc_viewmodes)
+    page = pdf[0]
+    
+    # the page has an embedded 8x8 thumbnail, which is used where it fits
+    thumbnail, is_embedded = page.get_thumbnail(8)
+    assert (thumbnail.width, thumbnail.height) == (8, 8)
+    assert is_embedded
+    
+    # otherwise, a fitting rendering is made
+    for kwargs in [dict(max_size=8, use_embedded=False), dict(max_size=7), dict(max_size=100), dict(max_size=(100, 50))]:
+        bitmap, is_embedded = page.get_thumbnail(**kwargs)
+        max_size = kwargs["max_size"]
+        max_width, max_height = (max_size, max_size) if isinstance(max_size, int) else max_size
+        assert not is_embedded
+        assert bitmap.width <= max_width and bitmap.height <= max_height
+        assert bitmap.width == max_width or bitmap.height == max_height
+    
+    bitmap, _ = page.get_thumbnail(100, rotation=90)
+    assert bitmap.width > bitmap.height
+    
+    # the reduced quality defaults may be overridden
+    bitmap, _ = page.get_thumbnail(100, use_embedded=False, no_smoothimage=False, no_smoothpath=False)
+    exp_bitmap = page.render(max_width=100, max_height=100)
+    assert numpy.array_equal(bitmap.to_numpy(), exp_bitmap.to_numpy())
+
+
+def test_fit_scale():
+    from pypdfium2._helpers.page import _get_fit_scale
+    for width, height in [(531, 666), (595, 842), (100, 100), (0.3, 1234.5)]:
+        for limits in [dict(max_width=100), dict(max_height=77), dict(max_pixels=10000), dict(max_width=50, max_height=3000, max_pixels=20000)]:
+            scale = _get_fit_scale(width, height, **limits)
+            w_px, h_px = math.ceil(width*scale), math.ceil(height*scale)
+            assert w_px <= limits.get("max_width", math.inf) and h_px <= limits.get("max_height", math.inf)
+            assert w_px * h_px <= limits.get("max_pixels", math.inf)
+            # the fitting scale is not much smaller than the tightest limit (unless rounding up a tiny side dominates)
+            if min(width, height) >= 100:
+                assert scale * 1.05 > min(limits.get("max_width", math.inf)/width, limits.get("max_height", math.inf)/height, math.sqrt(limits.get("max_pixels", math.inf)/(width*height)))
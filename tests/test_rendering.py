@@ -1,14 +1,27 @@
 # SPDX-FileCopyrightText: 2026 geisserml <geisserml@gmail.com>
 # SPDX-License-Identifier: Apache-2.0 OR BSD-3-Clause
 
+import io
+import os
+import sys
 import math
+import time
+import gc
+import ctypes
+import logging
+import weakref
+import functools
 import numpy
 import warnings
+from multiprocessing.shared_memory import SharedMemory
 import PIL.Image
 import PIL.ImageDraw
 import pytest
 import pypdfium2 as pdfium
 import pypdfium2.raw as pdfium_c
+import pypdfium2._helpers.parallel as pdfium_parallel
+import pypdfium2._helpers.document as pdfium_document
+from pypdfium2._helpers.parallel import _estimate_costs, _plan_chunks, _estimate_bitmap_bytes
 from .conftest import (
     TestFiles,
     PyVersion,
@@ -382,3 +395,449 @@ def test_draw_image_borders():
         draw.polygon(qps, outline=GREEN, width=3)
     
     pil_image.save(OutputDir/"image_borders.png")
+
+
+def _get_bitmap_info(i, bitmap, page):
+    return (bitmap.width, bitmap.height, bitmap.mode)
+
+@pytest.mark.parametrize("processes", [1, 2])
+@pytest.mark.parametrize("ordered", [True, False])
+def test_render_pages_parallel(processes, ordered):
+    pdf = pdfium.PdfDocument(TestFiles.multipage)
+    kwargs = dict(scale=0.5, grayscale=True)
+    exp_infos = [_get_bitmap_info(i, page.render(**kwargs), page) for i, page in enumerate(pdf)]
+    results = list( pdf.render_pages(processes=processes, ordered=ordered, converter=_get_bitmap_info, **kwargs) )
+    indices = [i for i, _ in results]
+    if ordered:
+        assert indices == [0, 1, 2]
+    else:
+        assert sorted(indices) == [0, 1, 2]
+    for i, info in results:
+        assert info == exp_infos[i]
+
+
+def test_render_pages_bitmaps(multipage_doc):
+    results = multipage_doc.render_pages(processes=2, scale=0.5)
+    for (i, bitmap), page in zip(results, multipage_doc):
+        assert isinstance(bitmap, pdfium.PdfBitmap)
+        exp_array = page.render(scale=0.5).to_numpy()
+        assert numpy.array_equal(bitmap.to_numpy(), exp_array)
+
+
+@pytest.mark.skipif(sys.platform.startswith("win32"), reason="Shared memory bitmaps are not supported on Windows.")
+def test_render_pages_shared_memory(multipage_doc):
+    
+    results = list( multipage_doc.render_pages(processes=2, shared_memory=True, scale=0.5) )
+    assert [i for i, _ in results] == [0, 1, 2]
+    
+    for (i, bitmap), page in zip(results, multipage_doc):
+        exp_array = page.render(scale=0.5).to_numpy()
+        assert numpy.array_equal(bitmap.to_numpy(), exp_array)
+        # the block's name is unlinked once the main process has mapped it
+        with pytest.raises(FileNotFoundError):
+            SharedMemory(bitmap.buffer._shm.name)
+    
+    # the mapping is kept while views of the buffer exist, and closed once the last one is collected
+    shm = results[0][1].buffer._shm
+    array = results[0][1].to_numpy()
+    del results, bitmap
+    gc.collect()
+    assert shm.buf is not None and array.sum() > 0
+    del array
+    gc.collect()
+    assert shm.buf is None
+    
+    with pytest.raises(ValueError, match="converter"):
+        next( multipage_doc.render_pages(processes=2, shared_memory=True, converter=_get_bitmap_info) )
+
+
+@pytest.mark.skipif(sys.platform.startswith("win32"), reason="Shared memory bitmaps are not supported on Windows.")
+def test_render_pages_shared_memory_early_exit(monkeypatch, multipage_doc):
+    
+    # blocks of pages that were rendered but not consumed are removed when the caller stops iterating
+    prefix = f"psm_test_{os.getpid()}_"
+    monkeypatch.setattr(pdfium_document, "_get_shared_name_prefix", lambda: prefix)
+    results = multipage_doc.render_pages(processes=2, shared_memory=True, scale=0.5)
+    i, bitmap = next(results)
+    results.close()
+    for i in range(len(multipage_doc)):
+        with pytest.raises(FileNotFoundError):
+            SharedMemory(f"{prefix}{i}")
+    
+    # a persistent pool finishes the remaining pages and removes their blocks
+    if os.path.isdir("/dev/shm"):
+        with pdfium.PdfRenderPool(processes=2) as pool:
+            before = set(os.listdir("/dev/shm"))
+            results = pool.render(TestFiles.multipage, shared_memory=True, scale=0.5)
+            i, bitmap = next(results)
+            results.close()
+            del bitmap
+            gc.collect()
+            assert set(os.listdir("/dev/shm")) <= before
+
+
+@pytest.mark.parametrize("input_type", ["bytes", "ctypes", "stream"])
+def test_render_pages_shared_input(monkeypatch, input_type):
+    
+    data = TestFiles.multipage.read_bytes()
+    input = dict(
+        bytes = lambda: data,
+        ctypes = lambda: (ctypes.c_ubyte * len(data)).from_buffer_copy(data),
+        stream = lambda: io.BytesIO(data),
+    )[input_type]()
+    pdf = pdfium.PdfDocument(input)
+    exp_infos = [_get_bitmap_info(i, page.render(scale=0.5), page) for i, page in enumerate(pdf)]
+    
+    released = []
+    release_input = pdfium_parallel._release_input
+    monkeypatch.setattr(pdfium_parallel, "_release_input", lambda shm: (released.append(shm.name), release_input(shm)))
+    
+    results = list( pdf.render_pages(processes=2, converter=_get_bitmap_info, scale=0.5) )
+    assert results == list(enumerate(exp_infos))
+    # the document was shared through one block, which is gone after rendering
+    assert len(released) == 1
+    with pytest.raises(FileNotFoundError):
+        SharedMemory(released[0])
+
+
+def test_render_pages_by_cost(multipage_doc):
+    
+    costs = _estimate_costs(multipage_doc, [0, 1, 2])
+    assert all(c > 0 for c in costs)
+    # heavy items are dispatched first and alone, cheap ones are batched
+    assert _plan_chunks([1, 1, 8, 1, 1, 4], n_procs=1) == [[2], [5], [0, 1, 3, 4]]
+    
+    exp_infos = [_get_bitmap_info(i, page.render(scale=0.5), page) for i, page in enumerate(multipage_doc)]
+    results = list( multipage_doc.render_pages(pages=[2, 0, 1], processes=2, schedule="cost", converter=_get_bitmap_info, scale=0.5) )
+    assert results == [(i, exp_infos[i]) for i in (2, 0, 1)]
+
+
+def _misbehave(marker, i, bitmap, page):
+    if i == 1:
+        time.sleep(60)
+    elif i == 2 and not marker.exists():
+        # crash on the first attempt only
+        marker.touch()
+        os._exit(1)
+    return _get_bitmap_info(i, bitmap, page)
+
+
+def test_render_pages_supervised(tmp_path, multipage_doc):
+    
+    exp_infos = [_get_bitmap_info(i, page.render(scale=0.5), page) for i, page in enumerate(multipage_doc)]
+    converter = functools.partial(_misbehave, tmp_path/"crashed")
+    results = list( multipage_doc.render_pages(processes=2, timeout=2, retries=1, on_failure="skip", converter=converter, scale=0.5) )
+    
+    assert [i for i, _ in results] == [0, 1, 2]
+    assert results[0][1] == exp_infos[0]
+    assert results[1][1] == pdfium.PdfJobFailure(1, "timeout", "exceeded timeout of 2s", 2)
+    # the crashed page succeeded on retry with a fresh worker
+    assert results[2][1] == exp_infos[2]
+    
+    (tmp_path/"crashed").unlink()
+    with pytest.raises(RuntimeError, match="exit code 1"):
+        list( multipage_doc.render_pages(pages=[2], timeout=10, converter=converter, scale=0.5) )
+
+
+@pytest.mark.parametrize("kwargs", [
+    dict(scale=0.5),
+    dict(scale=1.3, grayscale=True, rotation=90),
+    dict(scale=2, crop=(10, 20, 30, 40), prefer_bgrx=True),
+    dict(scale=4, max_width=300, fill_color=(255, 255, 255, 0)),
+])
+def test_estimate_bitmap_bytes(multipage_doc, kwargs):
+    exp_sizes = []
+    for page in multipage_doc:
+        bitmap = page.render(**kwargs)
+        exp_sizes.append(bitmap.stride * bitmap.height)
+    assert _estimate_bitmap_bytes(multipage_doc, [0, 1, 2], kwargs) == exp_sizes
+
+
+def _get_job_interval(i, bitmap, page):
+    start = time.monotonic()
+    time.sleep(0.2)
+    return (start, time.monotonic())
+
+
+def _get_worker_pid(i, bitmap, page):
+    return os.getpid()
+
+
+def test_render_pages_max_memory(multipage_doc, caplog):
+    # a budget smaller than any page lets only one page in flight at a time
+    results = list( multipage_doc.render_pages(processes=2, max_memory=1, converter=_get_job_interval, scale=0.5) )
+    assert [i for i, _ in results] == [0, 1, 2]
+    intervals = sorted(r for _, r in results)
+    assert all(prev[1] <= next[0] for prev, next in zip(intervals, intervals[1:]))
+    
+    # linear rendering does not apply the budget, which is reported rather than dropped silently
+    with caplog.at_level(logging.WARNING):
+        results = list( multipage_doc.render_pages(processes=1, max_memory=1, converter=_get_worker_pid, scale=0.5) )
+    assert [pid for _, pid in results] == [os.getpid()] * 3
+    assert "max_memory does not apply" in caplog.text
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+@pytest.mark.parametrize("recycle", [dict(recycle_after=1), dict(recycle_rss=1)])
+def test_render_pages_recycle(multipage_doc, recycle, processes):
+    # each page goes to a fresh worker, also with a single process (which would otherwise render linearly)
+    results = list( multipage_doc.render_pages(processes=processes, converter=_get_worker_pid, **recycle) )
+    assert [i for i, _ in results] == [0, 1, 2]
+    pids = [pid for _, pid in results]
+    assert len(set(pids)) == 3 and os.getpid() not in pids
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_render_pages_stats(multipage_doc, processes):
+    
+    stats = pdfium.PdfRenderStats()
+    results = list( multipage_doc.render_pages(processes=processes, converter=_get_bitmap_info, stats=stats, scale=0.5) )
+    assert [i for i, (w, h, _) in results] == [0, 1, 2]
+    
+    assert sorted(r["item"] for r in stats.records) == [0, 1, 2]
+    for i, (width, height, mode) in results:
+        record = next(r for r in stats.records if r["item"] == i)
+        assert list(record["stages"]) == ["load", "render", "total"]
+        assert record["bytes"] == {"bitmap": width * height * len(mode)}
+    
+    summary = stats.summary()
+    assert summary["pages"] == 3
+    assert summary["processes"] == (1 if processes == 1 else 2)
+    assert summary["pages_per_s"] == 3 / summary["wall_time"]
+    assert set(summary["stages"]["render"]["wall"]) == {"p50", "p95", "max", "total"}
+    assert summary["bytes"]["bitmap"]["total"] == sum(w * h * len(m) for _, (w, h, m) in results)
+
+
+def _get_worker_doc(i, bitmap, page):
+    return (os.getpid(), id(page.pdf))
+
+
+@pytest.mark.parametrize("mp_strategy", ["spawn", "forkserver"])
+def test_render_pool(mp_strategy):
+    
+    pdf = pdfium.PdfDocument(TestFiles.multipage)
+    exp_infos = [_get_bitmap_info(i, page.render(scale=0.5), page) for i, page in enumerate(pdf)]
+    
+    with pdfium.PdfRenderPool(processes=2, mp_strategy=mp_strategy) as pool:
+        
+        results = list( pool.render(TestFiles.multipage, converter=_get_bitmap_info, scale=0.5) )
+        assert results == list(enumerate(exp_infos))
+        results = list( pool.render(pdf, pages=[2, 0], converter=_get_bitmap_info, scale=0.5) )
+        assert results == [(2, exp_infos[2]), (0, exp_infos[0])]
+        
+        # workers keep the document open across calls
+        worker_docs = {}
+        for _ in range(2):
+            for _, (pid, doc_id) in pool.render(TestFiles.multipage, converter=_get_worker_doc):
+                assert worker_docs.setdefault(pid, doc_id) == doc_id
+        
+        (i, bitmap), = pool.render(TestFiles.multipage, pages=[1], scale=0.5)
+        assert numpy.array_equal(bitmap.to_numpy(), pdf[1].render(scale=0.5).to_numpy())
+    
+    with pytest.raises(ValueError, match="file path"):
+        next( pool.render(pdfium.PdfDocument(TestFiles.multipage.read_bytes())) )
+
+
+def test_render_pool_recycle():
+    with pdfium.PdfRenderPool(processes=1, recycle_after=1) as pool:
+        pids = [pid for _, pid in pool.render(TestFiles.multipage, converter=_get_worker_pid)]
+    assert len(set(pids)) == 3
+
+
+def test_render_progressive(sample_page):
+    
+    exp_array = sample_page.render(scale=0.5).to_numpy()
+    
+    task = sample_page.render_progressive(scale=0.5)
+    assert task.status == pdfium_c.FPDF_RENDER_READY
+    n_steps = 1
+    while not task.resume(should_pause=lambda: True):
+        assert task.status == pdfium_c.FPDF_RENDER_TOBECONTINUED
+        n_steps += 1
+    assert task.done and not task.pending
+    assert n_steps > 1
+    assert numpy.array_equal(task.bitmap.to_numpy(), exp_array)
+    assert task.bitmap.get_posconv(sample_page)
+    
+    with pytest.raises(RuntimeError, match="already been finished or aborted"):
+        task.resume()
+
+
+def test_render_progressive_abort(sample_page):
+    
+    task = sample_page.render_progressive(scale=0.5)
+    assert not task.resume(timeout=0)
+    assert task.abort()
+    assert not task.pending and not task.done
+    assert not task.abort()
+    
+    # the page must be usable for rendering again after aborting
+    task = sample_page.render_progressive(scale=0.5)
+    assert task.resume()
+    assert task.done
+
+
+def test_render_progressive_release(monkeypatch):
+    
+    closed = []
+    close_func = pdfium_c.FPDF_RenderPage_Close
+    monkeypatch.setattr(pdfium_c, "FPDF_RenderPage_Close", lambda page: closed.append(page) or close_func(page))
+    pdf = pdfium.PdfDocument(TestFiles.multipage)
+    page = pdf[0]
+    
+    # dropping a pending rendering releases it, along with the bitmap
+    task = page.render_progressive(scale=0.5)
+    assert not task.resume(timeout=0)
+    bitmap_ref = weakref.ref(task.bitmap)
+    del task
+    gc.collect()
+    assert len(closed) == 1 and bitmap_ref() is None
+    assert not page._kids
+    
+    # closing the page releases a pending rendering first
+    task = page.render_progressive(scale=0.5)
+    assert not task.resume(timeout=0)
+    page.close()
+    assert len(closed) == 2
+    assert not task.pending and not task.abort()
+
+
+def test_render_into(sample_page):
+    
+    exp_bitmap = sample_page.render(scale=0.5, rev_byteorder=True)
+    bitmap = pdfium.PdfBitmap.new_native(exp_bitmap.width, exp_bitmap.height, pdfium_c.FPDFBitmap_BGR, rev_byteorder=True)
+    bitmap.fill_rect((255, 0, 0, 255), 0, 0, bitmap.width, bitmap.height)
+    
+    assert sample_page.render_into(bitmap, scale=0.5) is bitmap
+    assert bitmap.mode == "RGB"
+    assert numpy.array_equal(bitmap.to_numpy(), exp_bitmap.to_numpy())
+    assert bitmap.get_posconv(sample_page).to_page(0, 0) == exp_bitmap.get_posconv(sample_page).to_page(0, 0)
+    
+    with pytest.raises(ValueError, match="does not match rendering size"):
+        sample_page.render_into(bitmap, scale=1)
+    # render() always allocates, rendering into a given bitmap is up to render_into()
+    with pytest.raises(TypeError):
+        sample_page.render(target=bitmap, scale=0.5)
+
+
+def test_render_bitmap_pool(multipage_doc):
+    
+    pool = pdfium.PdfBitmapPool(max_idle=2)
+    page = multipage_doc[0]
+    exp_array = page.render(scale=0.5).to_numpy()
+    
+    bitmap = page.render(scale=0.5, bitmap_maker=pool)
+    assert len(pool) == 0
+    pool.release(bitmap)
+    assert len(pool) == 1
+    
+    # a bitmap of matching size and format is recycled, and filled before rendering
+    bitmap.fill_rect((255, 0, 0, 255), 0, 0, bitmap.width, bitmap.height)
+    reused = page.render(scale=0.5, bitmap_maker=pool)
+    assert reused is bitmap and len(pool) == 0
+    assert numpy.array_equal(reused.to_numpy(), exp_array)
+    
+    # a different size or format gets a new bitmap
+    other = page.render(scale=0.25, bitmap_maker=pool)
+    gray = page.render(scale=0.5, bitmap_maker=pool, grayscale=True)
+    assert other is not reused and gray is not reused
+    
+    # least recently released bitmaps are dropped if the pool is full
+    for b in (reused, other, gray):
+        pool.release(b)
+    assert len(pool) == 2
+    assert page.render(scale=0.5, bitmap_maker=pool) is not reused
+    pool.clear()
+    assert len(pool) == 0
+
+
+@pytest.mark.parametrize("rotation", [0, 90, 180, 270])
+def test_render_tiles(multipage_doc, rotation):
+    
+    page = multipage_doc[0]
+    exp_bitmap = page.render(scale=0.7, rotation=rotation)
+    exp_posconv = exp_bitmap.get_posconv(page)
+    exp_array = exp_bitmap.to_numpy()
+    exp_h, exp_w = exp_array.shape[:2]
+    
+    canvas = numpy.zeros_like(exp_array)
+    covered = numpy.zeros(exp_array.shape[:2], dtype=int)
+    for x, y, bitmap in page.render_tiles(scale=0.7, tile_size=(150, 100), rotation=rotation):
+        assert bitmap.width <= 150 and bitmap.height <= 100
+        canvas[y:y+bitmap.height, x:x+bitmap.width] = bitmap.to_numpy()
+        covered[y:y+bitmap.height, x:x+bitmap.width] += 1
+        # position conversion is relative to the tile
+        posconv = bitmap.get_posconv(page)
+        assert posconv.to_page(10, 20) == pytest.approx(exp_posconv.to_page(x+10, y+20), abs=1e-3)
+    
+    assert numpy.all(covered == 1)
+    # pdfium may snap glyphs differently at tile borders, so allow a few deviating pixels
+    n_diff = numpy.count_nonzero(numpy.any(canvas != exp_array, axis=-1))
+    assert n_diff < exp_w * exp_h * 0.01
+
+
+def test_render_tiles_overlap(sample_page):
+    
+    exp_array = sample_page.render(scale=0.5).to_numpy()
+    tiles = [(1, 1), (0, 0)]
+    results = list( sample_page.render_tiles(scale=0.5, tile_size=100, overlap=2, tiles=tiles) )
+    
+    (x, y, inner), (x0, y0, corner) = results
+    assert (x, y, inner.width, inner.height) == (98, 98, 104, 104)
+    assert (x0, y0, corner.width, corner.height) == (0, 0, 102, 102)
+    n_diff = numpy.count_nonzero(numpy.any(inner.to_numpy() != exp_array[98:202, 98:202], axis=-1))
+    assert n_diff < 104 * 104 * 0.01
+    
+    with pytest.raises(ValueError, match="out of bounds"):
+        next( sample_page.render_tiles(scale=0.5, tile_size=100, tiles=[(10, 0)]) )
+
+
+def test_render_cache(multipage_doc, tmp_path, monkeypatch):
+    
+    cache = pdfium.PdfRenderCache(max_memory=2**20, directory=tmp_path)
+    exp_array = multipage_doc[1].render(scale=0.5).to_numpy()
+    bitmap = cache.render(multipage_doc, 1, scale=0.5)
+    assert numpy.array_equal(bitmap.to_numpy(), exp_array)
+    
+    # equivalent options share the key, others don't
+    key = cache.get_key(multipage_doc, 1, scale=0.5)
+    assert cache.get_key(multipage_doc, 1, scale=0.5, rotation=0, fill_color=[255, 255, 255, 255]) == key
+    assert cache.get_key(multipage_doc, 1, scale=0.5, grayscale=True) != key
+    assert cache.get_key(multipage_doc, 2, scale=0.5) != key
+    with pytest.raises(TypeError):
+        cache.get_key(multipage_doc, 1, sclae=0.5)
+    
+    # hits neither load nor render the page, from memory or from disk
+    monkeypatch.setattr(pdfium.PdfDocument, "__getitem__", lambda *_: pytest.fail("page loaded on cache hit"))
+    hit = cache.render(multipage_doc, 1, scale=0.5)
+    assert hit is not bitmap and numpy.array_equal(hit.to_numpy(), exp_array)
+    disk_cache = pdfium.PdfRenderCache(max_memory=0, directory=tmp_path)
+    hit = disk_cache.render(multipage_doc, 1, scale=0.5)
+    assert (hit.width, hit.height, hit.format) == (bitmap.width, bitmap.height, bitmap.format)
+    assert numpy.array_equal(hit.to_numpy(), exp_array)
+    monkeypatch.undo()
+    
+    # least recently used entries are evicted once the disk limit is exceeded
+    size = len(disk_cache.get(key))
+    small_cache = pdfium.PdfRenderCache(max_memory=0, directory=tmp_path, max_disk=size*2)
+    small_cache.render(multipage_doc, 0, scale=0.5)
+    small_cache.get(key)
+    small_cache.render(multipage_doc, 2, scale=0.5)
+    assert small_cache.get(key) is not None
+    assert small_cache.get(small_cache.get_key(multipage_doc, 0, scale=0.5)) is None
+    small_cache.clear()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_render_max_size(sample_page):
+    
+    full = sample_page.render(scale=2)
+    assert sample_page.render(scale=2, max_width=full.width, max_pixels=full.width*full.height).to_numpy().shape == full.to_numpy().shape
+    
+    for rotation in (0, 90):
+        for limits in [dict(max_width=300), dict(max_height=300), dict(max_pixels=100_000), dict(max_width=500, max_height=200)]:
+            bitmap = sample_page.render(scale=2, rotation=rotation, **limits)
+            assert bitmap.width <= limits.get("max_width", math.inf)
+            assert bitmap.height <= limits.get("max_height", math.inf)
+            assert bitmap.width * bitmap.height <= limits.get("max_pixels", math.inf)
+            assert (bitmap.width > bitmap.height) == (rotation == 90)